@@ -5,7 +5,20 @@ from __future__ import annotations
 from importlib import import_module
 from typing import Any
 
-__all__ = ["PDFToHTMLConverter", "VisualRegressionTester", "TemplateRefiner"]
+__all__ = [
+    "PDFToHTMLConverter",
+    "VisualRegressionTester",
+    "TemplateRefiner",
+    "OutputSink",
+    "DirectorySink",
+    "MemorySink",
+    "TemplateStore",
+    "MetricsRegistry",
+    "EventHooks",
+    "ManifestReader",
+    "load_manifest",
+    "SpatialIndex",
+]
 
 
 def __getattr__(name: str) -> Any:  # pragma: no cover - trivial delegation
@@ -13,4 +26,14 @@ def __getattr__(name: str) -> Any:  # pragma: no cover - trivial delegation
         return getattr(import_module("agentkit.pdf_to_html"), name)
     if name in {"VisualRegressionTester", "TemplateRefiner"}:
         return getattr(import_module("agentkit.visual_regression"), name)
+    if name in {"OutputSink", "DirectorySink", "MemorySink"}:
+        return getattr(import_module("agentkit.sinks"), name)
+    if name == "TemplateStore":
+        return getattr(import_module("agentkit.templates"), name)
+    if name in {"MetricsRegistry", "EventHooks"}:
+        return getattr(import_module("agentkit.metrics"), name)
+    if name in {"ManifestReader", "load_manifest"}:
+        return getattr(import_module("agentkit.manifest"), name)
+    if name == "SpatialIndex":
+        return getattr(import_module("agentkit.spatial"), name)
     raise AttributeError(name)
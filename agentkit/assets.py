@@ -0,0 +1,324 @@
+"""Asset stage that normalizes, optionally transcodes and writes images concurrently."""
+
+from __future__ import annotations
+
+import base64
+import dataclasses
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional, Protocol, Tuple
+
+from .shared import optional_import
+from .sinks import OutputSink
+
+LOGGER = logging.getLogger(__name__)
+
+# Formats Chromium can display directly, keyed by file extension.
+BROWSER_IMAGE_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "bmp": "image/bmp",
+}
+
+TRANSCODE_FORMATS = ("webp", "png")
+
+
+class AssetCache(Protocol):
+    """Content-addressed store of processed image assets, e.g. a template store."""
+
+    def load_asset(self, key: str) -> Optional[Tuple[bytes, str]]:
+        ...
+
+    def store_asset(self, key: str, data: bytes, extension: str) -> None:
+        ...
+
+
+# Pillow modes of the PDF colour spaces whose samples can be decoded.
+COLORSPACE_MODES = {"DeviceGray": "L", "DeviceRGB": "RGB", "DeviceCMYK": "CMYK"}
+
+
+@dataclasses.dataclass(frozen=True)
+class RawImageSpec:
+    """Geometry and colour space of undecorated sample data (for example a Flate-decoded image stream).
+
+    ``colorspace`` is the PDF colour space family (``"DeviceRGB"``,
+    ``"Indexed"``, ...) or ``None`` for stencil masks. Indexed images also
+    carry the ``palette`` lookup table and the colour space of its entries.
+    """
+
+    width: int
+    height: int
+    bits: int = 8
+    colorspace: str | None = "DeviceGray"
+    palette: bytes | None = dataclasses.field(default=None, repr=False)
+    palette_colorspace: str | None = None
+
+
+def _pillow() -> Any:
+    """Return ``PIL.Image``, imported on first use, or ``None`` when Pillow is missing."""
+
+    return optional_import("PIL.Image")
+
+
+def _sniff_extension(data: bytes) -> str | None:
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[:2] == b"BM":
+        return "bmp"
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    if data.startswith(b"\x00\x00\x00\x0cjP  ") or data.startswith(b"\xff\x4f\xff\x51"):
+        return "jp2"
+    return None
+
+
+class AssetPipeline:
+    """Processes image assets on a thread pool before they reach the output sink.
+
+    Every submitted image is normalized into a format browsers can display,
+    optionally transcoded to WebP or optimized PNG (kept only when smaller) and
+    either written to the sink or, when it is at most ``inline_threshold``
+    bytes, returned as a ``data:`` URI so the page does not fetch it at all.
+    With a ``cache`` the processed bytes are reused for identical source images.
+    """
+
+    def __init__(
+        self,
+        sink: OutputSink,
+        *,
+        max_workers: int = 4,
+        transcode: str | None = None,
+        inline_threshold: int = 0,
+        cache: AssetCache | None = None,
+    ) -> None:
+        if transcode is not None and transcode not in TRANSCODE_FORMATS:
+            raise ValueError(f"Unsupported transcode format {transcode!r}; expected one of {TRANSCODE_FORMATS}")
+        self.sink = sink
+        self.transcode = transcode
+        self.inline_threshold = max(0, inline_threshold)
+        self.cache = cache
+        # Content digest of the source image behind every produced ``src``.
+        self.digests: dict[str, str] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="agentkit-assets")
+        self._futures: list[Future] = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {"images": 0, "inlined": 0, "cached": 0, "bytes_in": 0, "bytes_out": 0}
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Counts of processed, inlined and cached images and their bytes in and out."""
+
+        with self._lock:
+            return dict(self._stats)
+
+    def __enter__(self) -> "AssetPipeline":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.close(wait_for_errors=exc_type is None)
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+    def submit_image(
+        self,
+        stem: str,
+        data: bytes,
+        *,
+        extension: str,
+        raw: RawImageSpec | None = None,
+    ) -> "Future[str | None]":
+        """Queue an embedded image; the future resolves to its ``src`` (or ``None`` on failure).
+
+        Args:
+            stem: Sink name without extension, e.g. ``"assets/page_1_image_1"``.
+            data: The image bytes as extracted from the PDF.
+            extension: Extension suggested by the extractor.
+            raw: Geometry used to decode ``data`` when it holds bare samples.
+        """
+
+        future = self._executor.submit(self._process_image, stem, data, extension.lower(), raw)
+        self._futures.append(future)
+        return future
+
+    def submit_file(self, name: str, data: bytes) -> "Future[str]":
+        """Queue a write of ``data`` to ``name`` without any processing."""
+
+        future = self._executor.submit(self._write, name, data)
+        self._futures.append(future)
+        return future
+
+    def close(self, *, wait_for_errors: bool = True) -> None:
+        """Wait for queued work; re-raise the first write error when requested."""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        if wait_for_errors:
+            for future in self._futures:
+                future.result()
+        self._futures.clear()
+        stats = self._stats
+        if stats["images"]:
+            LOGGER.debug(
+                "Processed %s images (%s inlined, %s cached): %s -> %s bytes",
+                stats["images"],
+                stats["inlined"],
+                stats["cached"],
+                stats["bytes_in"],
+                stats["bytes_out"],
+            )
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def _write(self, name: str, data: bytes) -> str:
+        self.sink.write_bytes(name, data)
+        return name
+
+    def _process_image(self, stem: str, data: bytes, extension: str, raw: RawImageSpec | None) -> str | None:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._stats["bytes_in"] += len(data)
+        # Cached results depend on the output settings as well as the source bytes.
+        cache_key = f"{digest}-{self.transcode or 'source'}"
+        if raw is not None:
+            # Bare samples only mean something together with their geometry and colour space.
+            spec = hashlib.sha256(repr(dataclasses.astuple(raw)).encode("utf-8")).hexdigest()[:16]
+            cache_key = f"{cache_key}-{spec}"
+        cached = self.cache.load_asset(cache_key) if self.cache is not None else None
+        if cached is not None:
+            data, extension = cached
+            with self._lock:
+                self._stats["cached"] += 1
+        else:
+            try:
+                data, extension = self._normalize(data, extension, raw)
+                if self.transcode is not None:
+                    data, extension = self._transcode(data, extension)
+            except Exception as exc:  # noqa: BLE001 - a broken image must not abort the conversion
+                LOGGER.warning("Failed to process image asset %s: %s", stem, exc)
+                return None
+            if self.cache is not None:
+                self.cache.store_asset(cache_key, data, extension)
+
+        src = self._emit(stem, data, extension)
+        if src is not None:
+            with self._lock:
+                self.digests[src] = digest
+        return src
+
+    def _emit(self, stem: str, data: bytes, extension: str) -> str | None:
+        with self._lock:
+            self._stats["images"] += 1
+            self._stats["bytes_out"] += len(data)
+
+        mime = BROWSER_IMAGE_TYPES.get(extension)
+        if mime is not None and len(data) <= self.inline_threshold:
+            with self._lock:
+                self._stats["inlined"] += 1
+            return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+        name = f"{stem}.{extension}"
+        try:
+            self._write(name, data)
+        except OSError as exc:  # pragma: no cover - filesystem errors are environment-specific
+            LOGGER.warning("Failed to write image asset %s: %s", name, exc)
+            return None
+        return name
+
+    def _normalize(self, data: bytes, extension: str, raw: RawImageSpec | None) -> tuple[bytes, str]:
+        sniffed = _sniff_extension(data)
+        if sniffed in BROWSER_IMAGE_TYPES:
+            return data, "jpg" if sniffed == "jpeg" else sniffed
+        Image = _pillow()
+        if Image is None:
+            return data, sniffed or extension
+
+        if sniffed is not None:
+            # Containers such as TIFF or JPEG 2000 that browsers cannot show.
+            with Image.open(io.BytesIO(data)) as img:
+                return self._encode_png(img), "png"
+        if raw is not None:
+            return self._encode_png(self._decode_samples(data, raw)), "png"
+
+        LOGGER.debug("Leaving unrecognized image data as .%s", extension)
+        return data, extension
+
+    def _decode_samples(self, data: bytes, raw: RawImageSpec) -> Any:
+        """Decode bare samples; raises ``ValueError`` for layouts that cannot be decoded faithfully."""
+
+        Image = _pillow()
+        size = (raw.width, raw.height)
+        if raw.colorspace == "Indexed":
+            rawmode = {1: "P;1", 2: "P;2", 4: "P;4", 8: "P"}.get(raw.bits)
+            base_mode = COLORSPACE_MODES.get(raw.palette_colorspace or "")
+            if rawmode is None or base_mode is None or not raw.palette:
+                raise ValueError(
+                    f"unsupported indexed image ({raw.bits} bits over {raw.palette_colorspace or 'unknown'} palette)"
+                )
+            img = Image.frombytes("P", size, data, "raw", rawmode)
+            img.putpalette(self._palette_rgb(raw.palette, base_mode))
+            return img
+        if raw.bits == 1 and raw.colorspace in (None, "DeviceGray"):
+            # Stencil masks and bilevel images use 0 for black, like Pillow's "1" mode.
+            return Image.frombytes("1", size, data)
+        mode = COLORSPACE_MODES.get(raw.colorspace or "")
+        if mode is None or not (raw.bits == 8 or (mode == "L" and raw.bits in (2, 4))):
+            raise ValueError(f"unsupported colour space {raw.colorspace or 'unknown'} with {raw.bits} bits per component")
+        return Image.frombytes(mode, size, data, "raw", mode if raw.bits == 8 else f"L;{raw.bits}")
+
+    def _palette_rgb(self, palette: bytes, mode: str) -> bytes:
+        components = len(mode)
+        entries = min(256, len(palette) // components)
+        if entries == 0:
+            raise ValueError("empty palette")
+        table = _pillow().frombytes(mode, (entries, 1), palette[: entries * components])
+        return table.convert("RGB").tobytes()
+
+    def _encode_png(self, img: Any) -> bytes:
+        if img.mode not in {"1", "L", "LA", "P", "RGB", "RGBA"}:
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    def _transcode(self, data: bytes, extension: str) -> tuple[bytes, str]:
+        Image = _pillow()
+        if Image is None or extension not in BROWSER_IMAGE_TYPES:
+            return data, extension
+        if self.transcode == "png" and extension == "jpg":
+            # Re-encoding photos as PNG only makes them bigger.
+            return data, extension
+
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            buffer = io.BytesIO()
+            if self.transcode == "webp":
+                if img.mode not in {"RGB", "RGBA"}:
+                    img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+                if extension == "jpg":
+                    img.save(buffer, format="WEBP", quality=85, method=4)
+                else:
+                    img.save(buffer, format="WEBP", lossless=True, method=4)
+                candidate, candidate_ext = buffer.getvalue(), "webp"
+            else:
+                candidate, candidate_ext = self._encode_png(img), "png"
+
+        if len(candidate) < len(data):
+            return candidate, candidate_ext
+        return data, extension
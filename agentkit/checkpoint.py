@@ -0,0 +1,170 @@
+"""Append-only journal of completed work so interrupted conversions can resume.
+
+A checkpointed conversion appends one JSON record per finished unit of work to
+``checkpoint.jsonl`` in its output directory:
+
+``start``
+    Digest of the PDF and the settings that shape the extracted data.
+``page``
+    The layout of one page as soon as pdfminer has extracted it.
+``images``
+    The embedded images of every page once all of them were written.
+``render``
+    One reference page render after its PNG reached the output directory.
+``comparison`` / ``iteration``
+    Per-page diff scores and per-iteration means of a refinement run.
+
+Records are flushed one at a time, so a process killed at any point leaves a
+valid journal except for, at most, a torn last line, which is dropped on
+load. A resumed run only reuses the journal when its ``start`` record matches
+the current PDF and settings.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "checkpoint.jsonl"
+CHECKPOINT_FORMAT = 1
+
+_CHUNK = 1 << 20
+
+
+def source_digest(path: Optional[Path], data: Optional[memoryview]) -> str:
+    """Return the SHA-256 of a PDF given by ``path`` or by its bytes."""
+
+    digest = hashlib.sha256()
+    if data is not None:
+        digest.update(data)
+    else:
+        assert path is not None
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_CHUNK), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Journal of the pages, assets and scores a conversion has completed.
+
+    Args:
+        path: Location of the journal, normally ``<output>/checkpoint.jsonl``.
+        source: Digest of the PDF (see :func:`source_digest`).
+        settings: Conversion settings the recorded work depends on.
+        resume: Load matching records of an earlier run instead of starting
+            a new journal.
+    """
+
+    def __init__(self, path: Path, source: str, settings: Mapping[str, Any], *, resume: bool = False) -> None:
+        self.path = Path(path)
+        self.source = source
+        self.settings = json.loads(json.dumps(dict(settings)))
+        self.layouts: Dict[int, Dict[str, Any]] = {}
+        self.images: Optional[Dict[str, Any]] = None
+        self.renders: Dict[int, str] = {}
+        # iteration -> (text scale, {page: diff score})
+        self.comparisons: Dict[int, Tuple[float, Dict[int, float]]] = {}
+        # iteration -> (text scale, mean diff score)
+        self.iterations: Dict[int, Tuple[float, float]] = {}
+        self.resumed = False
+        self._lock = threading.Lock()
+
+        if resume and self.path.is_file():
+            self.resumed = self._load()
+        if not self.resumed:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(b"")
+            self._append({"kind": "start", "format": CHECKPOINT_FORMAT, "source": source, "settings": self.settings})
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _load(self) -> bool:
+        data = self.path.read_bytes()
+        records = []
+        valid_end = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            valid_end += len(line)
+
+        start = records[0] if records else {}
+        if (
+            start.get("kind") != "start"
+            or start.get("format") != CHECKPOINT_FORMAT
+            or start.get("source") != self.source
+            or start.get("settings") != self.settings
+        ):
+            LOGGER.warning("Checkpoint %s does not match this PDF or its settings; starting over", self.path)
+            return False
+        if valid_end < len(data):
+            LOGGER.info("Dropping a torn record at the end of %s", self.path)
+            os.truncate(self.path, valid_end)
+
+        for record in records[1:]:
+            kind = record.get("kind")
+            if kind == "page":
+                self.layouts[int(record["page"])] = record["layout"]
+            elif kind == "images":
+                self.images = {"pages": record["pages"], "digests": record["digests"]}
+            elif kind == "render":
+                self.renders[int(record["page"])] = record["src"]
+            elif kind == "comparison":
+                scale, scores = self.comparisons.setdefault(int(record["iteration"]), (float(record["scale"]), {}))
+                if scale == float(record["scale"]):
+                    scores[int(record["page"])] = float(record["score"])
+            elif kind == "iteration":
+                self.iterations[int(record["iteration"])] = (float(record["scale"]), float(record["mean"]))
+        LOGGER.info(
+            "Resuming from %s: %s extracted pages, %s reference renders, %s refinement iterations",
+            self.path,
+            len(self.layouts),
+            len(self.renders),
+            len(self.iterations),
+        )
+        return True
+
+    def take_refinement(self) -> Tuple[Dict[int, Tuple[float, Dict[int, float]]], Dict[int, Tuple[float, float]]]:
+        """Hand the loaded refinement records to one refiner; later calls get nothing."""
+
+        comparisons, iterations = self.comparisons, self.iterations
+        self.comparisons, self.iterations = {}, {}
+        return comparisons, iterations
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock, open(self.path, "ab") as fh:
+            fh.write(line)
+
+    def record_page(self, page_number: int, layout: Dict[str, Any]) -> None:
+        self.layouts[page_number] = layout
+        self._append({"kind": "page", "page": page_number, "layout": layout})
+
+    def record_images(self, pages: Dict[str, Any], digests: Dict[str, str]) -> None:
+        self.images = {"pages": pages, "digests": digests}
+        self._append({"kind": "images", "pages": pages, "digests": digests})
+
+    def record_render(self, page_number: int, src: str) -> None:
+        self.renders[page_number] = src
+        self._append({"kind": "render", "page": page_number, "src": src})
+
+    def record_comparison(self, iteration: int, page_number: int, scale: float, score: float) -> None:
+        self._append({"kind": "comparison", "iteration": iteration, "page": page_number, "scale": scale, "score": score})
+
+    def record_iteration(self, iteration: int, scale: float, mean: float) -> None:
+        self._append({"kind": "iteration", "iteration": iteration, "scale": scale, "mean": mean})
@@ -3,20 +3,37 @@
 from __future__ import annotations
 
 import argparse
+import dataclasses
+import json
 import logging
+import math
 import sys
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
 
+from .manifest import MANIFEST_FORMATS
 from .pdf_to_html import PDFToHTMLConverter
+from .serialize import PRECOMPRESS_ENCODINGS
+from .shards import merge_shards, parse_page_ranges, parse_shard
 from .shared import MissingDependencyError
-from .visual_regression import TemplateRefiner, VisualRegressionTester
+from .templates import TemplateStore
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .visual_regression import TemplateRefiner
 
 LOGGER = logging.getLogger(__name__)
 
 
 def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(description="Convert PDF to HTML5/CSS templates with regression testing.")
+    parser = argparse.ArgumentParser(
+        description="Convert PDF to HTML5/CSS templates with regression testing.",
+        epilog=(
+            "Run 'agentkit serve --help' for the long-running conversion server, "
+            "'agentkit merge --help' to combine sharded conversions, "
+            "'agentkit regress --help' to check a corpus against golden baselines and "
+            "'agentkit coldstart --help' to check the import-time budget."
+        ),
+    )
     parser.add_argument("pdf", type=Path, help="Path to the input PDF file.")
     parser.add_argument("output", type=Path, help="Directory where the HTML template will be written.")
     parser.add_argument("--iterations", type=int, default=3, help="Number of refinement iterations to run.")
@@ -28,17 +45,432 @@ def build_parser() -> argparse.ArgumentParser:
         default=144,
         help="DPI to use when rasterizing reference images for regression testing.",
     )
+    parser.add_argument(
+        "--split-pages",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Write N pages per HTML document under pages/ with a lazily loading index (default: single file).",
+    )
+    parser.add_argument(
+        "--keep-artifacts",
+        type=_artifact_policy,
+        default="best",
+        metavar="POLICY",
+        help="Which regression screenshots and heatmaps to write: always, best (default), worst:N or none.",
+    )
+    parser.add_argument(
+        "--prescreen",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Rank N candidate text scales with an in-process rasterizer and only confirm the best "
+        "--iterations of them in Chromium (default: off).",
+    )
+    parser.add_argument(
+        "--asset-workers",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Threads used to encode and write image assets (default: 4).",
+    )
+    parser.add_argument(
+        "--transcode",
+        choices=("webp", "png"),
+        help="Re-encode embedded images as WebP or optimized PNG when that makes them smaller.",
+    )
+    parser.add_argument(
+        "--inline-assets",
+        type=int,
+        default=0,
+        metavar="BYTES",
+        help="Embed images of at most BYTES bytes as data URIs instead of separate files (default: off).",
+    )
+    parser.add_argument(
+        "--node-budget",
+        type=int,
+        metavar="N",
+        help="Coalesce stacked text lines into multi-line blocks on pages with more than N positioned elements "
+        "(0 coalesces wherever possible; default: off).",
+    )
+    parser.add_argument(
+        "--manifest-format",
+        choices=MANIFEST_FORMATS,
+        default="json",
+        help="Write manifest.json, or compact per-page manifest.jsonl records with a byte offset index "
+        "for loading single pages (default: json).",
+    )
+    parser.add_argument(
+        "--precompress",
+        type=_encodings,
+        default=(),
+        metavar="ENCODINGS",
+        help="Also write precompressed copies of the HTML documents and the manifest for static serving, "
+        f"e.g. 'gzip,br' for .gz and .br files ({', '.join(PRECOMPRESS_ENCODINGS)}; br needs the brotli package).",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        metavar="PATH",
+        help="Write conversion metrics to PATH as OpenMetrics text, or as a JSON snapshot if PATH ends in .json.",
+    )
+    parser.add_argument(
+        "--pages",
+        type=_page_ranges,
+        metavar="RANGES",
+        help="Convert only these 1-based pages, e.g. '1-10,15'.",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard,
+        metavar="I/N",
+        help="Convert only the I-th of N contiguous slices of the (selected) pages; combine them with 'agentkit merge'.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Journal extracted pages, assets and refinement scores to checkpoint.jsonl in the output directory.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted --checkpoint run, skipping work its journal records as done (implies --checkpoint).",
+    )
+    parser.add_argument(
+        "--template-store",
+        type=Path,
+        metavar="DIR",
+        help="Remember tuned settings per document family in DIR and reuse them for matching documents.",
+    )
+    parser.add_argument(
+        "--accept-diff",
+        type=float,
+        default=0.02,
+        metavar="SCORE",
+        help=(
+            "Stop refining once the mean diff is at most SCORE when starting from a family template "
+            "or font-metric estimate (default: 0.02)."
+        ),
+    )
+    parser.add_argument(
+        "--scale-estimate",
+        action="store_true",
+        help="Estimate the text scale from font metrics instead of starting from 1.0.",
+    )
+    return parser
+
+
+def _page_ranges(value: str) -> List[int]:
+    try:
+        return parse_page_ranges(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def _artifact_policy(value: str) -> str:
+    # Same grammar as visual_regression.ArtifactPolicy.parse, checked here so that
+    # bad values fail before converting without importing the regression module.
+    text = value.strip().lower()
+    if text in {"always", "best", "none"}:
+        return text
+    for prefix in ("worst:", "worst-"):
+        if text.startswith(prefix) and text[len(prefix) :].isdigit() and int(text[len(prefix) :]) > 0:
+            return text
+    raise argparse.ArgumentTypeError(f"unknown policy {value!r}; expected always, best, worst:N or none")
+
+
+def _encodings(value: str) -> List[str]:
+    encodings = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = [encoding for encoding in encodings if encoding not in PRECOMPRESS_ENCODINGS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unsupported encoding {unknown[0]!r}; expected one of {', '.join(PRECOMPRESS_ENCODINGS)}"
+        )
+    return encodings
+
+
+def _shard(value: str) -> Tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="agentkit serve",
+        description="Run a local conversion server backed by a pool of pre-warmed workers.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind the HTTP server to.")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on (default: 8765).")
+    parser.add_argument("--socket", type=Path, help="Listen on this Unix domain socket instead of TCP.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of warm conversion workers.")
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="Maximum number of queued jobs before new requests are rejected with 503.",
+    )
+    parser.add_argument("--iterations", type=int, default=3, help="Default number of refinement iterations per job.")
+    parser.add_argument("--no-regression", action="store_true", help="Do not run the regression loop for jobs.")
+    parser.add_argument("--dpi", type=int, default=144, help="Default rasterization DPI for reference images.")
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        help="Directory receiving job outputs; jobs may only name subdirectories of it.",
+    )
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Cancel jobs that run longer and answer 504 (default: no limit).",
+    )
+    parser.add_argument(
+        "--max-upload-bytes",
+        type=int,
+        metavar="BYTES",
+        help="Reject larger request bodies with 413 (default: 256 MiB).",
+    )
+    parser.add_argument(
+        "--output-ttl",
+        type=float,
+        metavar="SECONDS",
+        help="Delete job outputs not modified for this long; 0 keeps them (default: 3600).",
+    )
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO).")
+    return parser
+
+
+def build_merge_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="agentkit merge",
+        description="Combine the outputs of sharded or page-range conversions into one template.",
+    )
+    parser.add_argument("output", type=Path, help="Directory receiving the merged template.")
+    parser.add_argument("shards", type=Path, nargs="+", help="Output directories of the shard conversions.")
+    parser.add_argument(
+        "--split-pages",
+        type=int,
+        metavar="N",
+        help="Pages per HTML document in the merged output (default: same as the shards).",
+    )
+    parser.add_argument("--text-scale", type=float, help="Text scale of the merged output (default: first shard's).")
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO).")
+    return parser
+
+
+def run_merge(argv: List[str]) -> int:
+    args = build_merge_parser().parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+
+    try:
+        merge_shards(args.shards, args.output, pages_per_file=args.split_pages, text_scale=args.text_scale)
+    except ValueError as exc:
+        LOGGER.error("%s", exc)
+        return 1
+    return 0
+
+
+def build_regress_parser() -> argparse.ArgumentParser:
+    from .regress import DEFAULT_SCORE_TOLERANCE, DEFAULT_TIME_TOLERANCE
+
+    parser = argparse.ArgumentParser(
+        prog="agentkit regress",
+        description="Convert a corpus of PDFs and compare diff scores and timings with golden baselines.",
+    )
+    parser.add_argument(
+        "corpus",
+        type=Path,
+        nargs="?",
+        help="Directory searched recursively for PDFs (default: the sample PDFs of a source checkout).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("agentkit-regress"),
+        help="Directory receiving the conversions and report.json (default: ./agentkit-regress).",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Golden baseline file (default: agentkit-baseline.json in the corpus directory).",
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results of this run as the new baseline.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Documents converted in parallel (default: up to 4); use 1 for the most stable timings.",
+    )
+    parser.add_argument(
+        "--score-tolerance",
+        type=float,
+        default=DEFAULT_SCORE_TOLERANCE,
+        help=f"Allowed absolute increase of a diff score (default: {DEFAULT_SCORE_TOLERANCE}).",
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=DEFAULT_TIME_TOLERANCE,
+        help=f"Allowed relative slowdown of a conversion stage (default: {DEFAULT_TIME_TOLERANCE}).",
+    )
+    parser.add_argument("--iterations", type=int, default=1, help="Refinement iterations per document (default: 1).")
+    parser.add_argument("--no-regression", action="store_true", help="Only compare timings and element counts.")
+    parser.add_argument("--dpi", type=int, default=144, help="DPI of the reference renders (default: 144).")
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO).")
     return parser
 
 
+def run_regress(argv: List[str]) -> int:
+    args = build_regress_parser().parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+
+    from .regress import default_corpus, exit_status, run_corpus
+
+    try:
+        report = run_corpus(
+            args.corpus if args.corpus is not None else default_corpus(),
+            args.output,
+            baseline_path=args.baseline,
+            update_baseline=args.update_baseline,
+            workers=args.workers,
+            regression=not args.no_regression,
+            iterations=args.iterations,
+            dpi=args.dpi,
+            score_tolerance=args.score_tolerance,
+            time_tolerance=args.time_tolerance,
+        )
+    except ValueError as exc:
+        LOGGER.error("%s", exc)
+        return 1
+    summary = report["summary"]
+    LOGGER.info(
+        "%s documents: %s ok, %s new, %s regressed, %s failed (report: %s)",
+        summary["documents"],
+        summary["ok"],
+        summary["new"],
+        summary["regressed"],
+        summary["failed"],
+        args.output / "report.json",
+    )
+    return 0 if args.update_baseline else exit_status(report)
+
+
+def build_coldstart_parser() -> argparse.ArgumentParser:
+    from .coldstart import DEFAULT_BUDGET_MS, DEFAULT_MODULE
+
+    parser = argparse.ArgumentParser(
+        prog="agentkit coldstart",
+        description="Measure import times with 'python -X importtime' and fail when they exceed the budget.",
+    )
+    parser.add_argument(
+        "--module",
+        action="append",
+        dest="modules",
+        metavar="NAME",
+        help=f"Module to import; may be repeated (default: {DEFAULT_MODULE}).",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Maximum median cumulative import time in milliseconds (default: {DEFAULT_BUDGET_MS:g}).",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (default: 5).")
+    parser.add_argument("--json", action="store_true", help="Print the measurements as JSON.")
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO).")
+    return parser
+
+
+def run_coldstart(argv: List[str]) -> int:
+    args = build_coldstart_parser().parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+
+    from .coldstart import DEFAULT_MODULE, check_budget
+
+    try:
+        profiles = check_budget(args.modules or [DEFAULT_MODULE], budget_ms=args.budget_ms, runs=args.runs)
+    except RuntimeError as exc:
+        LOGGER.error("%s", exc)
+        return 1
+    if args.json:
+        print(json.dumps([dataclasses.asdict(profile) for profile in profiles], indent=2))
+    return 0 if all(profile.within(args.budget_ms) for profile in profiles) else 1
+
+
+def run_serve(argv: List[str]) -> int:
+    args = build_serve_parser().parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+
+    from .server import DEFAULT_MAX_UPLOAD_BYTES, DEFAULT_OUTPUT_TTL, ConversionServer
+
+    output_ttl = DEFAULT_OUTPUT_TTL if args.output_ttl is None else args.output_ttl
+    server = ConversionServer(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        iterations=args.iterations,
+        regression=not args.no_regression,
+        dpi=args.dpi,
+        work_dir=args.work_dir,
+        job_timeout=args.job_timeout,
+        max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES if args.max_upload_bytes is None else args.max_upload_bytes,
+        output_ttl=output_ttl or None,
+    )
+    try:
+        server.serve_forever(host=args.host, port=args.port, socket_path=args.socket)
+    except MissingDependencyError as exc:
+        LOGGER.error("%s", exc)
+        return 1
+    except KeyboardInterrupt:  # pragma: no cover - interactive shutdown
+        LOGGER.info("Shutting down conversion server.")
+    return 0
+
+
+SUBCOMMANDS: Dict[str, Callable[[List[str]], int]] = {
+    "serve": run_serve,
+    "merge": run_merge,
+    "regress": run_regress,
+    "coldstart": run_coldstart,
+}
+
+
 def run(argv: List[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
 
     logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
 
     try:
-        converter = PDFToHTMLConverter(args.pdf, args.output, dpi=args.dpi)
+        return _convert_and_refine(args)
+    finally:
+        if args.metrics_file is not None:
+            _write_metrics(args.metrics_file)
+
+
+def _convert_and_refine(args: argparse.Namespace) -> int:
+    try:
+        converter = PDFToHTMLConverter(
+            args.pdf,
+            args.output,
+            dpi=args.dpi,
+            pages_per_file=args.split_pages,
+            asset_workers=args.asset_workers,
+            image_format=args.transcode,
+            inline_threshold=args.inline_assets,
+            pages=args.pages,
+            shard=args.shard,
+            template_store=TemplateStore(args.template_store) if args.template_store else None,
+            estimate_scale=args.scale_estimate,
+            node_budget=args.node_budget,
+            manifest_format=args.manifest_format,
+            precompress=args.precompress,
+            checkpoint=args.checkpoint,
+            resume=args.resume,
+        )
         converter.convert()
     except MissingDependencyError as exc:
         LOGGER.error("%s", exc)
@@ -46,34 +478,74 @@ def run(argv: List[str] | None = None) -> int:
 
     if args.no_regression:
         LOGGER.info("Skipping regression loop as requested.")
+        _update_template_store(converter, None)
         return 0
 
     # Use generated reference images when available
-    manifest_path = converter.output_dir / "manifest.json"
-    references: List[Path] = []
-    if manifest_path.exists():
-        import json
-
-        with open(manifest_path, "r", encoding="utf-8") as fh:
-            manifest = json.load(fh)
-        for page in manifest.get("pages", []):
-            reference = page.get("reference") or page.get("background")
-            if reference:
-                references.append(converter.output_dir / reference)
+    references = converter.reference_paths()
 
     if not references:
         LOGGER.warning("No reference images found for regression testing.")
+        _update_template_store(converter, None)
         return 0
 
+    # A family template or metric estimate usually needs just one verifying iteration.
+    seeded = converter.template is not None or converter.scale_estimate is not None
+    # Imported here so conversions without regression never load Pillow or Playwright.
+    from .visual_regression import TemplateRefiner, VisualRegressionTester
+
     try:
         tester = VisualRegressionTester()
-        refiner = TemplateRefiner(converter, tester, references, max_iterations=args.iterations)
+        refiner = TemplateRefiner(
+            converter,
+            tester,
+            references,
+            max_iterations=args.iterations,
+            keep_artifacts=args.keep_artifacts,
+            target_score=args.accept_diff if seeded else None,
+            prescreen=args.prescreen,
+        )
         refiner.run()
     except MissingDependencyError as exc:
         LOGGER.warning("Visual regression skipped: %s", exc)
         return 0
+    _update_template_store(converter, refiner)
     return 0
 
 
+def _write_metrics(path: Path) -> None:
+    from .metrics import REGISTRY
+
+    if path.suffix.lower() == ".json":
+        path.write_text(json.dumps(REGISTRY.snapshot(), indent=2), encoding="utf-8")
+    else:
+        path.write_text(REGISTRY.to_openmetrics(), encoding="utf-8")
+    LOGGER.info("Wrote metrics to %s", path)
+
+
+def _update_template_store(converter: PDFToHTMLConverter, refiner: TemplateRefiner | None) -> None:
+    store = converter.template_store
+    if store is None or converter.fingerprint is None:
+        return
+    template = converter.template
+    if refiner is None or not math.isfinite(refiner.best_score):
+        # Nothing was measured; only count reuse of an existing family.
+        if template is not None:
+            store.record_hit(template)
+        return
+    if template is not None and refiner.best_scale == template.text_scale:
+        template.diff_score = refiner.best_score
+        store.record_hit(template)
+        return
+    store.record(
+        converter.fingerprint,
+        text_scale=refiner.best_scale,
+        diff_score=refiner.best_score,
+        source=converter.source_name,
+        pages=len(converter.manifest["pages"]) if converter.manifest else 0,
+    )
+    LOGGER.info("Stored document family %s (text scale %.3f)", converter.fingerprint[:12], refiner.best_scale)
+
+
 if __name__ == "__main__":  # pragma: no cover
     sys.exit(run())
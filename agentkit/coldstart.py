@@ -0,0 +1,107 @@
+"""Import-time benchmark that guards the CLI's cold-start budget."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MODULE = "agentkit.cli"
+# Cumulative import time of ``agentkit.cli`` that job runners are willing to pay.
+DEFAULT_BUDGET_MS = 150.0
+# Optional backends that must only be imported on first use.
+HEAVY_MODULES = ("fitz", "pymupdf", "pdf2image", "PIL", "playwright", "pdfminer", "numpy", "asyncio")
+
+
+@dataclasses.dataclass
+class ImportProfile:
+    """Import cost of one module measured with ``python -X importtime``."""
+
+    module: str
+    # Median cumulative import time over all runs, in milliseconds.
+    total_ms: float
+    runs: List[float]
+    # Modules with the largest self time in the last run.
+    heaviest: List[Tuple[str, float]]
+    # Heavy optional backends that were imported eagerly.
+    heavy_imports: List[str]
+
+    def within(self, budget_ms: float) -> bool:
+        return self.total_ms <= budget_ms and not self.heavy_imports
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[float, float]]:
+    """Parse ``-X importtime`` output into ``{module: (self_ms, cumulative_ms)}``."""
+
+    timings: Dict[str, Tuple[float, float]] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:  # the header line
+            continue
+        timings[fields[2].strip()] = (self_us / 1000.0, cumulative_us / 1000.0)
+    return timings
+
+
+def profile_import(module: str = DEFAULT_MODULE, *, runs: int = 5, python: Optional[str] = None) -> ImportProfile:
+    """Import ``module`` in ``runs`` fresh interpreters and collect its import cost."""
+
+    totals: List[float] = []
+    timings: Dict[str, Tuple[float, float]] = {}
+    for _ in range(max(1, runs)):
+        completed = subprocess.run(
+            [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip()}")
+        timings = parse_importtime(completed.stderr)
+        if module not in timings:
+            raise RuntimeError(f"No import timing reported for {module}")
+        totals.append(timings[module][1])
+
+    heaviest = sorted(((name, round(cost[0], 3)) for name, cost in timings.items()), key=lambda item: -item[1])[:10]
+    heavy = sorted(name for name in timings if name.split(".")[0] in HEAVY_MODULES)
+    return ImportProfile(
+        module=module,
+        total_ms=round(statistics.median(totals), 3),
+        runs=[round(total, 3) for total in totals],
+        heaviest=heaviest,
+        heavy_imports=heavy,
+    )
+
+
+def check_budget(
+    modules: Sequence[str] = (DEFAULT_MODULE,), *, budget_ms: float = DEFAULT_BUDGET_MS, runs: int = 5
+) -> List[ImportProfile]:
+    """Profile ``modules`` and log whether each stays within ``budget_ms`` without heavy imports."""
+
+    profiles = []
+    for module in modules:
+        profile = profile_import(module, runs=runs)
+        profiles.append(profile)
+        if profile.heavy_imports:
+            LOGGER.error("%s eagerly imports %s", module, ", ".join(profile.heavy_imports))
+        if profile.total_ms > budget_ms:
+            LOGGER.error(
+                "%s takes %.1f ms to import (budget %.1f ms); heaviest: %s",
+                module,
+                profile.total_ms,
+                budget_ms,
+                ", ".join(f"{name} {cost:.1f} ms" for name, cost in profile.heaviest[:5]),
+            )
+        elif not profile.heavy_imports:
+            LOGGER.info("%s imports in %.1f ms (budget %.1f ms)", module, profile.total_ms, budget_ms)
+    return profiles
@@ -0,0 +1,123 @@
+"""Estimate the text scale analytically from font metrics instead of browser renders."""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import logging
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .pdf_to_html import PageLayout, TextElement
+
+LOGGER = logging.getLogger(__name__)
+
+# Lines shorter than this say little about glyph widths.
+MIN_LINE_CHARS = 4
+# Same bounds as the refinement search.
+MIN_SCALE = 0.5
+MAX_SCALE = 1.5
+
+# The generated CSS falls back to 'Helvetica Neue', Arial, sans-serif; Arial shares
+# Helvetica's advance widths, which pdfminer ships as standard font metrics.
+_FALLBACK_FONTS = {
+    (False, False): "Helvetica",
+    (True, False): "Helvetica-Bold",
+    (False, True): "Helvetica-Oblique",
+    (True, True): "Helvetica-BoldOblique",
+}
+
+
+@dataclasses.dataclass
+class ScaleEstimate:
+    """Text scale that makes the fallback font match the PDF's line widths."""
+
+    scale: float
+    lines: int
+    # Interquartile range of the per-line ratios; small values mean a consistent estimate.
+    spread: float
+    per_font: Dict[str, float] = dataclasses.field(default_factory=dict)
+
+
+@functools.lru_cache(maxsize=None)
+def _width_table(bold: bool, italic: bool) -> Tuple[Dict[str, int], float]:
+    from pdfminer.fontmetrics import FONT_METRICS
+
+    _, widths = FONT_METRICS[_FALLBACK_FONTS[(bold, italic)]]
+    return widths, sum(widths.values()) / len(widths)
+
+
+def text_width(text: str, font_size: float, *, bold: bool = False, italic: bool = False) -> float:
+    """Return the advance width of ``text`` in the fallback font at ``font_size``."""
+
+    widths, average = _width_table(bold, italic)
+    return sum(widths.get(char, average) for char in text) * font_size / 1000.0
+
+
+def _is_bold(text: "TextElement") -> bool:
+    try:
+        return int(text.font_weight or 400) >= 600
+    except ValueError:
+        return False
+
+
+def _line_ratio(text: "TextElement") -> Optional[float]:
+    content = text.text
+    if len(content.strip()) < MIN_LINE_CHARS or text.width <= 0 or text.font_size <= 0:
+        return None
+    rendered = text_width(content, text.font_size, bold=_is_bold(text), italic=text.font_style == "italic")
+    if rendered <= 0:
+        return None
+    return text.width / rendered
+
+
+def _weighted_quantile(samples: Sequence[Tuple[float, int]], quantile: float) -> float:
+    ordered = sorted(samples)
+    total = sum(weight for _, weight in ordered)
+    threshold = total * quantile
+    cumulative = 0
+    for value, weight in ordered:
+        cumulative += weight
+        if cumulative >= threshold:
+            return value
+    return ordered[-1][0]
+
+
+def estimate_text_scale(layouts: Iterable["PageLayout"]) -> Optional[ScaleEstimate]:
+    """Estimate the text scale from the measured width of every text line.
+
+    For each line the ratio between its width in the PDF and its width in the
+    CSS fallback font at the extracted font size is computed. The document
+    scale is the median of those ratios weighted by line length, which is
+    robust against lines whose word gaps were collapsed into single spaces.
+    Returns ``None`` when the document has no usable text.
+    """
+
+    try:
+        _width_table(False, False)
+    except ImportError:  # pragma: no cover - pdfminer is a core dependency
+        LOGGER.debug("pdfminer font metrics unavailable; skipping scale estimation.")
+        return None
+
+    samples: List[Tuple[float, int]] = []
+    by_font: Dict[str, List[Tuple[float, int]]] = {}
+    for layout in layouts:
+        for text in layout.texts:
+            ratio = _line_ratio(text)
+            if ratio is None:
+                continue
+            sample = (ratio, len(text.text))
+            samples.append(sample)
+            by_font.setdefault(text.font_family or "sans-serif", []).append(sample)
+
+    if not samples:
+        return None
+
+    def _clamp(value: float) -> float:
+        return max(MIN_SCALE, min(MAX_SCALE, value))
+
+    scale = _clamp(_weighted_quantile(samples, 0.5))
+    spread = _weighted_quantile(samples, 0.75) - _weighted_quantile(samples, 0.25)
+    per_font = {font: round(_clamp(_weighted_quantile(values, 0.5)), 4) for font, values in by_font.items()}
+    LOGGER.debug("Estimated text scale %.3f from %s lines (spread %.3f)", scale, len(samples), spread)
+    return ScaleEstimate(scale=round(scale, 4), lines=len(samples), spread=round(spread, 4), per_font=per_font)
@@ -0,0 +1,198 @@
+"""Line-delimited manifest with a page offset index for random access.
+
+``manifest.json`` stores a conversion as one pretty-printed document that has
+to be parsed completely even when a reader needs a single page. The
+``jsonl`` format writes the same data as compact records instead::
+
+    manifest.jsonl      {"record": "page", "page": 1, ...}
+                        {"record": "page", "page": 2, ...}
+                        {"record": "document", "pdf": ..., "text_scale": ...}
+    manifest.idx.json   {"format": 1, "document": [offset, length],
+                         "pages": {"1": [offset, length], ...}}
+
+Page records are appended as they are written, so a partial file stays
+readable; the index is written last and lets :class:`ManifestReader` load a
+page by seeking to its byte range. Without an index the reader scans the
+records once.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .serialize import open_precompressed
+from .sinks import DirectorySink, OutputSink
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_FORMATS = ("json", "jsonl")
+MANIFEST_NAMES = {"json": "manifest.json", "jsonl": "manifest.jsonl"}
+INDEX_NAME = "manifest.idx.json"
+INDEX_FORMAT = 1
+
+_Span = Tuple[int, int]
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    # ASCII-only output keeps character and byte offsets identical.
+    return json.dumps(record, separators=(",", ":")).encode("ascii") + b"\n"
+
+
+class ManifestWriter:
+    """Appends page records to ``manifest.jsonl`` and writes the offset index on close.
+
+    Usage::
+
+        with ManifestWriter(sink) as writer:
+            for page in pages:
+                writer.add_page(page)
+            writer.finish(document_fields)
+    """
+
+    def __init__(self, sink: OutputSink, name: str = MANIFEST_NAMES["jsonl"], *, encodings: Sequence[str] = ()) -> None:
+        self.sink = sink
+        self.name = name
+        # Precompressed copies of the records (see :mod:`agentkit.serialize`); offsets refer to the plain file.
+        self.encodings = tuple(encodings)
+        self._pages: Dict[str, _Span] = {}
+        self._document: Optional[_Span] = None
+        self._offset = 0
+        self._context: Any = None
+        self._fh: Any = None
+
+    def __enter__(self) -> "ManifestWriter":
+        self._context = open_precompressed(self.sink, self.name, self.encodings)
+        self._fh = self._context.__enter__()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        context, self._context, self._fh = self._context, None, None
+        context.__exit__(*exc_info)
+        if exc_info[0] is None:
+            self._write_index()
+
+    def _append(self, record: Dict[str, Any]) -> _Span:
+        if self._fh is None:
+            raise RuntimeError("ManifestWriter must be used as a context manager")
+        data = _encode(record)
+        self._fh.write(data)
+        span = (self._offset, len(data))
+        self._offset += len(data)
+        return span
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        self._pages[str(page["page"])] = self._append({"record": "page", **page})
+
+    def finish(self, document: Dict[str, Any]) -> None:
+        """Append the document record; pages are not repeated in it."""
+
+        fields = {key: value for key, value in document.items() if key != "pages"}
+        self._document = self._append({"record": "document", **fields})
+
+    def _write_index(self) -> None:
+        index = {
+            "format": INDEX_FORMAT,
+            "manifest": self.name,
+            "document": list(self._document) if self._document is not None else None,
+            "pages": {number: list(span) for number, span in self._pages.items()},
+        }
+        self.sink.write_text(INDEX_NAME, json.dumps(index, separators=(",", ":")))
+
+
+class ManifestReader:
+    """Random access to the records of a ``manifest.jsonl``.
+
+    ``source`` is an output directory or an :class:`~agentkit.sinks.OutputSink`.
+    Pages are read by seeking to the byte range recorded in the index, so
+    loading one page never parses the others.
+    """
+
+    def __init__(self, source: Union[Path, str, OutputSink], name: str = MANIFEST_NAMES["jsonl"]) -> None:
+        self.sink = source if isinstance(source, OutputSink) else DirectorySink(source)
+        self.name = name
+        self._pages: Dict[str, _Span] = {}
+        self._document: Optional[_Span] = None
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if self.sink.exists(INDEX_NAME):
+            index = json.loads(self.sink.read_text(INDEX_NAME))
+            if index.get("format") == INDEX_FORMAT:
+                self._pages = {number: (span[0], span[1]) for number, span in index.get("pages", {}).items()}
+                self._document = tuple(index["document"]) if index.get("document") else None  # type: ignore[assignment]
+                return
+            LOGGER.warning("Ignoring %s with unsupported format %r", INDEX_NAME, index.get("format"))
+        self._scan()
+
+    def _scan(self) -> None:
+        """Rebuild the index from the records, e.g. for a manifest that was never finished."""
+
+        offset = 0
+        for line in self.sink.read_bytes(self.name).splitlines(keepends=True):
+            span = (offset, len(line))
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                LOGGER.warning("Skipping truncated record at byte %s of %s", span[0], self.name)
+                continue
+            if record.get("record") == "page":
+                self._pages[str(record["page"])] = span
+            elif record.get("record") == "document":
+                self._document = span
+
+    def _read(self, span: _Span) -> Dict[str, Any]:
+        offset, length = span
+        path = self.sink.path_for(self.name)
+        if path is not None:
+            with open(path, "rb") as fh:
+                fh.seek(offset)
+                data = fh.read(length)
+        else:
+            data = self.sink.read_bytes(self.name)[offset : offset + length]
+        record = json.loads(data)
+        record.pop("record", None)
+        return record
+
+    def page_numbers(self) -> List[int]:
+        return [int(number) for number in self._pages]
+
+    def page(self, number: int) -> Dict[str, Any]:
+        """Return the record of page ``number``; raises ``KeyError`` when it is absent."""
+
+        return self._read(self._pages[str(number)])
+
+    def pages(self) -> Iterator[Dict[str, Any]]:
+        for number in self._pages:
+            yield self._read(self._pages[number])
+
+    def document(self) -> Dict[str, Any]:
+        """Return the document-level fields, or ``{}`` when the manifest was not finished."""
+
+        return self._read(self._document) if self._document is not None else {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Assemble the same structure ``manifest.json`` holds."""
+
+        manifest = self.document()
+        manifest["pages"] = list(self.pages())
+        return manifest
+
+
+def load_manifest(source: Union[Path, str, OutputSink]) -> Optional[Dict[str, Any]]:
+    """Load the manifest of an output directory or sink in either format.
+
+    Returns ``None`` when the output has no manifest.
+    """
+
+    sink = source if isinstance(source, OutputSink) else DirectorySink(source)
+    if sink.exists(MANIFEST_NAMES["json"]):
+        return json.loads(sink.read_text(MANIFEST_NAMES["json"]))
+    if sink.exists(MANIFEST_NAMES["jsonl"]):
+        return ManifestReader(sink).to_dict()
+    return None
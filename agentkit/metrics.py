@@ -0,0 +1,251 @@
+"""In-process metrics registry and event hooks for conversions and refinement runs."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds; spans a single small page up to a long document.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Normalized diff scores as returned by ``VisualRegressionTester.compare``.
+SCORE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+EVENTS = ("page_extracted", "page_rendered", "iteration_finished")
+
+# Called with the event name and its payload.
+EventCallback = Callable[[str, Dict[str, Any]], Any]
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> _LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: _LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "unknown"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._lock = lock
+
+    def samples(self) -> Iterable[Tuple[str, _LabelKey, float]]:  # pragma: no cover - overridden
+        return ()
+
+    def snapshot(self) -> Any:  # pragma: no cover - overridden
+        return None
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock) -> None:
+        super().__init__(name, documentation, lock)
+        self._values: Dict[_LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> Iterable[Tuple[str, _LabelKey, float]]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}_total", key, value
+
+    def snapshot(self) -> Any:
+        return [{"labels": dict(key), "value": value} for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value per label set that may go up and down, e.g. busy workers."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, _LabelKey, float]]:
+        for key, value in sorted(self._values.items()):
+            yield self.name, key, value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock, buckets: Sequence[float]) -> None:
+        super().__init__(name, documentation, lock)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        # Per label set: bucket counts (last entry is +Inf), observation count and sum.
+        self._series: Dict[_LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if math.isnan(value):
+            return
+        key = _label_key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            totals[0] += 1
+            totals[1] += value
+
+    def samples(self) -> Iterable[Tuple[str, _LabelKey, float]]:
+        for key, (counts, (count, total)) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key + (("le", _format_value(bound)),), cumulative
+            yield f"{self.name}_count", key, count
+            yield f"{self.name}_sum", key, total
+
+    def snapshot(self) -> Any:
+        series = []
+        for key, (counts, (count, total)) in sorted(self._series.items()):
+            cumulative, buckets = 0, {}
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                buckets[_format_value(bound)] = cumulative
+            series.append({"labels": dict(key), "count": int(count), "sum": total, "buckets": buckets})
+        return series
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms exportable as OpenMetrics text or JSON.
+
+    Metrics are created on first use, so instrumented code simply asks for
+    ``registry.counter("agentkit_pages", "...")`` wherever it records. All
+    updates are thread-safe. Unless told otherwise, converters and refiners
+    record into the process-wide :data:`REGISTRY`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str = "") -> Counter:
+        return self._get(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str = "") -> Gauge:
+        return self._get(Gauge, name, documentation)
+
+    def histogram(self, name: str, documentation: str = "", *, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, buckets)
+
+    def _get(self, cls: type, name: str, documentation: str, *args: Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(name, documentation, self._lock, *args)
+                    self._metrics[name] = metric
+        if type(metric) is not cls:
+            raise ValueError(f"Metric {name!r} is already registered as a {metric.kind}")
+        return metric
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def to_openmetrics(self) -> str:
+        """Render every metric in the OpenMetrics text exposition format."""
+
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                metric = self._metrics[name]
+                lines.append(f"# TYPE {name} {metric.kind}")
+                if metric.documentation:
+                    lines.append(f"# HELP {name} {metric.documentation}")
+                for sample, key, value in metric.samples():
+                    lines.append(f"{sample}{_format_labels(key)} {_format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of every metric."""
+
+        with self._lock:
+            return {
+                name: {"type": metric.kind, "help": metric.documentation, "series": metric.snapshot()}
+                for name, metric in sorted(self._metrics.items())
+            }
+
+
+REGISTRY = MetricsRegistry()
+
+
+class EventHooks:
+    """Callbacks fired on ``page_extracted``, ``page_rendered`` and ``iteration_finished``.
+
+    Callbacks receive the event name and a payload dictionary. They run on the
+    thread that produced the event; exceptions are logged and never abort a
+    conversion.
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: Dict[str, List[EventCallback]] = {event: [] for event in EVENTS}
+
+    def on(self, event: str, callback: Optional[EventCallback] = None) -> Any:
+        """Register ``callback`` for ``event`` (``"*"`` for all); usable as a decorator."""
+
+        events = EVENTS if event == "*" else (event,)
+        for name in events:
+            if name not in self._callbacks:
+                raise ValueError(f"Unknown event {name!r}; expected one of {', '.join(EVENTS)}")
+
+        def _register(func: EventCallback) -> EventCallback:
+            for name in events:
+                self._callbacks[name].append(func)
+            return func
+
+        return _register if callback is None else _register(callback)
+
+    def off(self, event: str, callback: EventCallback) -> None:
+        for name in EVENTS if event == "*" else (event,):
+            if callback in self._callbacks.get(name, []):
+                self._callbacks[name].remove(callback)
+
+    def emit(self, event: str, **payload: Any) -> None:
+        for callback in self._callbacks.get(event, ()):
+            try:
+                callback(event, payload)
+            except Exception:  # noqa: BLE001 - observers must not break the pipeline
+                LOGGER.exception("Event hook for %s failed", event)
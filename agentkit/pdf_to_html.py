@@ -2,26 +2,35 @@
 
 from __future__ import annotations
 
+import contextlib
 import dataclasses
+import functools
+import io
 import json
 import logging
+import math
+import os
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Any, Iterable, Sequence
-
-from .shared import MissingDependencyError
-
-try:
-    import fitz  # type: ignore  # pragma: no cover - optional dependency
-except ImportError:  # pragma: no cover - optional dependency
-    fitz = None  # type: ignore
-
-try:
-    from pdf2image import convert_from_path  # pragma: no cover - optional dependency
-except ImportError:  # pragma: no cover - optional dependency
-    convert_from_path = None  # type: ignore
-
-LAParams = LTChar = LTImage = LTTextBox = LTTextBoxHorizontal = LTTextContainer = None  # type: ignore
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, NamedTuple, Sequence, Union
+
+from .assets import AssetPipeline, RawImageSpec
+from .checkpoint import CHECKPOINT_NAME, Checkpoint, source_digest
+from .font_metrics import ScaleEstimate, estimate_text_scale
+from .manifest import MANIFEST_FORMATS, MANIFEST_NAMES, ManifestWriter
+from .metrics import REGISTRY, EventHooks, MetricsRegistry
+from .shared import ConversionCancelled, MissingDependencyError, optional_import
+from .sinks import DirectorySink, OutputSink
+from .serialize import open_serialized, validate_encodings
+from .spatial import SpatialIndex, element_box
+from .templates import FamilyTemplate, TemplateStore, fingerprint_layouts
+from .text_blocks import coalesce_layout
+
+LAParams = LTChar = LTFigure = LTImage = LTTextBox = LTTextBoxHorizontal = LTTextContainer = None  # type: ignore
 extract_pages = None  # type: ignore
 
 FONT_WEIGHT_KEYWORDS: list[tuple[str, str]] = [
@@ -69,11 +78,28 @@ FONT_FAMILY_OMIT_TOKENS = {
 
 MAX_EMBEDDED_IMAGE_PAGE_COVERAGE = 0.95
 
+PAGES_SUBDIR = "pages"
+# Per-page layout snapshots written by partial conversions so shards can be merged.
+LAYOUTS_SUBDIR = "layouts"
+# Vertical margin around each ``.page`` section (2rem at the default font size).
+PAGE_MARGIN_PX = 32
+# ``line-height: normal`` of the Helvetica/Arial fallback fonts, in ems.
+NORMAL_LINE_HEIGHT = 1.15
+
+# Tolerance (in PDF points) used when deciding whether shape edges line up.
+SHAPE_EDGE_TOLERANCE = 0.05
+
+# PyMuPDF image extensions that browsers cannot display and are converted to PNG.
+PYMUPDF_PIXMAP_EXTENSIONS = {"jpx", "jb2", "jbig2", "tif", "tiff", "pbm", "pgm", "ppm", "pnm", "pam", "psd"}
+
+# Pages per pdf2image call when PyMuPDF is missing; bounds Poppler's temporary output.
+PDF2IMAGE_WINDOW = 8
+
 
 def _ensure_pdfminer() -> None:
     """Import pdfminer lazily so CLI help works without the dependency."""
 
-    global extract_pages, LAParams, LTChar, LTImage, LTTextBox, LTTextBoxHorizontal, LTTextContainer
+    global extract_pages, LAParams, LTChar, LTFigure, LTImage, LTTextBox, LTTextBoxHorizontal, LTTextContainer
 
     if extract_pages is not None:
         return
@@ -83,6 +109,7 @@ def _ensure_pdfminer() -> None:
         from pdfminer.layout import (
             LAParams as _LAParams,
             LTChar as _LTChar,
+            LTFigure as _LTFigure,
             LTImage as _LTImage,
             LTTextBox as _LTTextBox,
             LTTextBoxHorizontal as _LTTextBoxHorizontal,
@@ -97,6 +124,7 @@ def _ensure_pdfminer() -> None:
     extract_pages = _extract_pages
     LAParams = _LAParams
     LTChar = _LTChar
+    LTFigure = _LTFigure
     LTImage = _LTImage
     LTTextBox = _LTTextBox
     LTTextBoxHorizontal = _LTTextBoxHorizontal
@@ -105,6 +133,182 @@ def _ensure_pdfminer() -> None:
 LOGGER = logging.getLogger(__name__)
 
 
+def _fitz() -> Any:
+    """Return the PyMuPDF module, imported on first use, or ``None`` when it is not installed."""
+
+    return optional_import("fitz")
+
+
+def _pdf2image() -> Any:
+    return optional_import("pdf2image")
+
+
+def _page_windows(indices: Sequence[int], size: int) -> list[list[int]]:
+    """Split sorted page ``indices`` into runs of consecutive pages of at most ``size`` pages."""
+
+    windows: list[list[int]] = []
+    for index in indices:
+        if windows and index == windows[-1][-1] + 1 and len(windows[-1]) < size:
+            windows[-1].append(index)
+        else:
+            windows.append([index])
+    return windows
+
+
+# Abbreviated (inline image) and calibrated colour space names with a device equivalent.
+COLORSPACE_ALIASES = {
+    "G": "DeviceGray",
+    "CalGray": "DeviceGray",
+    "RGB": "DeviceRGB",
+    "CalRGB": "DeviceRGB",
+    "CMYK": "DeviceCMYK",
+    "I": "Indexed",
+}
+# Component counts of ICC profiles mapped to the device colour space they are drawn like.
+ICC_COMPONENTS = {1: "DeviceGray", 3: "DeviceRGB", 4: "DeviceCMYK"}
+
+
+def _describe_colorspace(spec: Any) -> tuple[str | None, bytes | None, str | None]:
+    """Return ``(family, palette, palette family)`` of a pdfminer image colour space.
+
+    ``spec`` is :attr:`LTImage.colorspace`, a one-element list holding a name
+    or a reference, or the colour space array itself.
+    """
+
+    from pdfminer.pdftypes import resolve1
+
+    spec = resolve1(spec)
+    if isinstance(spec, list) and len(spec) == 1:
+        spec = resolve1(spec[0])
+    if spec is None or spec == []:
+        # Images without a colour space are stencil masks or JPX data; pdfminer reports 1 bit for masks.
+        return None, None, None
+    if not isinstance(spec, list):
+        name = str(getattr(spec, "name", spec))
+        return COLORSPACE_ALIASES.get(name, name), None, None
+
+    family = str(getattr(resolve1(spec[0]), "name", spec[0]))
+    family = COLORSPACE_ALIASES.get(family, family)
+    if family == "ICCBased" and len(spec) > 1:
+        profile = resolve1(spec[1])
+        attrs = getattr(profile, "attrs", {})
+        return ICC_COMPONENTS.get(int(resolve1(attrs.get("N", 0)) or 0), family), None, None
+    if family == "Indexed" and len(spec) > 3:
+        base = _describe_colorspace([spec[1]])[0]
+        lookup = resolve1(spec[3])
+        if hasattr(lookup, "get_data"):
+            lookup = lookup.get_data()
+        elif isinstance(lookup, str):
+            lookup = lookup.encode("latin-1")
+        return family, bytes(lookup) if isinstance(lookup, (bytes, bytearray)) else None, base
+    return family, None, None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_font_name(font_name: str | None) -> tuple[str | None, str | None, str | None]:
+    """Infer CSS family, style and weight from a PDF font name.
+
+    Results are cached per process so long-running workers only parse each
+    font name once.
+    """
+
+    if not font_name:
+        return None, None, None
+
+    base_name = font_name.split("+")[-1]
+    normalized = base_name.replace(".", " ").replace("_", " ")
+    normalized = re.sub(r"\s+", " ", normalized)
+    lowered = normalized.lower()
+
+    font_weight: str | None = None
+    for keyword, weight in FONT_WEIGHT_KEYWORDS:
+        if keyword in lowered:
+            font_weight = weight
+            break
+
+    font_style: str | None = None
+    for keyword, style in FONT_STYLE_KEYWORDS:
+        if keyword in lowered:
+            font_style = style
+            break
+
+    # Extract a human-readable family name by removing stylistic tokens.
+    tokens = re.split(r"[^A-Za-z]+", normalized)
+    family_tokens: list[str] = []
+    for token in tokens:
+        if not token:
+            continue
+        lowered_token = token.lower()
+        if lowered_token in FONT_FAMILY_OMIT_TOKENS or any(
+            keyword in lowered_token for keyword in FONT_FAMILY_OMIT_TOKENS
+        ):
+            continue
+        humanized = re.sub(r"(?<!^)(?=[A-Z])", " ", token)
+        family_tokens.append(humanized)
+
+    family = " ".join(family_tokens).strip()
+    if not family:
+        family = None
+
+    return family, font_style, font_weight
+
+
+# Called with a stage name (such as ``"extracted"``) and a 1-based page number.
+ProgressCallback = Callable[[str, int], Any]
+
+# A filesystem path, a bytes-like object (including ``mmap``) or a binary file object.
+PDFSource = Union[Path, str, bytes, bytearray, memoryview, BinaryIO]
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only stream over a buffer without copying it."""
+
+    def __init__(self, view: memoryview) -> None:
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = max(0, min(len(buffer), len(self._view) - self._position))
+        buffer[:size] = self._view[self._position : self._position + size]
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+class _Rect(NamedTuple):
+    """Minimal axis-aligned rectangle used when PyMuPDF's ``Rect`` is unavailable."""
+
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+    @property
+    def width(self) -> float:
+        return self.x1 - self.x0
+
+    @property
+    def height(self) -> float:
+        return self.y1 - self.y0
+
+
 @dataclasses.dataclass
 class TextElement:
     """Represents a positioned text element extracted from a PDF page."""
@@ -119,18 +323,27 @@ class TextElement:
     font_family: str | None = None
     font_weight: str | None = None
     font_style: str | None = None
+    # Distance between the baselines of a coalesced multi-line block.
+    line_height: float | None = None
 
     def to_css(self, scale: float = 1.0) -> str:
         """Return CSS rules for the text element."""
 
         font_size = self.font_size * scale
+        top = self.top
+        if self.line_height is not None:
+            # A taller line box adds half its extra leading above the first line; undo
+            # that so the first baseline stays where a single-line span would put it.
+            top -= (self.line_height - font_size * NORMAL_LINE_HEIGHT) / 2
         rules = [
             f"left: {self.left:.2f}px",
-            f"top: {self.top:.2f}px",
+            f"top: {top:.2f}px",
             f"width: {self.width:.2f}px",
             f"height: {self.height:.2f}px",
             f"font-size: {font_size:.2f}px",
         ]
+        if self.line_height is not None:
+            rules.append(f"line-height: {self.line_height:.2f}px")
 
         if self.font_weight:
             rules.append(f"font-weight: {self.font_weight}")
@@ -168,6 +381,20 @@ class ShapeElement:
     background: str
 
 
+@dataclasses.dataclass
+class FigureElement:
+    """Bounds of a pdfminer figure (a form XObject or inline image group)."""
+
+    left: float
+    top: float
+    width: float
+    height: float
+    name: str = ""
+
+
+LayoutElement = Union[TextElement, ImageElement, ShapeElement, FigureElement]
+
+
 @dataclasses.dataclass
 class PageLayout:
     """Container for layout information of a single PDF page."""
@@ -177,6 +404,77 @@ class PageLayout:
     texts: list[TextElement]
     images: list["ImageElement"]
     shapes: list[ShapeElement]
+    figures: list[FigureElement] = dataclasses.field(default_factory=list)
+    page_number: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PageLayout":
+        """Rebuild a layout from :func:`dataclasses.asdict` output, e.g. a shard's layout file."""
+
+        return cls(
+            width=float(data["width"]),
+            height=float(data["height"]),
+            texts=[TextElement(**text) for text in data.get("texts", [])],
+            images=[ImageElement(**image) for image in data.get("images", [])],
+            shapes=[ShapeElement(**shape) for shape in data.get("shapes", [])],
+            figures=[FigureElement(**figure) for figure in data.get("figures", [])],
+            page_number=int(data.get("page_number", 0)),
+        )
+
+    # ------------------------------------------------------------------
+    # Geometric queries
+    # ------------------------------------------------------------------
+    def spatial_index(self) -> SpatialIndex[LayoutElement]:
+        """Return a grid index over all elements, keyed in paint order.
+
+        Paint order is shapes, images, figures, then text, as in the generated
+        HTML. The index is built on first use and rebuilt when an element list
+        is replaced or resized; call :meth:`invalidate_index` after moving
+        elements in place.
+        """
+
+        lists = (self.shapes, self.images, self.figures, self.texts)
+        signature = tuple((id(elements), len(elements)) for elements in lists)
+        cached = self.__dict__.get("_spatial_index")
+        if cached is None or cached[0] != signature:
+            index: SpatialIndex[LayoutElement] = SpatialIndex(element for elements in lists for element in elements)
+            # Kept outside the dataclass fields so asdict() and comparisons ignore it.
+            self.__dict__["_spatial_index"] = cached = (signature, index)
+        return cached[1]
+
+    def invalidate_index(self) -> None:
+        self.__dict__.pop("_spatial_index", None)
+
+    def elements_in(
+        self, left: float, top: float, right: float, bottom: float, kinds: tuple[type, ...] | None = None
+    ) -> list[LayoutElement]:
+        """Return the elements intersecting a region in paint order, optionally only of ``kinds``."""
+
+        found = self.spatial_index().query(left, top, right, bottom)
+        return found if kinds is None else [element for element in found if isinstance(element, kinds)]
+
+    def nearest(
+        self, x: float, y: float, kinds: tuple[type, ...] | None = None, *, max_distance: float = math.inf
+    ) -> LayoutElement | None:
+        """Return the element closest to ``(x, y)``, optionally only of ``kinds``."""
+
+        predicate = None if kinds is None else (lambda element: isinstance(element, kinds))
+        return self.spatial_index().nearest(x, y, max_distance=max_distance, predicate=predicate)
+
+    def overlaps(self, element: Any, kinds: tuple[type, ...] | None = None) -> list[LayoutElement]:
+        """Return the other elements sharing a region of positive area with ``element``."""
+
+        found = self.spatial_index().overlaps(element)
+        return found if kinds is None else [other for other in found if isinstance(other, kinds)]
+
+
+class _PageImages(NamedTuple):
+    """Image placements found while walking a pdfminer page."""
+
+    index: int
+    area: float
+    height: float
+    images: list[Any]
 
 
 class PDFToHTMLConverter:
@@ -184,83 +482,653 @@ class PDFToHTMLConverter:
 
     def __init__(
         self,
-        pdf_path: Path | str,
-        output_dir: Path | str,
+        pdf_path: PDFSource,
+        output_dir: Path | str | None = None,
         *,
         dpi: int = 144,
         assets_subdir: str = "assets",
         laparams: LAParams | None = None,
+        pages_per_file: int = 0,
+        sink: OutputSink | None = None,
+        asset_workers: int = 4,
+        image_format: str | None = None,
+        inline_threshold: int = 0,
+        pages: Iterable[int] | None = None,
+        shard: tuple[int, int] | None = None,
+        template_store: TemplateStore | None = None,
+        estimate_scale: bool = False,
+        node_budget: int | None = None,
+        metrics: MetricsRegistry | None = None,
+        hooks: EventHooks | None = None,
+        manifest_format: str = "json",
+        checkpoint: bool = False,
+        resume: bool = False,
+        precompress: Iterable[str] = (),
+        cancel_event: threading.Event | None = None,
+        page_count: int | None = None,
     ) -> None:
-        self.pdf_path = Path(pdf_path)
-        self.output_dir = Path(output_dir)
+        """Create a converter.
+
+        Args:
+            pdf_path: Path of the PDF, its contents as bytes (an ``mmap`` works
+                too) or a binary file object, which is read once.
+            output_dir: Directory receiving the outputs. Shorthand for
+                ``sink=DirectorySink(output_dir)``.
+            sink: Destination for HTML, manifest and assets; use
+                :class:`~agentkit.sinks.MemorySink` to keep everything in memory.
+            asset_workers: Threads used to encode and write image assets.
+            image_format: Transcode embedded images to ``"webp"`` or optimized
+                ``"png"`` when that makes them smaller.
+            inline_threshold: Embed images of at most this many bytes as
+                ``data:`` URIs instead of writing separate files.
+            pages: 1-based page numbers to convert; the whole document by default.
+            shard: ``(i, n)`` converts only the i-th (1-based) of ``n`` contiguous
+                slices of the selected pages. Partial conversions also write
+                per-page layout files under ``layouts/`` for ``agentkit merge``.
+            template_store: Store of document family templates. Documents whose
+                structure matches a stored family reuse its tuned text scale
+                and its already processed assets.
+            estimate_scale: Derive the default text scale from font metrics
+                (see :mod:`agentkit.font_metrics`) when no template matches.
+                Off by default, so a plain conversion keeps text scale 1.0.
+            node_budget: Maximum number of positioned elements per page. Pages
+                above it have stacked text lines of the same font and left
+                edge coalesced into multi-line blocks (see
+                :mod:`agentkit.text_blocks`); ``0`` coalesces every such run.
+            metrics: Registry receiving page, element, byte and stage duration
+                metrics; the process-wide :data:`agentkit.metrics.REGISTRY` by default.
+            hooks: Callbacks for ``page_extracted`` and ``page_rendered`` events
+                (and ``iteration_finished`` when a refiner drives this converter).
+            manifest_format: ``"json"`` writes one ``manifest.json``;
+                ``"jsonl"`` writes compact per-page records plus an offset
+                index (see :mod:`agentkit.manifest`).
+            checkpoint: Journal extracted layouts, embedded images, reference
+                renders and refinement scores to ``checkpoint.jsonl`` in the
+                output directory (see :mod:`agentkit.checkpoint`).
+            resume: Reuse the work recorded by an earlier checkpointed run of
+                the same PDF and settings; implies ``checkpoint``.
+            precompress: Encodings (``"gzip"``, ``"br"``) of precompressed
+                copies written next to the HTML documents and the manifest
+                for static serving (see :mod:`agentkit.serialize`).
+            cancel_event: Event that stops every conversion of this converter
+                at the next page or stage boundary with
+                :class:`~agentkit.shared.ConversionCancelled` once it is set.
+            page_count: Number of pages of the whole document when already
+                known, for example by ``agentkit merge`` whose source PDF may
+                no longer exist. By default it is read from the PDF when needed.
+        """
+
+        if isinstance(pdf_path, (str, os.PathLike)):
+            self.pdf_path: Path | None = Path(pdf_path)
+            self._pdf_data: memoryview | None = None
+        else:
+            self.pdf_path = None
+            try:
+                self._pdf_data = memoryview(pdf_path)  # type: ignore[arg-type]
+            except TypeError:
+                self._pdf_data = memoryview(pdf_path.read())
+        self.source_name = str(self.pdf_path) if self.pdf_path is not None else "<memory>"
+
+        if sink is None:
+            if output_dir is None:
+                raise ValueError("Either output_dir or sink must be provided")
+            sink = DirectorySink(output_dir)
+        elif output_dir is not None:
+            raise ValueError("Pass either output_dir or sink, not both")
+        self.sink = sink
+        # Filesystem location of the outputs, or None when the sink is not backed by a directory.
+        self.output_dir = sink.path_for("")
         self.dpi = dpi
-        self.assets_dir = self.output_dir / assets_subdir
+        self.assets_subdir = assets_subdir
+        self.pages_per_file = max(0, int(pages_per_file))
+        self.asset_workers = max(1, int(asset_workers))
+        self.image_format = image_format
+        self.inline_threshold = max(0, int(inline_threshold))
+        self.pages = sorted(set(int(number) for number in pages)) if pages is not None else None
+        if shard is not None:
+            shard_index, shard_count = int(shard[0]), int(shard[1])
+            if shard_count < 1 or not 1 <= shard_index <= shard_count:
+                raise ValueError(f"Invalid shard {shard_index}/{shard_count}")
+            shard = (shard_index, shard_count)
+        self.shard = shard
+        self._page_selection: list[int] | None = None
+        self.template_store = template_store
+        # Structural fingerprint of the last conversion and the family template it matched.
+        self.fingerprint: str | None = None
+        self.template: FamilyTemplate | None = None
+        self.estimate_scale = estimate_scale
+        self.scale_estimate: ScaleEstimate | None = None
+        self.node_budget = None if node_budget is None else max(0, int(node_budget))
+        # Positioned text elements before and after coalescing in the last written output.
+        self.node_reduction: tuple[int, int] = (0, 0)
+        # Seconds spent in each stage of the last conversion.
+        self.timings: dict[str, float] = {}
+        # ``phase`` label of recorded metrics; re-conversions of a refinement run use "refine".
+        self.metrics_phase = "convert"
+        self.metrics = REGISTRY if metrics is None else metrics
+        self.hooks = hooks
+        if manifest_format not in MANIFEST_FORMATS:
+            raise ValueError(f"Unsupported manifest format {manifest_format!r}; expected one of {', '.join(MANIFEST_FORMATS)}")
+        self.manifest_format = manifest_format
+        self.precompress = validate_encodings(precompress)
+        self.cancel_event = cancel_event
+        self.resume = resume
+        self.checkpoint_enabled = checkpoint or resume
+        # Journal of completed work, opened by the first conversion when checkpointing is enabled.
+        self.checkpoint: Checkpoint | None = None
+        self._document_page_count = page_count
+        self.manifest: dict[str, Any] | None = None
+        # Page layouts as written by the last conversion, after coalescing.
+        self.documents: list[PageLayout] = []
         self._laparams = laparams
-        self._cached_pdfminer_pages: list[Any] | None = None
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        # pdfminer image placements collected by the layout pass, consumed by the image fallback.
+        self._pdfminer_images: list[_PageImages] | None = None
+        self._page_documents: dict[int, str] = {}
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
-    def convert(self, *, text_scale: float = 1.0) -> Path:
+    def convert(self, *, text_scale: float | None = None) -> Path:
         """Convert the PDF into HTML/CSS assets.
 
+        When ``pages_per_file`` is positive the pages are split into standalone
+        HTML documents under ``pages/`` and ``index.html`` only embeds them lazily.
+
         Args:
-            text_scale: Scaling factor applied to the computed font sizes.
+            text_scale: Scaling factor applied to the computed font sizes. By
+                default the scale of a matching family template is used, then
+                the font-metric estimate, then 1.0.
 
         Returns:
             Path to the generated HTML file.
         """
 
-        LOGGER.info("Starting conversion of %s", self.pdf_path)
-        layouts = list(self._extract_layout())
-        if not layouts:
-            LOGGER.warning("No pages were extracted from %s", self.pdf_path)
-            html_path = self.output_dir / "index.html"
-            css = self._build_css(layouts, text_scale=text_scale)
-            self._write_html(html_path, layouts, css)
-            self._write_manifest(layouts, [], text_scale)
-            return html_path
-        self._populate_vector_shapes(layouts)
-        embedded_images = self.extract_embedded_images()
-        for index, page_images in enumerate(embedded_images):
-            if index < len(layouts):
-                layouts[index].images = page_images
-        page_renders = self._render_page_images()
-        html_path = self.output_dir / "index.html"
-        css = self._build_css(layouts, text_scale=text_scale)
-        self._write_html(html_path, layouts, css)
-        self._write_manifest(layouts, page_renders, text_scale)
+        return self._convert(text_scale)
+
+    async def convert_async(
+        self,
+        *,
+        text_scale: float | None = None,
+        executor: Executor | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> Path:
+        """Asynchronous variant of :meth:`convert` for use inside an event loop.
+
+        The conversion runs in ``executor`` (the loop's default executor when
+        omitted) so the loop stays responsive. ``progress`` is invoked on the
+        event loop thread for every extracted page. Cancelling the awaiting task
+        stops the worker at the next page boundary.
+        """
+
+        import asyncio  # only async callers pay for the event loop machinery
+
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
 
+        def _report(stage: str, page_number: int) -> None:
+            if progress is not None:
+                loop.call_soon_threadsafe(progress, stage, page_number)
+
+        job = functools.partial(self._convert, text_scale, progress=_report, cancel_event=cancel_event)
+        try:
+            return await loop.run_in_executor(executor, job)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+
+    def _convert(
+        self,
+        text_scale: float | None,
+        *,
+        progress: ProgressCallback | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> Path:
+        def _checkpoint() -> None:
+            if any(event is not None and event.is_set() for event in (cancel_event, self.cancel_event)):
+                raise ConversionCancelled(f"Conversion of {self.source_name} was cancelled")
+
+        LOGGER.info("Starting conversion of %s", self.source_name)
+        self.timings = {}
+        journal = self._open_checkpoint()
+        with self._timed("extract"):
+            layouts, remaining = self._restore_layouts(journal)
+            pending = self._extract_layout(remaining) if remaining != [] else ()
+            for layout in pending:
+                _checkpoint()
+                if journal is not None:
+                    journal.record_page(layout.page_number, dataclasses.asdict(layout))
+                layouts.append(layout)
+                self._emit(
+                    "page_extracted",
+                    page=layout.page_number,
+                    texts=len(layout.texts),
+                    figures=len(layout.figures),
+                )
+                if progress is not None:
+                    progress("extracted", len(layouts))
+            layouts.sort(key=lambda layout: layout.page_number)
+        if not self.is_partial():
+            self._document_page_count = len(layouts)
+        if not layouts:
+            LOGGER.warning("No pages were extracted from %s", self.source_name)
+            return self.write_outputs(layouts, [], text_scale=1.0 if text_scale is None else text_scale)
+        _checkpoint()
+        with self._timed("shapes"):
+            self._populate_vector_shapes(layouts)
+        _checkpoint()
+        with self._asset_pipeline() as assets:
+            with self._timed("images"):
+                if not self._restore_images(journal, layouts, assets):
+                    embedded_images = self._extract_embedded_images(assets)
+                    for index, page_images in enumerate(embedded_images):
+                        if index < len(layouts):
+                            layouts[index].images = page_images
+                    if journal is not None:
+                        journal.record_images(
+                            {str(layout.page_number): [dict(vars(image)) for image in layout.images] for layout in layouts},
+                            dict(assets.digests),
+                        )
+            _checkpoint()
+            with self._timed("render"):
+                page_renders = self._render_page_images(assets, journal)
+                assets.close()
+        self._match_template(layouts, assets.digests)
+        self.scale_estimate = estimate_text_scale(layouts) if self.estimate_scale else None
+        if text_scale is None:
+            text_scale = self._default_text_scale()
+        _checkpoint()
+        with self._timed("write"):
+            html_path = self.write_outputs(layouts, page_renders, text_scale=text_scale)
+
+        self._record_metrics(layouts, assets)
         LOGGER.info("Finished conversion -> %s", html_path)
         return html_path
 
     # ------------------------------------------------------------------
-    # Layout extraction
+    # Checkpointing
     # ------------------------------------------------------------------
-    def _extract_layout(self) -> Iterable[PageLayout]:
-        _ensure_pdfminer()
-        laparams = self._laparams or LAParams(line_margin=0.1, char_margin=2.0, word_margin=0.2)
+    def _open_checkpoint(self) -> Checkpoint | None:
+        if not self.checkpoint_enabled or self.checkpoint is not None:
+            return self.checkpoint
+        path = self.sink.path_for(CHECKPOINT_NAME)
+        if path is None:
+            LOGGER.warning("Checkpointing needs a directory output; converting without it")
+            self.checkpoint_enabled = False
+            return None
+        # Everything the journaled layouts, images and renders depend on; output-only options may change on resume.
+        settings = {
+            "dpi": self.dpi,
+            "assets_subdir": self.assets_subdir,
+            "image_format": self.image_format,
+            "inline_threshold": self.inline_threshold,
+            "pages": self.pages,
+            "shard": list(self.shard) if self.shard is not None else None,
+            "laparams": dict(vars(self._laparams)) if self._laparams is not None else None,
+        }
+        self.checkpoint = Checkpoint(path, source_digest(self.pdf_path, self._pdf_data), settings, resume=self.resume)
+        return self.checkpoint
+
+    def _restore_layouts(self, journal: Checkpoint | None) -> tuple[list[PageLayout], list[int] | None]:
+        """Return the journaled layouts and the 0-based pages still to extract (``None``: all selected pages)."""
+
+        if journal is None or not journal.layouts:
+            return [], None
+        if _fitz() is None and journal.images is None:
+            # The pdfminer image fallback needs the layout tree of every page.
+            LOGGER.info("Re-extracting all pages: PyMuPDF is unavailable and the images were not checkpointed")
+            return [], None
+        selected = self._selected_indices(self._page_count())
+        restored = [PageLayout.from_dict(journal.layouts[index + 1]) for index in selected if index + 1 in journal.layouts]
+        remaining = [index for index in selected if index + 1 not in journal.layouts]
+        # Refinement converts repeatedly; only the first conversion announces the restore.
+        log = LOGGER.info if self.manifest is None else LOGGER.debug
+        if restored:
+            log("Restored %s of %s pages from the checkpoint", len(restored), len(selected))
+        return restored, remaining
+
+    def _restore_images(self, journal: Checkpoint | None, layouts: Sequence[PageLayout], assets: AssetPipeline) -> bool:
+        if journal is None or journal.images is None:
+            return False
+        pages = journal.images["pages"]
+        restored: list[list[ImageElement]] = []
+        for layout in layouts:
+            if str(layout.page_number) not in pages:
+                return False
+            images = [ImageElement(**image) for image in pages[str(layout.page_number)]]
+            for image in images:
+                if not image.src.startswith("data:") and not self.sink.exists(image.src):
+                    LOGGER.info("Re-extracting embedded images: %s is missing", image.src)
+                    return False
+            restored.append(images)
+        for layout, images in zip(layouts, restored):
+            layout.images = images
+        assets.digests.update(journal.images["digests"])
+        return True
+
+    def _restored_render(self, journal: Checkpoint | None, page_number: int, name: str) -> bool:
+        return journal is not None and journal.renders.get(page_number) == name and self.sink.exists(name)
+
+    def _submit_render(
+        self, assets: AssetPipeline, journal: Checkpoint | None, page_number: int, name: str, data: bytes
+    ) -> None:
+        future = assets.submit_file(name, data)
+        if journal is not None:
+
+            def _journal(done: Any) -> None:
+                # Only journal renders whose PNG was written completely.
+                if done.exception() is None:
+                    journal.record_render(page_number, name)
+
+            future.add_done_callback(_journal)
+        self._emit("page_rendered", page=page_number, kind="reference", src=name)
+
+    def _emit(self, event: str, **payload: Any) -> None:
+        if self.hooks is not None:
+            self.hooks.emit(event, document=self.source_name, **payload)
+
+    @contextlib.contextmanager
+    def recording_phase(self, phase: str) -> Iterator[None]:
+        """Label the metrics of conversions inside the block with ``phase``.
+
+        :class:`~agentkit.visual_regression.TemplateRefiner` converts the same
+        document once per iteration; its conversions are recorded as
+        ``phase="refine"`` so per-document counters with ``phase="convert"``
+        count every document once.
+        """
+
+        previous, self.metrics_phase = self.metrics_phase, phase
+        try:
+            yield
+        finally:
+            self.metrics_phase = previous
+
+    def _record_metrics(self, layouts: Sequence[PageLayout], assets: AssetPipeline) -> None:
+        metrics = self.metrics
+        phase = self.metrics_phase
+        metrics.counter("agentkit_conversions", "Completed conversions.").inc(phase=phase)
+        metrics.counter("agentkit_pages", "Converted pages.").inc(len(layouts), phase=phase)
+        elements = metrics.counter("agentkit_elements", "Extracted page elements by kind.")
+        for kind in ("texts", "images", "shapes", "figures"):
+            elements.inc(sum(len(getattr(layout, kind)) for layout in layouts), kind=kind[:-1], phase=phase)
+        metrics.counter("agentkit_text_nodes", "Positioned text elements written after coalescing.").inc(
+            self.node_reduction[1], phase=phase
+        )
+        stages = metrics.histogram("agentkit_stage_seconds", "Duration of each conversion stage.")
+        for stage, seconds in self.timings.items():
+            stages.observe(seconds, stage=stage, phase=phase)
+        metrics.histogram("agentkit_conversion_seconds", "Duration of whole conversions.").observe(
+            sum(self.timings.values()), phase=phase
+        )
+
+        stats = assets.stats
+        asset_bytes = metrics.counter("agentkit_asset_bytes", "Image bytes entering and leaving the asset pipeline.")
+        asset_bytes.inc(stats["bytes_in"], direction="in", phase=phase)
+        asset_bytes.inc(stats["bytes_out"], direction="out", phase=phase)
+        images = metrics.counter("agentkit_asset_images", "Processed images by how they were produced.")
+        images.inc(stats["cached"], source="cache", phase=phase)
+        images.inc(stats["images"] - stats["cached"], source="processed", phase=phase)
+        metrics.counter("agentkit_asset_inlined", "Images embedded as data URIs.").inc(stats["inlined"], phase=phase)
+        if self.template_store is not None:
+            metrics.counter("agentkit_template_lookups", "Document family template lookups.").inc(
+                result="hit" if self.template is not None else "miss", phase=phase
+            )
+
+    def write_outputs(
+        self,
+        layouts: Sequence[PageLayout],
+        page_renders: Sequence[str | None],
+        *,
+        text_scale: float = 1.0,
+    ) -> Path:
+        """Write the HTML documents and manifest for already extracted ``layouts``.
+
+        Used by :meth:`convert` and by ``agentkit merge``, which rebuilds the
+        output of a sharded conversion from the shards' layout files.
+
+        Returns:
+            Path to the generated HTML file.
+        """
+
+        if self.is_partial():
+            self._write_layout_files(layouts, page_renders)
+        documents = self._apply_node_budget(layouts)
+        self.documents = list(documents)
+        manifest = self._document_fields(text_scale)
+        self.manifest = manifest
+        sources = {
+            layout.page_number: (layout, page_renders[index] if index < len(page_renders) else None)
+            for index, layout in enumerate(layouts)
+        }
+
+        def _page_written(document: PageLayout) -> None:
+            layout, render = sources[document.page_number]
+            manifest["pages"].append(self._page_record(layout, document, render))
+
+        # Drop the files of the other format so readers never see a stale manifest.
+        self.sink.clear("manifest.")
+        if self.manifest_format == "jsonl":
+            # Page records are appended as their HTML is written, so an interrupted write leaves a readable prefix.
+            with ManifestWriter(self.sink, self.manifest_name, encodings=self.precompress) as writer:
+
+                def _append_page(document: PageLayout) -> None:
+                    _page_written(document)
+                    writer.add_page(manifest["pages"][-1])
+
+                html_path = self._write_documents(documents, text_scale, page_written=_append_page)
+                writer.finish(manifest)
+        else:
+            html_path = self._write_documents(documents, text_scale, page_written=_page_written)
+            with open_serialized(self.sink, self.manifest_name, self.precompress) as fh:
+                json.dump(manifest, fh, indent=2)
+        return html_path
+
+    def _apply_node_budget(self, layouts: Sequence[PageLayout]) -> Sequence[PageLayout]:
+        lines = sum(len(layout.texts) for layout in layouts)
+        if self.node_budget is None:
+            self.node_reduction = (lines, lines)
+            return layouts
+        documents = [coalesce_layout(layout, self.node_budget) for layout in layouts]
+        nodes = sum(len(layout.texts) for layout in documents)
+        # Refinement rewrites the output every iteration; only report a new result.
+        previous, self.node_reduction = self.node_reduction, (lines, nodes)
+        if nodes < lines and self.node_reduction != previous:
+            LOGGER.info(
+                "Coalesced %s text lines into %s nodes (-%.0f%%, budget %s per page)",
+                lines,
+                nodes,
+                100.0 * (lines - nodes) / lines,
+                self.node_budget,
+            )
+        return documents
+
+    @contextlib.contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - started
+
+    def _default_text_scale(self) -> float:
+        if self.template is not None:
+            return self.template.text_scale
+        if self.scale_estimate is not None:
+            return self.scale_estimate.scale
+        return 1.0
+
+    def _match_template(self, layouts: Sequence[PageLayout], image_digests: dict[str, str]) -> None:
+        previous = self.fingerprint
+        self.fingerprint = fingerprint_layouts(layouts, image_digests)
+        self.template = None
+        if self.template_store is not None:
+            self.template = self.template_store.lookup(self.fingerprint)
+            # Refinement converts repeatedly; only announce the match once.
+            if self.template is not None and self.fingerprint != previous:
+                LOGGER.info(
+                    "Matched document family %s (text scale %.3f)", self.fingerprint[:12], self.template.text_scale
+                )
+
+    def is_partial(self) -> bool:
+        """Return whether only a page range or shard of the document is converted."""
+
+        return self.pages is not None or self.shard is not None
+
+    def page_html_path(self, page_number: int) -> Path | None:
+        """Return the standalone HTML document holding ``page_number`` (1-based).
+
+        Only split conversions produce per-page documents; ``None`` is returned
+        for single-file output or pages that were not part of the last conversion.
+        """
+
+        relative = self.page_document_name(page_number)
+        if relative is None:
+            return None
+        return self.sink.path_for(relative)
+
+    def page_document_name(self, page_number: int) -> str | None:
+        """Return the sink name of the split document holding ``page_number``, if any."""
+
+        return self._page_documents.get(page_number)
+
+    @property
+    def manifest_name(self) -> str:
+        """Sink name of the manifest written in :attr:`manifest_format`."""
+
+        return MANIFEST_NAMES[self.manifest_format]
+
+    def reference_names(self) -> list[str]:
+        """Return the sink names of the reference page renders from the last conversion."""
 
-        page_layouts = list(extract_pages(self.pdf_path, laparams=laparams))
-        self._cached_pdfminer_pages = page_layouts
+        if not self.manifest:
+            return []
+        return [page["reference"] for page in self.manifest["pages"] if page.get("reference")]
 
-        for page_index, page_layout in enumerate(page_layouts):
-            texts: list[TextElement] = []
-            images: list[ImageElement] = []
-            shapes: list[ShapeElement] = []
+    def reference_pages(self) -> list[int]:
+        """Return the 1-based page numbers matching :meth:`reference_names`."""
+
+        if not self.manifest:
+            return []
+        return [page["page"] for page in self.manifest["pages"] if page.get("reference")]
+
+    def reference_paths(self) -> list[Path]:
+        """Return filesystem paths of the reference renders (empty for non-file sinks)."""
+
+        paths = [self.sink.path_for(name) for name in self.reference_names()]
+        return [path for path in paths if path is not None]
+
+    # ------------------------------------------------------------------
+    # Input access
+    # ------------------------------------------------------------------
+    def _pdfminer_input(self) -> Any:
+        if self._pdf_data is None:
+            return self.pdf_path
+        return io.BufferedReader(_BufferReader(self._pdf_data))
+
+    def _open_fitz(self) -> Any:
+        fitz = _fitz()
+        assert fitz is not None  # narrow type for static checkers
+        if self._pdf_data is None:
+            return fitz.open(self.pdf_path)  # type: ignore[arg-type]
+        return fitz.open(stream=self._pdf_data, filetype="pdf")
+
+    def _output_path(self, name: str) -> Path:
+        return self.sink.path_for(name) or Path(name)
+
+    def _page_indices(self) -> list[int] | None:
+        """Return the 0-based indices of the selected pages, or ``None`` for the whole document."""
+
+        if not self.is_partial():
+            return None
+        if self._page_selection is None:
+            count = self._page_count()
+            numbers = self.pages if self.pages is not None else range(1, count + 1)
+            selected = [number - 1 for number in numbers if 1 <= number <= count]
+            if self.pages is not None and len(selected) < len(self.pages):
+                LOGGER.warning("Ignoring pages outside of 1-%s in %s", count, self.source_name)
+            if self.shard is not None:
+                shard_index, shard_count = self.shard
+                total = len(selected)
+                selected = selected[(shard_index - 1) * total // shard_count : shard_index * total // shard_count]
+                LOGGER.info("Shard %s/%s converts %s of %s pages", shard_index, shard_count, len(selected), total)
+            self._page_selection = selected
+        return self._page_selection
+
+    def _selected_indices(self, page_count: int) -> list[int]:
+        indices = self._page_indices()
+        return list(range(page_count)) if indices is None else [index for index in indices if index < page_count]
+
+    # ------------------------------------------------------------------
+    # Layout extraction
+    # ------------------------------------------------------------------
+    def _extract_layout(self, indices: list[int] | None = None) -> Iterable[PageLayout]:
+        # Image placements are only needed when PyMuPDF cannot extract the images itself.
+        collect_images = _fitz() is None
+        self._pdfminer_images = [] if collect_images else None
+
+        for page_index, page_layout in self._iter_pdfminer_pages(indices):
             width = float(getattr(page_layout, "width", 0) or 0)
             height = float(getattr(page_layout, "height", 0) or 0)
+            texts, images, figures = self._visit_page(page_layout, height)
+            if self._pdfminer_images is not None:
+                self._pdfminer_images.append(
+                    _PageImages(page_index, self._pdfminer_page_area(page_layout), height, images)
+                )
 
-            for element in page_layout:
-                if isinstance(element, (LTTextContainer, LTTextBox, LTTextBoxHorizontal)):
-                    texts.extend(self._extract_text_elements(element, height))
+            LOGGER.debug("Page %s extracted: %s texts, %s figures", page_index + 1, len(texts), len(figures))
+            # Nothing keeps a reference to page_layout past this point, so its tree is freed per page.
+            yield PageLayout(
+                width=width,
+                height=height,
+                texts=texts,
+                images=[],
+                shapes=[],
+                figures=figures,
+                page_number=page_index + 1,
+            )
 
-            LOGGER.debug("Page %s extracted: %s texts", page_index + 1, len(texts))
-            yield PageLayout(width=width, height=height, texts=texts, images=images, shapes=shapes)
+    def _iter_pdfminer_pages(self, indices: list[int] | None = None) -> Iterable[tuple[int, Any]]:
+        """Yield ``(page_index, LTPage)`` pairs for ``indices``, by default the selected pages."""
 
-        # Leave the cached page layouts accessible for image extraction fallbacks.
+        _ensure_pdfminer()
+        laparams = self._laparams or LAParams(line_margin=0.1, char_margin=2.0, word_margin=0.2)
+        if indices is None:
+            indices = self._page_indices()
+        if indices is None:
+            return enumerate(extract_pages(self._pdfminer_input(), laparams=laparams))
+        # pdfminer yields the requested pages in document order.
+        return zip(indices, extract_pages(self._pdfminer_input(), page_numbers=set(indices), laparams=laparams))
+
+    def _visit_page(
+        self, page_layout: Any, page_height: float
+    ) -> tuple[list[TextElement], list[Any], list[FigureElement]]:
+        """Walk a pdfminer page once, collecting text lines, images and figure bounds in document order."""
+
+        texts: list[TextElement] = []
+        images: list[Any] = []
+        figures: list[FigureElement] = []
+        stack = [iter(page_layout)]
+        while stack:
+            element = next(stack[-1], None)
+            if element is None:
+                stack.pop()
+                continue
+            if isinstance(element, (LTTextContainer, LTTextBox, LTTextBoxHorizontal)):
+                texts.extend(self._extract_text_elements(element, page_height))
+            elif isinstance(element, LTImage):
+                images.append(element)
+            elif isinstance(element, LTFigure):
+                x0, y0, x1, y1 = element.bbox
+                figures.append(
+                    FigureElement(
+                        left=float(x0),
+                        top=page_height - float(y1),
+                        width=float(x1 - x0),
+                        height=float(y1 - y0),
+                        name=str(getattr(element, "name", "") or ""),
+                    )
+                )
+                stack.append(iter(element))
+        return texts, images, figures
 
     def _extract_text_elements(self, container: LTTextContainer, page_height: float) -> list[TextElement]:
         elements: list[TextElement] = []
@@ -303,45 +1171,7 @@ class PDFToHTMLConverter:
     # Image extraction and rendering
     # ------------------------------------------------------------------
     def _parse_font_details(self, font_name: str | None) -> tuple[str | None, str | None, str | None]:
-        if not font_name:
-            return None, None, None
-
-        base_name = font_name.split("+")[-1]
-        normalized = base_name.replace(".", " ").replace("_", " ")
-        normalized = re.sub(r"\s+", " ", normalized)
-        lowered = normalized.lower()
-
-        font_weight: str | None = None
-        for keyword, weight in FONT_WEIGHT_KEYWORDS:
-            if keyword in lowered:
-                font_weight = weight
-                break
-
-        font_style: str | None = None
-        for keyword, style in FONT_STYLE_KEYWORDS:
-            if keyword in lowered:
-                font_style = style
-                break
-
-        # Extract a human-readable family name by removing stylistic tokens.
-        tokens = re.split(r"[^A-Za-z]+", normalized)
-        family_tokens: list[str] = []
-        for token in tokens:
-            if not token:
-                continue
-            lowered_token = token.lower()
-            if lowered_token in FONT_FAMILY_OMIT_TOKENS or any(
-                keyword in lowered_token for keyword in FONT_FAMILY_OMIT_TOKENS
-            ):
-                continue
-            humanized = re.sub(r"(?<!^)(?=[A-Z])", " ", token)
-            family_tokens.append(humanized)
-
-        family = " ".join(family_tokens).strip()
-        if not family:
-            family = None
-
-        return family, font_style, font_weight
+        return _parse_font_name(font_name)
 
     def extract_embedded_images(self) -> list[list[ImageElement]]:
         """Extract all embedded images into the assets directory.
@@ -350,20 +1180,44 @@ class PDFToHTMLConverter:
             List of image metadata collections for each page in the document.
         """
 
-        if fitz is not None:
-            return self._extract_images_with_pymupdf()
+        with self._asset_pipeline() as assets:
+            return self._extract_embedded_images(assets)
 
-        LOGGER.debug("PyMuPDF is unavailable; falling back to pdfminer for image extraction.")
-        return self._extract_images_with_pdfminer()
+    def _asset_pipeline(self) -> AssetPipeline:
+        return AssetPipeline(
+            self.sink,
+            max_workers=self.asset_workers,
+            transcode=self.image_format,
+            inline_threshold=self.inline_threshold,
+            cache=self.template_store,
+        )
 
-    def _extract_images_with_pymupdf(self) -> list[list[ImageElement]]:
-        assert fitz is not None  # narrow type for static checkers
+    def _extract_embedded_images(self, assets: AssetPipeline) -> list[list[ImageElement]]:
+        if _fitz() is not None:
+            pending = self._extract_images_with_pymupdf(assets)
+        else:
+            LOGGER.debug("PyMuPDF is unavailable; falling back to pdfminer for image extraction.")
+            pending = self._extract_images_with_pdfminer(assets)
+
+        # Images are encoded and written concurrently; drop those that failed.
         embedded: list[list[ImageElement]] = []
-        with fitz.open(self.pdf_path) as doc:  # type: ignore[arg-type]
-            for page_index in range(doc.page_count):
+        for page_images in pending:
+            resolved: list[ImageElement] = []
+            for future, element in page_images:
+                src = future.result()
+                if src is not None:
+                    element.src = src
+                    resolved.append(element)
+            embedded.append(resolved)
+        return embedded
+
+    def _extract_images_with_pymupdf(self, assets: AssetPipeline) -> list[list[tuple[Any, ImageElement]]]:
+        embedded: list[list[tuple[Any, ImageElement]]] = []
+        with self._open_fitz() as doc:
+            for page_index in self._selected_indices(doc.page_count):
                 page = doc.load_page(page_index)
                 page_height = float(page.rect.height)
-                page_images: list[ImageElement] = []
+                page_images: list[tuple[Any, ImageElement]] = []
                 self._clear_page_image_assets(page_index)
                 for image_number, image_info in enumerate(page.get_images(full=True), start=1):
                     xref = image_info[0]
@@ -387,11 +1241,12 @@ class PDFToHTMLConverter:
                     if not image_bytes:
                         continue
                     extension = base_image.get("ext", "png") or "png"
-                    asset_path = self.assets_dir / f"page_{page_index + 1}_image_{image_number}.{extension}"
-                    with open(asset_path, "wb") as fh:
-                        fh.write(image_bytes)
+                    if extension in PYMUPDF_PIXMAP_EXTENSIONS:
+                        image_bytes = self._pymupdf_image_as_png(doc, xref, image_bytes)
+                        extension = "png"
+                    stem = f"{self.assets_subdir}/page_{page_index + 1}_image_{image_number}"
+                    future = assets.submit_image(stem, image_bytes, extension=extension)
 
-                    relative_path = str(asset_path.relative_to(self.output_dir))
                     for rect in rects:
                         left = float(rect.x0)
                         # PyMuPDF uses a top-left origin where Y increases downward,
@@ -400,32 +1255,39 @@ class PDFToHTMLConverter:
                         width = float(rect.width)
                         height = float(rect.height)
                         page_images.append(
-                            ImageElement(
-                                src=relative_path,
-                                left=left,
-                                top=top,
-                                width=width,
-                                height=height,
-                            )
+                            (future, ImageElement(src=stem, left=left, top=top, width=width, height=height))
                         )
                 embedded.append(page_images)
         return embedded
 
+    def _pymupdf_image_as_png(self, doc: Any, xref: int, fallback: bytes) -> bytes:
+        # PyMuPDF objects are not thread-safe, so the pixmap is built here rather than in the pipeline.
+        fitz = _fitz()
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.alpha or (pix.colorspace is not None and pix.colorspace.n > 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            return pix.tobytes("png")
+        except Exception as exc:  # pragma: no cover - depends on PDF contents
+            LOGGER.debug("Could not rasterize image %s with PyMuPDF: %s", xref, exc)
+            return fallback
+
     def _populate_vector_shapes(self, layouts: Sequence[PageLayout]) -> None:
-        if fitz is None:
+        if _fitz() is None:
             LOGGER.debug("PyMuPDF is unavailable; skipping vector shape extraction.")
             return
 
         try:
-            doc = fitz.open(self.pdf_path)  # type: ignore[arg-type]
+            doc = self._open_fitz()
         except Exception as exc:  # pragma: no cover - depends on PDF integrity
             LOGGER.warning("Failed to open PDF for vector shapes: %s", exc)
             return
 
         with doc:
-            for page_index, layout in enumerate(layouts):
-                if page_index >= doc.page_count:
-                    break
+            for layout in layouts:
+                page_index = layout.page_number - 1
+                if not 0 <= page_index < doc.page_count:
+                    continue
                 try:
                     page = doc.load_page(page_index)
                 except Exception as exc:  # pragma: no cover - PyMuPDF runtime errors
@@ -443,6 +1305,7 @@ class PDFToHTMLConverter:
                     LOGGER.debug("Failed to read drawings on page %s: %s", page_index + 1, exc)
                     continue
 
+                shapes: list[ShapeElement] = []
                 for drawing in drawings:
                     fill = drawing.get("fill")
                     if not fill:
@@ -455,7 +1318,7 @@ class PDFToHTMLConverter:
                         height = float(rect.height)
                         if width <= 0 or height <= 0:
                             continue
-                        layout.shapes.append(
+                        shapes.append(
                             ShapeElement(
                                 left=float(rect.x0),
                                 top=float(rect.y0),
@@ -465,8 +1328,31 @@ class PDFToHTMLConverter:
                             )
                         )
 
+                extracted = len(shapes)
+                shapes = self._merge_shapes(self._drop_occluded_shapes(shapes))
+                LOGGER.debug(
+                    "Page %s shapes: %s extracted, %s after merging", page_index + 1, extracted, len(shapes)
+                )
+                layout.shapes.extend(shapes)
+
     def _shape_rects_from_drawing(self, drawing: Any) -> Iterable[Any]:
         items = drawing.get("items") or []
+        if not items:
+            return
+
+        # Fast paths: plain rectangles and axis-aligned boxes do not need their
+        # points walked, PyMuPDF already reports their bounds.
+        if all(item and item[0] == "re" and len(item) >= 2 for item in items):
+            for item in items:
+                if item[1] is not None:
+                    yield item[1]
+            return
+
+        bounds = drawing.get("rect")
+        if bounds is not None and self._is_axis_aligned_box(items):
+            yield bounds
+            return
+
         path_points: list[tuple[float, float]] = []
         for item in items:
             if not item or len(item) < 2:
@@ -535,10 +1421,147 @@ class PDFToHTMLConverter:
         if max_x <= min_x or max_y <= min_y:
             return None
 
-        if fitz is not None:
-            return fitz.Rect(min_x, min_y, max_x, max_y)
+        return _Rect(min_x, min_y, max_x, max_y)
+
+    def _is_axis_aligned_box(self, items: Sequence[Any]) -> bool:
+        """Return True when the path items trace a single axis-aligned rectangle."""
+
+        if len(items) == 1 and items[0] and items[0][0] == "qu":
+            return bool(getattr(items[0][1], "is_rectangular", False))
+
+        if not 3 <= len(items) <= 4:
+            return False
+
+        previous_end: tuple[float, float] | None = None
+        for item in items:
+            if not item or item[0] != "l" or len(item) < 3:
+                return False
+            start, end = item[1], item[2]
+            try:
+                x0, y0, x1, y1 = float(start.x), float(start.y), float(end.x), float(end.y)
+            except AttributeError:
+                return False
+            if abs(x0 - x1) > SHAPE_EDGE_TOLERANCE and abs(y0 - y1) > SHAPE_EDGE_TOLERANCE:
+                return False
+            if previous_end is not None and (
+                abs(previous_end[0] - x0) > SHAPE_EDGE_TOLERANCE
+                or abs(previous_end[1] - y0) > SHAPE_EDGE_TOLERANCE
+            ):
+                return False
+            previous_end = (x1, y1)
+        return True
+
+    def _drop_occluded_shapes(self, shapes: Sequence[ShapeElement]) -> list[ShapeElement]:
+        """Remove shapes that are completely hidden by a later opaque fill."""
+
+        visible: list[ShapeElement] = []
+        occluders: SpatialIndex[ShapeElement] = SpatialIndex()
+        for shape in reversed(shapes):
+            if any(self._shape_contains(occluder, shape) for occluder in occluders.query(*element_box(shape))):
+                continue
+            visible.append(shape)
+            if self._shape_is_opaque(shape):
+                occluders.insert(shape)
+        visible.reverse()
+        return visible
+
+    def _merge_shapes(self, shapes: Sequence[ShapeElement]) -> list[ShapeElement]:
+        """Merge adjacent or overlapping same-colour shapes without changing paint order."""
+
+        tol = SHAPE_EDGE_TOLERANCE
+        merged: list[ShapeElement] = []
+        # Keyed by position in ``merged``; only shapes within the edge tolerance can merge or block.
+        index: SpatialIndex[ShapeElement] = SpatialIndex()
+        for shape in shapes:
+            target: int | None = None
+            union: ShapeElement | None = None
+            left, top, right, bottom = element_box(shape)
+            for position in reversed(index.query_keys(left - tol, top - tol, right + tol, bottom + tol)):
+                candidate = merged[position]
+                if candidate.background == shape.background:
+                    union = self._shape_union(candidate, shape)
+                    if union is not None:
+                        target = position
+                        break
+                # Merging past an intersecting shape would move this one beneath it.
+                if self._shapes_overlap(candidate, shape):
+                    break
+
+            if target is None or union is None:
+                index.insert(shape, key=len(merged))
+                merged.append(shape)
+            else:
+                merged[target] = union
+                index.replace(target, union)
+        return merged
+
+    def _shape_union(self, first: ShapeElement, second: ShapeElement) -> ShapeElement | None:
+        """Return the union of two shapes when it is itself a rectangle."""
+
+        tol = SHAPE_EDGE_TOLERANCE
+        a_x1, a_y1 = first.left + first.width, first.top + first.height
+        b_x1, b_y1 = second.left + second.width, second.top + second.height
+
+        if self._shape_contains(first, second):
+            union = first
+        elif self._shape_contains(second, first):
+            union = second
+        elif (
+            abs(first.top - second.top) <= tol
+            and abs(a_y1 - b_y1) <= tol
+            and second.left <= a_x1 + tol
+            and first.left <= b_x1 + tol
+        ):
+            union = ShapeElement(
+                left=min(first.left, second.left),
+                top=min(first.top, second.top),
+                width=max(a_x1, b_x1) - min(first.left, second.left),
+                height=max(a_y1, b_y1) - min(first.top, second.top),
+                background=first.background,
+            )
+        elif (
+            abs(first.left - second.left) <= tol
+            and abs(a_x1 - b_x1) <= tol
+            and second.top <= a_y1 + tol
+            and first.top <= b_y1 + tol
+        ):
+            union = ShapeElement(
+                left=min(first.left, second.left),
+                top=min(first.top, second.top),
+                width=max(a_x1, b_x1) - min(first.left, second.left),
+                height=max(a_y1, b_y1) - min(first.top, second.top),
+                background=first.background,
+            )
+        else:
+            return None
+
+        # Translucent fills darken where they overlap, so only touching ones may merge.
+        if not self._shape_is_opaque(first) and self._shapes_overlap(first, second):
+            return None
+        return union
+
+    def _shape_is_opaque(self, shape: ShapeElement) -> bool:
+        return shape.background.startswith("rgb(")
+
+    def _shape_contains(self, outer: ShapeElement, inner: ShapeElement) -> bool:
+        tol = SHAPE_EDGE_TOLERANCE
+        return (
+            outer.left <= inner.left + tol
+            and outer.top <= inner.top + tol
+            and outer.left + outer.width >= inner.left + inner.width - tol
+            and outer.top + outer.height >= inner.top + inner.height - tol
+        )
 
-        return type("Rect", (), {"x0": min_x, "y0": min_y, "x1": max_x, "y1": max_y, "width": max_x - min_x, "height": max_y - min_y})()
+    def _shapes_overlap(self, first: ShapeElement, second: ShapeElement) -> bool:
+        """Return True when the shapes share a region of positive area."""
+
+        tol = SHAPE_EDGE_TOLERANCE
+        return (
+            first.left < second.left + second.width - tol
+            and second.left < first.left + first.width - tol
+            and first.top < second.top + second.height - tol
+            and second.top < first.top + first.height - tol
+        )
 
     def _color_tuple_to_css(self, color: Sequence[float] | None, opacity: float | None) -> str | None:
         if not color:
@@ -563,22 +1586,27 @@ class PDFToHTMLConverter:
             return f"rgba({r}, {g}, {b}, {opacity:.3f})"
         return f"rgb({r}, {g}, {b})"
 
-    def _extract_images_with_pdfminer(self) -> list[list[ImageElement]]:
-        _ensure_pdfminer()
-        laparams = self._laparams or LAParams(line_margin=0.1, char_margin=2.0, word_margin=0.2)
-        embedded: list[list[ImageElement]] = []
-
-        page_layouts = self._cached_pdfminer_pages
-        if not page_layouts:
-            page_layouts = list(extract_pages(self.pdf_path, laparams=laparams))
-            self._cached_pdfminer_pages = page_layouts
+    def _extract_images_with_pdfminer(self, assets: AssetPipeline) -> list[list[tuple[Any, ImageElement]]]:
+        embedded: list[list[tuple[Any, ImageElement]]] = []
+
+        pages: Iterable[_PageImages] | None = self._pdfminer_images
+        self._pdfminer_images = None
+        if pages is None:
+            # No layout pass ran (e.g. a direct extract_embedded_images() call); walk the pages now.
+            pages = (
+                _PageImages(
+                    page_index,
+                    self._pdfminer_page_area(page_layout),
+                    float(getattr(page_layout, "height", 0.0) or 0.0),
+                    self._visit_page(page_layout, float(getattr(page_layout, "height", 0.0) or 0.0))[1],
+                )
+                for page_index, page_layout in self._iter_pdfminer_pages()
+            )
 
-        for page_index, page_layout in enumerate(page_layouts):
-            page_images: list[ImageElement] = []
+        for page_index, page_area, page_height, images in pages:
+            page_images: list[tuple[Any, ImageElement]] = []
             self._clear_page_image_assets(page_index)
-            page_area = self._pdfminer_page_area(page_layout)
-            page_height = float(getattr(page_layout, "height", 0.0) or 0.0)
-            for image_number, image in enumerate(self._iter_lt_images(page_layout), start=1):
+            for image_number, image in enumerate(images, start=1):
                 if self._pdfminer_image_covers_page(image, page_area):
                     LOGGER.debug(
                         "Skipping page-sized image %s on page %s",
@@ -589,38 +1617,22 @@ class PDFToHTMLConverter:
                 bbox = getattr(image, "bbox", None)
                 if not bbox or len(bbox) != 4:
                     continue
-                saved = self._save_raw_image(page_index, image_number, image)
-                if saved:
-                    x0, y0, x1, y1 = bbox
-                    width = float(x1 - x0)
-                    height = float(y1 - y0)
-                    if width <= 0 or height <= 0:
-                        continue
+                x0, y0, x1, y1 = bbox
+                width = float(x1 - x0)
+                height = float(y1 - y0)
+                if width <= 0 or height <= 0:
+                    continue
+                future = self._submit_raw_image(assets, page_index, image_number, image)
+                if future is not None:
                     top = page_height - float(y1)
                     page_images.append(
-                        ImageElement(
-                            src=saved,
-                            left=float(x0),
-                            top=top,
-                            width=width,
-                            height=height,
-                        )
+                        (future, ImageElement(src="", left=float(x0), top=top, width=width, height=height))
                     )
             embedded.append(page_images)
 
         return embedded
 
-    def _iter_lt_images(self, layout_obj) -> Iterable:
-        if LTImage is None:
-            return
-        if isinstance(layout_obj, LTImage):
-            yield layout_obj
-            return
-
-        for child in getattr(layout_obj, "_objs", []) or []:
-            yield from self._iter_lt_images(child)
-
-    def _save_raw_image(self, page_index: int, image_number: int, image: LTImage) -> str | None:
+    def _submit_raw_image(self, assets: AssetPipeline, page_index: int, image_number: int, image: LTImage) -> Any:
         stream = getattr(image, "stream", None)
         if stream is None or not hasattr(stream, "get_data"):
             return None
@@ -634,21 +1646,34 @@ class PDFToHTMLConverter:
         filters: list[str] = []
         if hasattr(stream, "get_filters"):
             try:
-                filters = [f.lower() for f in stream.get_filters() or []]
+                # get_filters() yields (filter, params) pairs whose filter is a PSLiteral.
+                filters = [str(getattr(f, "name", f)).lower() for f, _ in stream.get_filters() or []]
             except Exception:  # pragma: no cover - defensive path
                 filters = []
 
         extension = self._resolve_image_extension(filters, image)
-        asset_path = self.assets_dir / f"page_{page_index + 1}_image_{image_number}.{extension}"
-
-        try:
-            with open(asset_path, "wb") as fh:
-                fh.write(data)
-        except OSError as exc:  # pragma: no cover - filesystem errors are environment-specific
-            LOGGER.warning("Failed to write image asset %s: %s", asset_path.name, exc)
-            return None
+        raw = None
+        if extension == "raw":
+            # Everything except DCT/JPX is decoded by pdfminer into bare samples.
+            width, height = getattr(image, "srcsize", (None, None))
+            bits = getattr(image, "bits", 8) or 8
+            if not width or not height:
+                return None
+            if getattr(image, "imagemask", False):
+                raw = RawImageSpec(int(width), int(height), 1, colorspace=None)
+            else:
+                colorspace, palette, palette_colorspace = _describe_colorspace(getattr(image, "colorspace", None))
+                raw = RawImageSpec(
+                    int(width),
+                    int(height),
+                    int(bits),
+                    colorspace=colorspace,
+                    palette=palette,
+                    palette_colorspace=palette_colorspace,
+                )
 
-        return str(asset_path.relative_to(self.output_dir))
+        stem = f"{self.assets_subdir}/page_{page_index + 1}_image_{image_number}"
+        return assets.submit_image(stem, data, extension=extension, raw=raw)
 
     def _pymupdf_image_rects(self, page, xref: int) -> list[Any]:
         try:
@@ -700,72 +1725,181 @@ class PDFToHTMLConverter:
         return coverage >= MAX_EMBEDDED_IMAGE_PAGE_COVERAGE
 
     def _resolve_image_extension(self, filters: Sequence[str], image: LTImage) -> str:
+        """Return the container format of the decoded stream, or ``"raw"`` for bare samples."""
+
         filter_set = {f.lower() for f in filters}
         if "dctdecode" in filter_set:
             return "jpg"
         if "jpxdecode" in filter_set:
             return "jp2"
-        if "ccittfaxdecode" in filter_set:
-            return "tiff"
-
-        name = getattr(image, "name", "") or ""
-        if "." in name:
-            suffix = name.split(".")[-1].lower()
-            if suffix in {"png", "jpg", "jpeg", "jp2", "tiff", "bmp", "gif"}:
-                return suffix
-
-        if filter_set:
-            LOGGER.debug("Unhandled image filters %s; defaulting to png for %s", filter_set, name)
-        return "png"
+        # CCITT, Flate, LZW and friends are decoded by pdfminer into samples.
+        return "raw"
 
     def _clear_page_image_assets(self, page_index: int) -> None:
-        prefix = f"page_{page_index + 1}_image_"
-        for asset in self.assets_dir.glob(f"{prefix}*"):
-            try:
-                asset.unlink()
-            except OSError:  # pragma: no cover - filesystem permissions
-                LOGGER.debug("Unable to remove stale image asset %s", asset)
+        prefix = f"{self.assets_subdir}/page_{page_index + 1}_image_"
+        try:
+            self.sink.clear(prefix)
+        except OSError:  # pragma: no cover - filesystem permissions
+            LOGGER.debug("Unable to remove stale image assets %s*", prefix)
 
-    def _render_page_images(self) -> list[str | None]:
-        if fitz is None and convert_from_path is None:
+    def _render_page_images(self, assets: AssetPipeline, journal: Checkpoint | None = None) -> list[str | None]:
+        pdf2image = _pdf2image() if _fitz() is None else None
+        if _fitz() is None and pdf2image is None:
             LOGGER.warning("Neither PyMuPDF nor pdf2image is available; background images disabled.")
-            return [None] * self._page_count()
+            indices = self._page_indices()
+            return [None] * (len(indices) if indices is not None else self._page_count())
 
         images: list[str | None] = []
-        if fitz is not None:
-            doc = fitz.open(self.pdf_path)
-            for page_number in range(doc.page_count):
-                page = doc.load_page(page_number)
-                pix = page.get_pixmap(dpi=self.dpi)
-                image_path = self.assets_dir / f"page_{page_number + 1}.png"
-                pix.save(image_path)
-                images.append(str(image_path.relative_to(self.output_dir)))
+        rendered = 0
+        if _fitz() is not None:
+            with self._open_fitz() as doc:
+                for page_index in self._selected_indices(doc.page_count):
+                    image_name = f"{self.assets_subdir}/page_{page_index + 1}.png"
+                    images.append(image_name)
+                    if self._restored_render(journal, page_index + 1, image_name):
+                        continue
+                    page = doc.load_page(page_index)
+                    pix = page.get_pixmap(dpi=self.dpi)
+                    self._submit_render(assets, journal, page_index + 1, image_name, pix.tobytes("png"))
+                    rendered += 1
+            self.metrics.counter("agentkit_reference_renders", "Rasterized reference pages.").inc(
+                rendered, phase=self.metrics_phase
+            )
             return images
 
-        assert convert_from_path is not None
-        pil_images = convert_from_path(str(self.pdf_path), dpi=self.dpi)
-        for page_number, image in enumerate(pil_images, start=1):
-            image_path = self.assets_dir / f"page_{page_number}.png"
-            image.save(image_path)
-            images.append(str(image_path.relative_to(self.output_dir)))
+        pending: list[int] = []
+        for page_index in self._selected_indices(self._page_count()):
+            image_name = f"{self.assets_subdir}/page_{page_index + 1}.png"
+            images.append(image_name)
+            if not self._restored_render(journal, page_index + 1, image_name):
+                pending.append(page_index)
+        if pending:
+            rendered = self._render_with_pdf2image(pdf2image, pending, journal)
+        self.metrics.counter("agentkit_reference_renders", "Rasterized reference pages.").inc(
+            rendered, phase=self.metrics_phase
+        )
         return images
 
-    def _page_count(self) -> int:
-        try:
-            _ensure_pdfminer()
-        except MissingDependencyError:
-            if fitz is not None:  # pragma: no cover - optional dependency
-                with fitz.open(self.pdf_path) as doc:  # type: ignore[arg-type]
-                    return doc.page_count
-            raise
+    def _render_with_pdf2image(self, pdf2image: Any, indices: list[int], journal: Checkpoint | None) -> int:
+        """Render ``indices`` with Poppler in bounded windows of consecutive pages.
 
-        with open(self.pdf_path, "rb") as fh:
-            return sum(1 for _ in extract_pages(fh))
+        Poppler writes each window's PNGs straight to disk and only their paths
+        come back, so no page is decoded into memory; the files are then moved
+        (or, for non-directory sinks, copied) to their asset names.
+        """
+
+        assets_dir = self.sink.path_for(self.assets_subdir)
+        if assets_dir is not None:
+            assets_dir.mkdir(parents=True, exist_ok=True)
+        rendered = 0
+        # Scratch space next to the assets keeps the final move a rename on the same filesystem.
+        with tempfile.TemporaryDirectory(prefix=".render-", dir=assets_dir) as scratch:
+            if self._pdf_data is None:
+                source = str(self.pdf_path)
+            else:
+                # Spill in-memory PDFs once instead of once per window.
+                source = os.path.join(scratch, "source.pdf")
+                with open(source, "wb") as fh:
+                    fh.write(self._pdf_data)
+            for window in _page_windows(indices, PDF2IMAGE_WINDOW):
+                prefix = f"page{window[0] + 1}_"
+                paths = pdf2image.convert_from_path(
+                    source,
+                    dpi=self.dpi,
+                    first_page=window[0] + 1,
+                    last_page=window[-1] + 1,
+                    output_folder=scratch,
+                    output_file=prefix,
+                    fmt="png",
+                    paths_only=True,
+                    thread_count=min(self.asset_workers, len(window)),
+                )
+                if len(paths) != len(window):
+                    raise RuntimeError(
+                        f"pdf2image rendered {len(paths)} pages for pages {window[0] + 1}-{window[-1] + 1}"
+                    )
+                # Poppler's output names sort in page order.
+                for page_index, path in zip(window, paths):
+                    self._store_render(journal, page_index + 1, f"{self.assets_subdir}/page_{page_index + 1}.png", path)
+                    rendered += 1
+        return rendered
+
+    def _store_render(self, journal: Checkpoint | None, page_number: int, name: str, path: str) -> None:
+        target = self.sink.path_for(name)
+        if target is not None:
+            os.replace(path, target)
+        else:
+            with open(path, "rb") as fh:
+                self.sink.write_bytes(name, fh.read())
+            os.unlink(path)
+        if journal is not None:
+            journal.record_render(page_number, name)
+        self._emit("page_rendered", page=page_number, kind="reference", src=name)
+
+    def _page_count(self) -> int:
+        """Return the number of pages in the whole document."""
+
+        if self._document_page_count is None:
+            if _fitz() is not None:
+                with self._open_fitz() as doc:
+                    self._document_page_count = doc.page_count
+            else:
+                _ensure_pdfminer()
+                from pdfminer.pdfpage import PDFPage
+
+                # Walking the page tree is much cheaper than laying out every page.
+                source = self._pdfminer_input()
+                with open(source, "rb") if isinstance(source, Path) else source as fh:
+                    self._document_page_count = sum(1 for _ in PDFPage.get_pages(fh))
+        return self._document_page_count
 
     # ------------------------------------------------------------------
     # Output writers
     # ------------------------------------------------------------------
-    def _build_css(self, layouts: Sequence[PageLayout], *, text_scale: float) -> str:
+    def _write_documents(
+        self,
+        layouts: Sequence[PageLayout],
+        text_scale: float,
+        *,
+        page_written: Callable[[PageLayout], None] | None = None,
+    ) -> Path:
+        self._page_documents = {}
+        if self.pages_per_file <= 0:
+            css = self._iter_css(layouts, text_scale=text_scale)
+            self._write_html("index.html", layouts, css, page_written=page_written)
+            return self._output_path("index.html")
+
+        try:
+            self.sink.clear(f"{PAGES_SUBDIR}/page")
+        except OSError:  # pragma: no cover - filesystem permissions
+            LOGGER.debug("Unable to remove stale page documents")
+
+        chunks: list[tuple[str, Sequence[PageLayout]]] = []
+        for offset in range(0, len(layouts), self.pages_per_file):
+            chunk = layouts[offset : offset + self.pages_per_file]
+            first = chunk[0].page_number
+            last = chunk[-1].page_number
+            name = f"page_{first:04d}.html" if first == last else f"pages_{first:04d}-{last:04d}.html"
+            relative = f"{PAGES_SUBDIR}/{name}"
+            for layout in chunk:
+                self._page_documents[layout.page_number] = relative
+            css = self._iter_css(chunk, text_scale=text_scale, lazy=True)
+            self._write_html(relative, chunk, css, base_href="../", page_written=page_written)
+            chunks.append((relative, chunk))
+
+        self._write_split_index("index.html", chunks)
+        LOGGER.debug("Wrote %s page documents for %s pages", len(chunks), len(layouts))
+        return self._output_path("index.html")
+
+    def _iter_css(
+        self,
+        layouts: Sequence[PageLayout],
+        *,
+        text_scale: float,
+        lazy: bool = False,
+    ) -> Iterator[str]:
+        """Yield the stylesheet line by line so it is never assembled in memory."""
+
         base_styles = [
             "body {",
             "  margin: 0;",
@@ -795,16 +1929,22 @@ class PDFToHTMLConverter:
             "  display: block;",
             "}",
         ]
-        css_lines = ["/* Generated by Agentkit PDF to HTML converter */", *base_styles]
-
-        for index, layout in enumerate(layouts, start=1):
-            css_lines.append(f".page--{index} {{ width: {layout.width:.2f}px; height: {layout.height:.2f}px; }}")
+        yield "/* Generated by Agentkit PDF to HTML converter */"
+        yield from base_styles
+        if lazy:
+            # Let the browser skip layout and paint for pages that are off screen.
+            yield from (".page {", "  content-visibility: auto;", "}")
+
+        for layout in layouts:
+            index = layout.page_number
+            page_rule = f"width: {layout.width:.2f}px; height: {layout.height:.2f}px;"
+            if lazy:
+                page_rule += f" contain-intrinsic-size: {layout.width:.2f}px {layout.height:.2f}px;"
+            yield f".page--{index} {{ {page_rule} }}"
             for text_idx, text in enumerate(layout.texts, start=1):
-                css_lines.append(
-                    f".page--{index} .text--{text_idx} {{ {text.to_css(scale=text_scale)} }}"
-                )
+                yield f".page--{index} .text--{text_idx} {{ {text.to_css(scale=text_scale)} }}"
             for shape_idx, shape in enumerate(layout.shapes, start=1):
-                css_lines.append(
+                yield (
                     ".page--{index} .shape--{shape_idx} {{ left: {left:.2f}px; top: {top:.2f}px; "
                     "width: {width:.2f}px; height: {height:.2f}px; background: {background}; }}".format(
                         index=index,
@@ -819,7 +1959,7 @@ class PDFToHTMLConverter:
             for image_idx, image in enumerate(layout.images, start=1):
                 if image.width <= 0 or image.height <= 0:
                     continue
-                css_lines.append(
+                yield (
                     ".page--{index} .image--{image_idx} {{ left: {left:.2f}px; top: {top:.2f}px; "
                     "width: {width:.2f}px; height: {height:.2f}px; }}".format(
                         index=index,
@@ -831,26 +1971,31 @@ class PDFToHTMLConverter:
                     )
                 )
 
-        return "\n".join(css_lines) + "\n"
-
     def _write_html(
         self,
-        path: Path,
+        name: str,
         layouts: Sequence[PageLayout],
-        css: str,
+        css: Iterable[str],
+        *,
+        base_href: str | None = None,
+        page_written: Callable[[PageLayout], None] | None = None,
     ) -> None:
-        with open(path, "w", encoding="utf-8") as fh:
+        with open_serialized(self.sink, name, self.precompress) as fh:
             fh.write("<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n")
             fh.write("  <meta charset=\"utf-8\">\n")
+            if base_href:
+                # Page documents live in a subdirectory but reference assets relative to the output root.
+                fh.write(f"  <base href=\"{base_href}\">\n")
             fh.write("  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">\n")
             fh.write("  <title>PDF Conversion</title>\n")
             fh.write("  <style>\n")
-            for line in css.splitlines():
+            for line in css:
                 fh.write(f"    {line}\n")
             fh.write("  </style>\n")
             fh.write("</head>\n<body>\n")
 
-            for index, layout in enumerate(layouts, start=1):
+            for layout in layouts:
+                index = layout.page_number
                 fh.write(f"  <section class=\"page page--{index}\" data-page=\"{index}\">\n")
                 for shape_idx, shape in enumerate(layout.shapes, start=1):
                     if shape.width <= 0 or shape.height <= 0:
@@ -871,31 +2016,81 @@ class PDFToHTMLConverter:
                         f"    <span class=\"page__text text--{text_idx}\">{safe_text}</span>\n"
                     )
                 fh.write("  </section>\n")
+                if page_written is not None:
+                    page_written(layout)
 
             fh.write("</body>\n</html>\n")
 
-    def _write_manifest(
-        self,
-        layouts: Sequence[PageLayout],
-        page_renders: Sequence[str | None],
-        text_scale: float,
-    ) -> None:
-        manifest = {
-            "pdf": str(self.pdf_path),
-            "pages": [
-                {
-                    "width": layout.width,
-                    "height": layout.height,
-                    "text_count": len(layout.texts),
-                    "image_count": len(layout.images),
-                    "shape_count": len(layout.shapes),
-                    "images": [dataclasses.asdict(image) for image in layout.images],
-                    "shapes": [dataclasses.asdict(shape) for shape in layout.shapes],
-                    "reference": page_renders[index] if index < len(page_renders) else None,
-                }
-                for index, layout in enumerate(layouts)
-            ],
+    def _write_split_index(self, name: str, chunks: Sequence[tuple[str, Sequence[PageLayout]]]) -> None:
+        """Write a lightweight index that lazily embeds each page document."""
+
+        with open_serialized(self.sink, name, self.precompress) as fh:
+            fh.write("<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n")
+            fh.write("  <meta charset=\"utf-8\">\n")
+            fh.write("  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">\n")
+            fh.write("  <title>PDF Conversion</title>\n")
+            fh.write("  <style>\n")
+            fh.write("    /* Generated by Agentkit PDF to HTML converter */\n")
+            fh.write("    body { margin: 0; background: #f2f2f2; }\n")
+            fh.write("    .page-chunk { display: block; margin: 0 auto; border: 0; content-visibility: auto; }\n")
+            fh.write("  </style>\n")
+            fh.write("</head>\n<body>\n")
+            for relative, chunk in chunks:
+                width = max(layout.width for layout in chunk) + 2 * PAGE_MARGIN_PX
+                height = sum(layout.height for layout in chunk) + (len(chunk) + 1) * PAGE_MARGIN_PX
+                first, last = chunk[0].page_number, chunk[-1].page_number
+                title = f"Page {first}" if first == last else f"Pages {first}-{last}"
+                src = relative.replace("&", "&amp;").replace("\"", "&quot;")
+                fh.write(
+                    f"  <iframe class=\"page-chunk\" src=\"{src}\" title=\"{title}\" loading=\"lazy\" "
+                    f"data-first-page=\"{first}\" data-last-page=\"{last}\" "
+                    f"style=\"width: {width:.0f}px; height: {height:.0f}px; contain-intrinsic-size: {width:.0f}px {height:.0f}px;\">"
+                    "</iframe>\n"
+                )
+            fh.write("</body>\n</html>\n")
+
+    def _page_record(self, layout: PageLayout, document: PageLayout, render: str | None) -> dict[str, Any]:
+        """Manifest entry of one page; ``document`` is ``layout`` as written, after coalescing."""
+
+        return {
+            "page": layout.page_number,
+            "width": layout.width,
+            "height": layout.height,
+            "text_count": len(layout.texts),
+            "text_nodes": len(document.texts),
+            "image_count": len(layout.images),
+            "shape_count": len(layout.shapes),
+            # The element dataclasses are flat, so a shallow copy is enough.
+            "images": [dict(vars(image)) for image in layout.images],
+            "shapes": [dict(vars(shape)) for shape in layout.shapes],
+            "figures": [dict(vars(figure)) for figure in layout.figures],
+            "reference": render,
+            "html": self._page_documents.get(layout.page_number, "index.html"),
+        }
+
+    def _document_fields(self, text_scale: float) -> dict[str, Any]:
+        """Document-level manifest fields; ``pages`` is filled in as pages are written."""
+
+        return {
+            "pdf": self.source_name,
+            "pages": [],
             "text_scale": text_scale,
+            "pages_per_file": self.pages_per_file,
+            "assets_subdir": self.assets_subdir,
+            "fingerprint": self.fingerprint,
+            "scale_estimate": dataclasses.asdict(self.scale_estimate) if self.scale_estimate is not None else None,
+            "page_count": self._document_page_count,
+            "shard": list(self.shard) if self.shard is not None else None,
+            "node_budget": self.node_budget,
+            "node_reduction": {"lines": self.node_reduction[0], "nodes": self.node_reduction[1]},
+            "manifest_format": self.manifest_format,
+            "precompress": list(self.precompress),
         }
-        with open(self.output_dir / "manifest.json", "w", encoding="utf-8") as fh:
-            json.dump(manifest, fh, indent=2)
+
+    def _write_layout_files(self, layouts: Sequence[PageLayout], page_renders: Sequence[str | None]) -> None:
+        """Write one JSON layout per page; names only depend on the page number so shards never collide."""
+
+        for index, layout in enumerate(layouts):
+            data = dataclasses.asdict(layout)
+            data["reference"] = page_renders[index] if index < len(page_renders) else None
+            self.sink.write_text(f"{LAYOUTS_SUBDIR}/page_{layout.page_number:04d}.json", json.dumps(data))
@@ -0,0 +1,275 @@
+"""Approximate in-process rasterizer for page layouts.
+
+Draws a :class:`~agentkit.pdf_to_html.PageLayout` the way Chromium draws the
+generated HTML, closely enough to rank text scales without a browser round
+trip: shapes are filled rectangles, images are blitted from the sink and each
+text line is drawn with a local TrueType font, then stretched to the advance
+width of the CSS fallback font (see :mod:`agentkit.font_metrics`).
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+import logging
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from .font_metrics import MAX_SCALE, MIN_SCALE, text_width
+from .pdf_to_html import NORMAL_LINE_HEIGHT
+from .shared import MissingDependencyError, optional_import
+from .sinks import OutputSink
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .pdf_to_html import PageLayout, TextElement
+
+LOGGER = logging.getLogger(__name__)
+
+# Metric-compatible stand-ins for the 'Helvetica Neue', Arial fallback, tried in order.
+FONT_CANDIDATES = {
+    False: ("LiberationSans-Regular.ttf", "Arimo-Regular.ttf", "Arial.ttf", "arial.ttf", "DejaVuSans.ttf"),
+    True: ("LiberationSans-Bold.ttf", "Arimo-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf", "DejaVuSans-Bold.ttf"),
+}
+# Arial's ascent and descent in ems; with ``line-height: normal`` the baseline
+# sits half the leading plus the ascent below the top of the span.
+ASCENT = 0.905
+DESCENT = 0.212
+BASELINE = (NORMAL_LINE_HEIGHT - ASCENT - DESCENT) / 2 + ASCENT
+# Lines whose drawn width is within this ratio of the expected width are not stretched.
+STRETCH_TOLERANCE = 0.02
+# Rendered line masks kept for reuse; neighbouring scales mostly share pixel font sizes.
+MASK_CACHE_SIZE = 20000
+# Pre-screening compares ink density at half the CSS size; the blur hides glyph
+# shape differences between the local font and the browser's.
+PRESCREEN_ZOOM = 0.5
+PRESCREEN_BLUR = 2.0
+# Distance between neighbouring candidate scales.
+PRESCREEN_STEP = 0.02
+
+_COLOR = re.compile(r"rgba?\(\s*([\d.]+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*(?:,\s*([\d.]+)\s*)?\)")
+
+
+def _pillow() -> Tuple[Any, Any, Any]:
+    """Return ``(Image, ImageDraw, ImageFont)``, imported on first use, or ``None`` for each when missing."""
+
+    modules = [optional_import(f"PIL.{name}") for name in ("Image", "ImageDraw", "ImageFont")]
+    if any(module is None for module in modules):
+        return None, None, None
+    return modules[0], modules[1], modules[2]
+
+
+def parse_color(value: str) -> Optional[Tuple[int, int, int, int]]:
+    """Parse a CSS ``rgb()``/``rgba()`` color as written by the converter."""
+
+    match = _COLOR.fullmatch(value.strip())
+    if match is None:
+        return None
+    red, green, blue = (max(0, min(255, round(float(part)))) for part in match.groups()[:3])
+    alpha = match.group(4)
+    return red, green, blue, 255 if alpha is None else max(0, min(255, round(float(alpha) * 255)))
+
+
+class PageRasterizer:
+    """Renders page layouts into RGB PIL images.
+
+    Args:
+        sink: Sink holding the converted assets that images refer to.
+        font_path: TrueType font for text; by default the first of
+            :data:`FONT_CANDIDATES` that Pillow finds, then Pillow's built-in font.
+    """
+
+    def __init__(self, sink: OutputSink, *, font_path: Optional[str] = None) -> None:
+        if _pillow()[0] is None:
+            raise MissingDependencyError("Pillow is required for in-process rasterizing. Install it with 'pip install pillow'.")
+        self.sink = sink
+        self.font_path = font_path
+        self._fonts: Dict[Tuple[bool, int], Any] = {}
+        self._images: Dict[str, Any] = {}
+        self._masks: Dict[Tuple[str, bool, int], Tuple[Any, int, int]] = {}
+        self._warned = False
+
+    def render(self, layout: "PageLayout", *, text_scale: float = 1.0, size: Optional[Tuple[int, int]] = None) -> Any:
+        """Draw ``layout`` at ``text_scale``, by default at its CSS pixel size.
+
+        ``size`` resizes the page to ``(width, height)`` pixels, e.g. the size of
+        a reference render.
+        """
+
+        Image, ImageDraw, _ = _pillow()
+        width, height = size or (max(1, round(layout.width)), max(1, round(layout.height)))
+        zoom_x = width / layout.width if layout.width else 1.0
+        zoom_y = height / layout.height if layout.height else 1.0
+        page = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(page, "RGBA")
+
+        # Same stacking order as the generated HTML: shapes, images, then text.
+        for shape in layout.shapes:
+            color = parse_color(shape.background)
+            if color is None or shape.width <= 0 or shape.height <= 0:
+                continue
+            box = (shape.left * zoom_x, shape.top * zoom_y, (shape.left + shape.width) * zoom_x, (shape.top + shape.height) * zoom_y)
+            draw.rectangle(box, fill=color)
+        for image in layout.images:
+            if image.width <= 0 or image.height <= 0:
+                continue
+            decoded = self._image(image.src)
+            if decoded is None:
+                continue
+            target = (max(1, round(image.width * zoom_x)), max(1, round(image.height * zoom_y)))
+            resized = decoded.resize(target)
+            page.paste(resized, (round(image.left * zoom_x), round(image.top * zoom_y)), resized)
+        for text in layout.texts:
+            self._draw_text(page, text, text_scale, zoom_x, zoom_y)
+        return page
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _draw_text(self, page: Any, text: "TextElement", text_scale: float, zoom_x: float, zoom_y: float) -> None:
+        font_size = text.font_size * text_scale
+        if font_size <= 0:
+            return
+        bold = _is_bold(text.font_weight)
+        italic = text.font_style == "italic"
+        # Glyphs are rendered once at the unscaled size and resized for every text scale.
+        pixels = max(1, round(text.font_size * zoom_y))
+        scale_y = font_size * zoom_y / pixels
+        pitch = text.line_height or 0.0
+        for index, line in enumerate(text.text.split("\n")):
+            if not line.strip():
+                continue
+            mask, left, top = self._mask(line, bold, pixels)
+            if mask is None:
+                continue
+            x = text.left * zoom_x
+            baseline = (text.top + index * pitch + BASELINE * font_size) * zoom_y
+            expected = text_width(line, font_size, bold=bold, italic=italic) * zoom_x
+            # Stretch the line to the advance width of the browser's fallback font.
+            ratio = expected / mask.width if expected > 0 else scale_y
+            height = max(1, round(mask.height * scale_y))
+            if abs(ratio - 1) > STRETCH_TOLERANCE or height != mask.height:
+                mask = mask.resize((max(1, round(mask.width * ratio)), height))
+            page.paste((0, 0, 0), (round(x + left * ratio), round(baseline + top * scale_y)), mask)
+
+    def _mask(self, line: str, bold: bool, pixels: int) -> Tuple[Any, int, int]:
+        """Return the coverage mask of ``line`` and its offset from the baseline origin."""
+
+        key = (line, bold, pixels)
+        cached = self._masks.get(key)
+        if cached is None:
+            Image, ImageDraw, _ = _pillow()
+            font = self._font(bold, pixels)
+            left, top, right, bottom = font.getbbox(line, anchor="ls")
+            mask = None
+            if right > left and bottom > top:
+                mask = Image.new("L", (right - left, bottom - top))
+                ImageDraw.Draw(mask).text((-left, -top), line, fill=255, font=font, anchor="ls")
+            if len(self._masks) >= MASK_CACHE_SIZE:
+                self._masks.clear()
+            cached = self._masks[key] = (mask, left, top)
+        return cached
+
+    def _font(self, bold: bool, size: int) -> Any:
+        key = (bold, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = self._load_font(bold, size)
+        return font
+
+    def _load_font(self, bold: bool, size: int) -> Any:
+        ImageFont = _pillow()[2]
+        candidates = (self.font_path,) if self.font_path else FONT_CANDIDATES[bold] + FONT_CANDIDATES[False]
+        for candidate in candidates:
+            try:
+                return ImageFont.truetype(candidate, size)
+            except OSError:
+                continue
+        if not self._warned:
+            LOGGER.info("No Arial-compatible TrueType font found; approximating text with Pillow's built-in font")
+            self._warned = True
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:
+            # Pillow < 10.1 only has the fixed-size bitmap font.
+            return ImageFont.load_default()
+
+    def _image(self, src: str) -> Any:
+        if src not in self._images:
+            self._images[src] = self._decode(src)
+        return self._images[src]
+
+    def _decode(self, src: str) -> Any:
+        Image = _pillow()[0]
+        try:
+            if src.startswith("data:"):
+                data = base64.b64decode(src.partition(",")[2])
+            else:
+                data = self.sink.read_bytes(src)
+            with Image.open(io.BytesIO(data)) as img:
+                return img.convert("RGBA")
+        except (OSError, ValueError) as exc:
+            LOGGER.debug("Skipping image %s: %s", src[:64], exc)
+            return None
+
+
+def candidate_scales(center: float, count: int, *, step: float = PRESCREEN_STEP) -> List[float]:
+    """Return ``count`` scales spaced by ``step`` around ``center`` within the search bounds."""
+
+    scales = {round(center, 4)}
+    offset = 1
+    while len(scales) < count and offset * step <= MAX_SCALE - MIN_SCALE:
+        for scale in (center - offset * step, center + offset * step):
+            if MIN_SCALE <= scale <= MAX_SCALE and len(scales) < count:
+                scales.add(round(scale, 4))
+        offset += 1
+    return sorted(scales)
+
+
+def _coarse(image: Any, size: Tuple[int, int]) -> Any:
+    ImageFilter = optional_import("PIL.ImageFilter")
+    return image.convert("L").resize(size, resample=_pillow()[0].Resampling.BOX).filter(
+        ImageFilter.GaussianBlur(PRESCREEN_BLUR)
+    )
+
+
+def rank_scales(
+    rasterizer: PageRasterizer,
+    pages: Sequence[Tuple["PageLayout", Any]],
+    scales: Sequence[float],
+) -> List[Tuple[float, float]]:
+    """Rank ``scales`` by their approximate mean difference from the references.
+
+    Args:
+        rasterizer: Renderer for the candidate pages.
+        pages: ``(layout, reference image)`` pairs, references as PIL images.
+        scales: Candidate text scales.
+
+    Returns:
+        ``(score, scale)`` pairs, best first. Scores are comparable with each
+        other but not with the browser diff scores of the refiner.
+    """
+
+    ImageChops = optional_import("PIL.ImageChops")
+    ImageStat = optional_import("PIL.ImageStat")
+    prepared = []
+    for layout, reference in pages:
+        size = (max(1, round(layout.width * PRESCREEN_ZOOM)), max(1, round(layout.height * PRESCREEN_ZOOM)))
+        prepared.append((layout, size, _coarse(reference, size)))
+
+    ranked = []
+    for scale in scales:
+        total = 0.0
+        for layout, size, reference in prepared:
+            # Render at CSS size; smaller renders round font sizes too coarsely to rank scales.
+            candidate = _coarse(rasterizer.render(layout, text_scale=scale), size)
+            total += ImageStat.Stat(ImageChops.difference(reference, candidate)).mean[0] / 255
+        ranked.append((total / max(1, len(prepared)), scale))
+    ranked.sort()
+    return ranked
+
+
+def _is_bold(weight: Optional[str]) -> bool:
+    try:
+        return int(weight or 400) >= 600
+    except ValueError:
+        return weight == "bold"
@@ -0,0 +1,279 @@
+"""Corpus-level regression runner comparing conversions against golden baselines."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .pdf_to_html import PDFToHTMLConverter
+from .shared import MissingDependencyError
+
+LOGGER = logging.getLogger(__name__)
+
+BASELINE_NAME = "agentkit-baseline.json"
+REPORT_NAME = "report.json"
+# A diff score may grow by this much (absolute) before it counts as a regression.
+DEFAULT_SCORE_TOLERANCE = 0.005
+# A stage may get this much slower (relative) before it counts as a regression ...
+DEFAULT_TIME_TOLERANCE = 0.5
+# ... and never for less than this many seconds, which is mostly scheduling noise.
+MIN_TIME_SLACK = 0.05
+# Sample PDFs at the top of the source tree; they are not installed with the package.
+SAMPLE_DOCUMENTS = ("NABProofOfBalance.pdf", "NABTransactionListing.pdf", "xeroPayslip.pdf")
+
+
+@dataclasses.dataclass
+class DocumentResult:
+    """Outcome of converting one corpus document."""
+
+    name: str
+    status: str = "ok"
+    pages: int = 0
+    counts: Dict[str, int] = dataclasses.field(default_factory=dict)
+    timings: Dict[str, float] = dataclasses.field(default_factory=dict)
+    diff_score: Optional[float] = None
+    text_scale: Optional[float] = None
+    regressions: List[str] = dataclasses.field(default_factory=list)
+    changes: List[str] = dataclasses.field(default_factory=list)
+    error: Optional[str] = None
+
+    def baseline_entry(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "counts": self.counts,
+            "timings": self.timings,
+            "diff_score": self.diff_score,
+            "text_scale": self.text_scale,
+        }
+
+
+def default_corpus() -> List[Path]:
+    """Return the sample PDFs of the source tree.
+
+    Only the known sample files are listed; the directory above the package
+    is never searched, since for an installed package that is
+    ``site-packages``. Raises ``ValueError`` when the samples are not
+    available, i.e. outside a source checkout.
+    """
+
+    root = Path(__file__).resolve().parent.parent
+    documents = [root / name for name in SAMPLE_DOCUMENTS]
+    if not (root / "pyproject.toml").is_file() or not all(path.is_file() for path in documents):
+        raise ValueError("The sample PDFs are only available in a source checkout; pass a corpus directory")
+    return documents
+
+
+def discover_documents(corpus: Path | Sequence[Path]) -> List[Path]:
+    if not isinstance(corpus, (str, os.PathLike)):
+        return sorted(Path(path) for path in corpus)
+    corpus = Path(corpus)
+    if corpus.is_file():
+        return [corpus]
+    return sorted(path for path in corpus.rglob("*.pdf") if path.is_file())
+
+
+def run_corpus(
+    corpus: Path | Sequence[Path],
+    output_dir: Path,
+    *,
+    baseline_path: Optional[Path] = None,
+    update_baseline: bool = False,
+    workers: Optional[int] = None,
+    regression: bool = True,
+    iterations: int = 1,
+    dpi: int = 144,
+    score_tolerance: float = DEFAULT_SCORE_TOLERANCE,
+    time_tolerance: float = DEFAULT_TIME_TOLERANCE,
+) -> Dict[str, Any]:
+    """Convert every PDF of ``corpus`` in parallel and compare it with the baseline.
+
+    Each document is converted in its own process into ``output_dir/<name>``.
+    Diff scores come from a short refinement run and are only available when
+    Chromium can be launched. The report is written to ``output_dir/report.json``
+    and returned.
+
+    Args:
+        corpus: Directory searched recursively for ``*.pdf`` files, a single
+            PDF, or a list of PDFs such as :func:`default_corpus`.
+        output_dir: Directory receiving the conversions and the report.
+        baseline_path: Golden baseline, ``agentkit-baseline.json`` in the
+            corpus directory (or the common directory of the listed PDFs) by default.
+        update_baseline: Replace the baseline with the results of this run.
+        workers: Number of worker processes; timings are most stable with one.
+        regression: Measure diff scores with the refinement loop.
+        iterations: Refinement iterations per document.
+        dpi: Rasterization DPI of the reference renders.
+        score_tolerance: Allowed absolute increase of a diff score.
+        time_tolerance: Allowed relative slowdown of a stage.
+    """
+
+    documents = discover_documents(corpus)
+    if isinstance(corpus, (str, os.PathLike)):
+        corpus = Path(corpus)
+        root = corpus if corpus.is_dir() else corpus.parent
+    else:
+        if not documents:
+            raise ValueError("No PDF documents given")
+        root = Path(os.path.commonpath([path.resolve().parent for path in documents]))
+        documents = [path.resolve() for path in documents]
+        corpus = root
+    if not documents:
+        raise ValueError(f"No PDF documents found in {corpus}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if baseline_path is None:
+        baseline_path = root / BASELINE_NAME
+    baseline_path = Path(baseline_path)
+    baseline = _load_baseline(baseline_path)
+
+    jobs = [
+        (str(pdf), pdf.relative_to(root).as_posix(), str(output_dir / pdf.relative_to(root).with_suffix("")), regression, iterations, dpi)
+        for pdf in documents
+    ]
+    workers = max(1, min(workers or min(4, os.cpu_count() or 1), len(jobs)))
+    LOGGER.info("Converting %s documents with %s workers", len(jobs), workers)
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_convert_document(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_convert_document, *zip(*jobs)))
+
+    for result in results:
+        _compare(result, baseline.get(result.name), score_tolerance=score_tolerance, time_tolerance=time_tolerance)
+        level = logging.WARNING if result.status in {"regressed", "failed"} else logging.INFO
+        LOGGER.log(level, "%s: %s%s", result.name, result.status, "".join(f"\n  - {item}" for item in result.regressions))
+
+    summary = {
+        "documents": len(results),
+        "elapsed": round(time.perf_counter() - started, 4),
+        **{status: sum(1 for result in results if result.status == status) for status in ("ok", "new", "regressed", "failed")},
+    }
+    report = {
+        "corpus": str(corpus),
+        "baseline": str(baseline_path),
+        "thresholds": {"score": score_tolerance, "time": time_tolerance, "time_slack": MIN_TIME_SLACK},
+        "summary": summary,
+        "documents": [dataclasses.asdict(result) for result in results],
+    }
+    (output_dir / REPORT_NAME).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if update_baseline:
+        entries = {result.name: result.baseline_entry() for result in results if result.status != "failed"}
+        baseline_path.write_text(json.dumps({"documents": entries}, indent=2, sort_keys=True), encoding="utf-8")
+        LOGGER.info("Updated baseline %s with %s documents", baseline_path, len(entries))
+
+    return report
+
+
+def _load_baseline(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.is_file():
+        LOGGER.info("No baseline at %s; all documents are reported as new.", path)
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("documents", {})
+
+
+def _convert_document(
+    pdf: str, name: str, output: str, regression: bool, iterations: int, dpi: int
+) -> DocumentResult:
+    """Convert (and optionally refine) one document; runs inside a worker process."""
+
+    result = DocumentResult(name=name)
+    try:
+        started = time.perf_counter()
+        converter = PDFToHTMLConverter(pdf, output, dpi=dpi)
+        converter.convert()
+        result.timings = {stage: round(seconds, 4) for stage, seconds in converter.timings.items()}
+        result.timings["total"] = round(time.perf_counter() - started, 4)
+        if regression:
+            result.diff_score = _measure(converter, iterations, result)
+
+        manifest = converter.manifest or {"pages": []}
+        pages = manifest["pages"]
+        result.pages = len(pages)
+        result.text_scale = manifest.get("text_scale")
+        result.counts = {
+            key: sum(page[f"{key}_count"] for page in pages) for key in ("text", "image", "shape")
+        }
+    except Exception as exc:  # noqa: BLE001 - one broken document must not stop the run
+        LOGGER.debug("Conversion of %s failed", name, exc_info=True)
+        result.status = "failed"
+        result.error = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def _measure(converter: PDFToHTMLConverter, iterations: int, result: DocumentResult) -> Optional[float]:
+    references = converter.reference_paths()
+    if not references:
+        result.changes.append("no reference renders; diff score unavailable")
+        return None
+    started = time.perf_counter()
+    try:
+        from .visual_regression import TemplateRefiner, VisualRegressionTester
+
+        with VisualRegressionTester() as tester:
+            refiner = TemplateRefiner(
+                converter, tester, references, max_iterations=iterations, keep_artifacts="none"
+            )
+            refiner.run()
+    except MissingDependencyError as exc:
+        result.changes.append(f"diff score unavailable: {exc}")
+        return None
+    except Exception as exc:  # noqa: BLE001 - e.g. Chromium is not installed
+        reason = str(exc).strip().splitlines()[0] if str(exc).strip() else ""
+        result.changes.append(f"diff score unavailable: {type(exc).__name__}: {reason}")
+        return None
+    finally:
+        result.timings["refine"] = round(time.perf_counter() - started, 4)
+    if refiner.best_score == float("inf"):
+        return None
+    return round(refiner.best_score, 6)
+
+
+def _compare(
+    result: DocumentResult,
+    baseline: Optional[Dict[str, Any]],
+    *,
+    score_tolerance: float,
+    time_tolerance: float,
+) -> None:
+    if result.status == "failed":
+        return
+    if baseline is None:
+        result.status = "new"
+        return
+
+    base_score = baseline.get("diff_score")
+    if result.diff_score is not None and base_score is not None and result.diff_score > base_score + score_tolerance:
+        result.regressions.append(f"diff score {result.diff_score:.4f} vs baseline {base_score:.4f}")
+
+    for stage, seconds in result.timings.items():
+        base_seconds = baseline.get("timings", {}).get(stage)
+        if base_seconds is None:
+            continue
+        if seconds > base_seconds * (1 + time_tolerance) + MIN_TIME_SLACK:
+            result.regressions.append(f"{stage} took {seconds:.3f}s vs baseline {base_seconds:.3f}s")
+
+    for key, count in result.counts.items():
+        base_count = baseline.get("counts", {}).get(key)
+        if base_count is not None and base_count != count:
+            result.changes.append(f"{key} elements {base_count} -> {count}")
+    if baseline.get("pages") not in (None, result.pages):
+        result.changes.append(f"pages {baseline['pages']} -> {result.pages}")
+
+    if result.regressions:
+        result.status = "regressed"
+
+
+def exit_status(report: Dict[str, Any]) -> int:
+    summary = report["summary"]
+    return 1 if summary.get("regressed") or summary.get("failed") else 0
+
+
+__all__: Sequence[str] = ["DocumentResult", "default_corpus", "discover_documents", "run_corpus", "exit_status"]
@@ -0,0 +1,144 @@
+"""Buffered output streams with optional precompressed copies.
+
+Documents are written as many small fragments (one per element or CSS
+rule). :class:`BufferedTextWriter` collects them and encodes them to UTF-8
+in chunks of :data:`BUFFER_SIZE` characters, so neither the whole document
+nor its stylesheet is ever held as one string. When precompression is
+requested, every chunk is also fed to streaming gzip and Brotli compressors
+that write ``<name>.gz`` and ``<name>.br`` next to the output for static
+servers that serve precompressed files directly (``gzip_static``,
+``brotli_static``, ``Content-Encoding`` aware CDNs).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import zlib
+from typing import Any, BinaryIO, Iterable, Iterator, List, Sequence
+
+from .shared import MissingDependencyError, optional_import
+from .sinks import OutputSink
+
+PRECOMPRESS_ENCODINGS = ("gzip", "br")
+PRECOMPRESS_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+# Characters collected before a chunk is encoded and written.
+BUFFER_SIZE = 1 << 18
+# Precompressed copies are written once and served many times, so use the
+# strongest settings.
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def _brotli() -> Any:
+    return optional_import("brotli") or optional_import("brotlicffi")
+
+
+def validate_encodings(encodings: Iterable[str]) -> tuple[str, ...]:
+    """Return ``encodings`` without duplicates, raising for unknown or unavailable ones."""
+
+    validated: List[str] = []
+    for encoding in encodings:
+        if encoding not in PRECOMPRESS_ENCODINGS:
+            raise ValueError(
+                f"Unsupported precompression {encoding!r}; expected one of {', '.join(PRECOMPRESS_ENCODINGS)}"
+            )
+        if encoding == "br" and _brotli() is None:
+            raise MissingDependencyError(
+                "Brotli is required for .br precompression. Install it with 'pip install brotli'."
+            )
+        if encoding not in validated:
+            validated.append(encoding)
+    return tuple(validated)
+
+
+class _CompressedStream:
+    """Compresses written bytes into ``fh`` as they arrive."""
+
+    def __init__(self, fh: BinaryIO, encoding: str) -> None:
+        self._fh = fh
+        if encoding == "gzip":
+            # wbits=31 writes a gzip container; its header carries no timestamp, so output is reproducible.
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress, self._finish = compressor.compress, compressor.flush
+        else:
+            compressor = _brotli().Compressor(quality=BROTLI_QUALITY)
+            self._compress = getattr(compressor, "process", None) or compressor.compress
+            self._finish = compressor.finish
+
+    def write(self, data: bytes) -> None:
+        compressed = self._compress(data)
+        if compressed:
+            self._fh.write(compressed)
+
+    def close(self) -> None:
+        self._fh.write(self._finish())
+
+
+class _Tee:
+    """Binary stream that forwards every write to the output and its compressed copies."""
+
+    def __init__(self, outputs: Sequence[Any]) -> None:
+        self._outputs = outputs
+
+    def write(self, data: bytes) -> int:
+        for output in self._outputs:
+            output.write(data)
+        return len(data)
+
+
+class BufferedTextWriter:
+    """Text stream that encodes collected fragments to a binary stream in large chunks."""
+
+    def __init__(self, stream: Any, *, buffer_size: int = BUFFER_SIZE) -> None:
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._parts: List[str] = []
+        self._pending = 0
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self._buffer_size:
+            self.flush()
+        return len(text)
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        if self._parts:
+            self._stream.write("".join(self._parts).encode("utf-8"))
+            self._parts = []
+            self._pending = 0
+
+
+@contextlib.contextmanager
+def open_precompressed(sink: OutputSink, name: str, encodings: Sequence[str] = ()) -> Iterator[Any]:
+    """Open ``name`` for binary output, also writing a compressed copy per encoding.
+
+    Stale copies of encodings that are not requested are removed.
+    """
+
+    sink.clear(f"{name}.")
+    with contextlib.ExitStack() as stack:
+        if not encodings:
+            yield stack.enter_context(sink.open_binary(name))
+            return
+        compressed = [
+            _CompressedStream(stack.enter_context(sink.open_binary(name + PRECOMPRESS_SUFFIXES[encoding])), encoding)
+            for encoding in encodings
+        ]
+        yield _Tee([stack.enter_context(sink.open_binary(name)), *compressed])
+        for stream in compressed:
+            stream.close()
+
+
+@contextlib.contextmanager
+def open_serialized(sink: OutputSink, name: str, encodings: Sequence[str] = ()) -> Iterator[BufferedTextWriter]:
+    """Open ``name`` for buffered UTF-8 text output, optionally with precompressed copies."""
+
+    with open_precompressed(sink, name, encodings) as stream:
+        writer = BufferedTextWriter(stream)
+        yield writer
+        writer.flush()
@@ -0,0 +1,506 @@
+"""Long-running local conversion server with a pool of pre-warmed workers."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import queue
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .metrics import REGISTRY, MetricsRegistry
+from .pdf_to_html import PDFToHTMLConverter, _ensure_pdfminer
+from .shared import ConversionCancelled, MissingDependencyError
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds a client is asked to wait before retrying when the queue is full.
+RETRY_AFTER_SECONDS = 2
+# Largest request body accepted by default; larger uploads get 413.
+DEFAULT_MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+# Seconds job outputs under the work directory are kept by default.
+DEFAULT_OUTPUT_TTL = 3600.0
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when the job queue is full and a job cannot be accepted."""
+
+
+class OutputBusyError(RuntimeError):
+    """Raised when another queued or running job already writes to the requested output."""
+
+
+@dataclasses.dataclass
+class ConversionJob:
+    """A single conversion request handled by a worker."""
+
+    pdf: Path | bytes
+    output_dir: Path
+    iterations: int
+    regression: bool
+    dpi: int
+    pages_per_file: int = 0
+    future: "Future[Dict[str, Any]]" = dataclasses.field(default_factory=Future)
+    # Set when the client gave up; the converter stops at its next page or stage boundary.
+    cancelled: threading.Event = dataclasses.field(default_factory=threading.Event)
+
+    def describe(self) -> str:
+        return str(self.pdf) if isinstance(self.pdf, Path) else f"<upload of {len(self.pdf)} bytes>"
+
+
+class _Worker(threading.Thread):
+    """Worker thread that keeps its imports and Chromium instance warm between jobs."""
+
+    def __init__(
+        self,
+        index: int,
+        jobs: "queue.Queue[Optional[ConversionJob]]",
+        *,
+        regression: bool,
+        metrics: MetricsRegistry,
+    ) -> None:
+        super().__init__(name=f"agentkit-worker-{index}", daemon=True)
+        self._jobs = jobs
+        self._regression = regression
+        self._metrics = metrics
+        self._tester: Any = None
+        self.busy = False
+
+    def run(self) -> None:
+        self._warm_up()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                break
+            self.busy = True
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    started = time.perf_counter()
+                    try:
+                        result = self._process(job)
+                    except ConversionCancelled as exc:
+                        LOGGER.info("Cancelled %s after its client timed out", job.describe())
+                        self._observe_job("cancelled", started)
+                        job.future.set_exception(exc)
+                    except Exception as exc:  # noqa: BLE001 - reported back to the client
+                        LOGGER.exception("Conversion of %s failed", job.describe())
+                        self._observe_job("failed", started)
+                        job.future.set_exception(exc)
+                        self._recycle_browser()
+                    else:
+                        self._observe_job("ok", started)
+                        job.future.set_result(result)
+                else:
+                    self._metrics.counter("agentkit_jobs", "Server jobs by outcome.").inc(status="cancelled")
+            finally:
+                self.busy = False
+                self._jobs.task_done()
+        self._shutdown()
+
+    def _observe_job(self, status: str, started: float) -> None:
+        # Recorded before the client is answered so a following scrape sees the job.
+        self._metrics.counter("agentkit_jobs", "Server jobs by outcome.").inc(status=status)
+        self._metrics.histogram("agentkit_job_seconds", "Duration of server jobs.").observe(
+            time.perf_counter() - started
+        )
+
+    def _warm_up(self) -> None:
+        try:
+            _ensure_pdfminer()
+        except MissingDependencyError as exc:
+            LOGGER.error("%s", exc)
+        if not self._regression:
+            return
+        try:
+            from .visual_regression import VisualRegressionTester
+
+            self._tester = VisualRegressionTester()
+            self._tester.start()
+        except Exception as exc:  # noqa: BLE001 - regression is optional for the server
+            LOGGER.warning("%s could not launch a browser; regression disabled: %s", self.name, exc)
+            self._tester = None
+
+    def _recycle_browser(self) -> None:
+        if self._tester is None:
+            return
+        try:
+            self._tester.close()
+            self._tester.start()
+        except Exception as exc:  # noqa: BLE001 - keep the worker alive without regression
+            LOGGER.warning("%s could not relaunch its browser: %s", self.name, exc)
+            self._tester = None
+
+    def _shutdown(self) -> None:
+        if self._tester is not None:
+            try:
+                self._tester.close()
+            except Exception:  # pragma: no cover - best effort shutdown
+                LOGGER.debug("Error while closing browser of %s", self.name, exc_info=True)
+
+    def _process(self, job: ConversionJob) -> Dict[str, Any]:
+        started = time.perf_counter()
+        converter = PDFToHTMLConverter(
+            job.pdf,
+            job.output_dir,
+            dpi=job.dpi,
+            pages_per_file=job.pages_per_file,
+            metrics=self._metrics,
+            cancel_event=job.cancelled,
+        )
+        html_path = converter.convert()
+        scores: List[float] = []
+
+        # Every re-conversion of the refiner checks ``job.cancelled`` as well.
+        if job.regression and self._tester is not None and not job.cancelled.is_set():
+            from .visual_regression import TemplateRefiner
+
+            references = converter.reference_paths()
+            if references:
+                refiner = TemplateRefiner(converter, self._tester, references, max_iterations=job.iterations)
+                scores = [result.diff_score for result in refiner.run()]
+
+        return {
+            "html": str(html_path),
+            "output": str(job.output_dir),
+            "manifest": str(job.output_dir / converter.manifest_name),
+            "scores": scores,
+            "elapsed": round(time.perf_counter() - started, 4),
+        }
+
+
+class ConversionServer:
+    """Accepts conversion jobs over HTTP and runs them on warm workers.
+
+    Jobs go through a bounded queue; when it is full new requests are rejected
+    with ``503 Service Unavailable`` and a ``Retry-After`` header instead of
+    piling up. ``GET /metrics`` exposes ``metrics`` as OpenMetrics text (or
+    JSON with ``?format=json``), including worker and queue saturation.
+
+    Outputs are written below ``work_dir``; a job may name a subdirectory but
+    never a path outside it. Request bodies above ``max_upload_bytes`` are
+    rejected with ``413``. A job still running after ``job_timeout`` seconds
+    is cancelled and answered with ``504``. Job outputs older than
+    ``output_ttl`` seconds are deleted as new jobs arrive (``None`` keeps them).
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        queue_size: int = 8,
+        iterations: int = 3,
+        regression: bool = True,
+        dpi: int = 144,
+        work_dir: Optional[Path] = None,
+        job_timeout: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+        output_ttl: Optional[float] = DEFAULT_OUTPUT_TTL,
+    ) -> None:
+        self.iterations = iterations
+        self.metrics = REGISTRY if metrics is None else metrics
+        self.regression = regression
+        self.dpi = dpi
+        self.job_timeout = job_timeout
+        self.max_upload_bytes = max(0, int(max_upload_bytes))
+        self.output_ttl = output_ttl
+        self.work_dir = Path(work_dir) if work_dir else Path(tempfile.mkdtemp(prefix="agentkit-serve-"))
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.work_dir = self.work_dir.resolve()
+        # Output directories of queued and running jobs, never pruned.
+        self._active_outputs: set[Path] = set()
+        self._outputs_lock = threading.Lock()
+        self._jobs: "queue.Queue[Optional[ConversionJob]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._workers = [
+            _Worker(index, self._jobs, regression=regression, metrics=self.metrics) for index in range(max(1, workers))
+        ]
+        self._httpd: Optional[socketserver.BaseServer] = None
+        self._started = False
+
+    # ------------------------------------------------------------------
+    # Job handling
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Start the worker pool."""
+
+        if self._started:
+            return
+        _ensure_pdfminer()
+        for worker in self._workers:
+            worker.start()
+        self._started = True
+
+    def submit(self, job: ConversionJob) -> "Future[Dict[str, Any]]":
+        """Queue ``job`` without blocking; raise :class:`ServerBusyError` when full.
+
+        Raises :class:`OutputBusyError` when an unfinished job already uses
+        the same output directory, since both would write into it and the
+        first to finish would expose the directory to pruning.
+        """
+
+        self.prune_outputs()
+        with self._outputs_lock:
+            if job.output_dir in self._active_outputs:
+                self.metrics.counter("agentkit_jobs", "Server jobs by outcome.").inc(status="conflict")
+                raise OutputBusyError(f"Another job is still writing to {job.output_dir.name}")
+            self._active_outputs.add(job.output_dir)
+        try:
+            self._jobs.put_nowait(job)
+        except queue.Full as exc:
+            self._release(job)
+            self.metrics.counter("agentkit_jobs", "Server jobs by outcome.").inc(status="rejected")
+            raise ServerBusyError("Conversion queue is full") from exc
+        job.future.add_done_callback(lambda _: self._release(job))
+        return job.future
+
+    def cancel(self, job: ConversionJob) -> None:
+        """Drop ``job`` if it is still queued, otherwise ask its worker to stop."""
+
+        job.cancelled.set()
+        job.future.cancel()
+
+    def prune_outputs(self, *, now: Optional[float] = None) -> int:
+        """Delete job outputs under ``work_dir`` not modified for ``output_ttl`` seconds.
+
+        Returns the number of removed directories.
+        """
+
+        if self.output_ttl is None:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.output_ttl
+        with self._outputs_lock:
+            active = set(self._active_outputs)
+        removed = 0
+        for entry in self.work_dir.iterdir():
+            try:
+                if not entry.is_dir() or entry in active or entry.stat().st_mtime > cutoff:
+                    continue
+            except OSError:  # pragma: no cover - removed concurrently
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+        if removed:
+            LOGGER.debug("Removed %s expired job outputs from %s", removed, self.work_dir)
+        return removed
+
+    def _release(self, job: ConversionJob) -> None:
+        with self._outputs_lock:
+            self._active_outputs.discard(job.output_dir)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "busy": sum(1 for worker in self._workers if worker.busy),
+            "queued": self._jobs.qsize(),
+            "capacity": self._jobs.maxsize,
+        }
+
+    def export_metrics(self, *, fmt: str = "openmetrics") -> str:
+        """Return the metrics registry with current worker and queue gauges."""
+
+        status = self.status()
+        self.metrics.gauge("agentkit_workers", "Worker threads.").set(status["workers"])
+        self.metrics.gauge("agentkit_workers_busy", "Workers currently converting.").set(status["busy"])
+        self.metrics.gauge("agentkit_queue_depth", "Jobs waiting for a worker.").set(status["queued"])
+        self.metrics.gauge("agentkit_queue_capacity", "Maximum number of waiting jobs.").set(status["capacity"])
+        if fmt == "json":
+            return json.dumps(self.metrics.snapshot())
+        return self.metrics.to_openmetrics()
+
+    def stop(self) -> None:
+        """Stop accepting requests and let workers finish their current jobs."""
+
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._started:
+            for _ in self._workers:
+                self._jobs.put(None)
+            for worker in self._workers:
+                worker.join()
+            self._started = False
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+    def serve_forever(self, *, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[Path] = None) -> None:
+        """Serve HTTP on ``host:port`` or on the Unix socket ``socket_path``."""
+
+        self.start()
+        handler = _make_handler(self)
+        if socket_path is not None:
+            socket_path = Path(socket_path)
+            if socket_path.exists():
+                socket_path.unlink()
+            self._httpd = _UnixHTTPServer(str(socket_path), handler)
+            LOGGER.info("Conversion server listening on unix:%s", socket_path)
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), handler)
+            LOGGER.info("Conversion server listening on http://%s:%s", host, port)
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.stop()
+            if socket_path is not None:
+                socket_path.unlink(missing_ok=True)
+
+    def _job_from_request(self, params: Dict[str, Any], upload: Optional[bytes]) -> ConversionJob:
+        job_id = uuid.uuid4().hex
+        pdf: Path | bytes
+        if upload is not None:
+            # Uploads are converted straight from memory.
+            pdf = upload
+        elif params.get("pdf"):
+            pdf = Path(str(params["pdf"]))
+            if not pdf.is_file():
+                raise ValueError(f"PDF not found: {pdf}")
+        else:
+            raise ValueError("Provide a 'pdf' path or upload the document as application/pdf.")
+
+        output = params.get("output")
+        if output:
+            # Named outputs are subdirectories of the work directory; the converter clears stale files there.
+            output_dir = (self.work_dir / str(output)).resolve()
+            if output_dir == self.work_dir or not output_dir.is_relative_to(self.work_dir):
+                raise ValueError(f"Output must be a subdirectory of the server's work directory: {output}")
+        else:
+            output_dir = self.work_dir / f"job_{job_id}"
+
+        return ConversionJob(
+            pdf=pdf,
+            output_dir=output_dir,
+            iterations=int(params.get("iterations", self.iterations)),
+            regression=_as_bool(params.get("regression", self.regression)),
+            dpi=int(params.get("dpi", self.dpi)),
+            pages_per_file=int(params.get("split_pages", 0)),
+        )
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() not in {"", "0", "false", "no", "off"}
+    return bool(value)
+
+
+def _make_handler(server: ConversionServer) -> type:
+    class _Handler(BaseHTTPRequestHandler):
+        server_version = "agentkit"
+
+        def address_string(self) -> str:  # Unix sockets have no peer address.
+            if isinstance(self.client_address, tuple) and self.client_address:
+                return str(self.client_address[0])
+            return "unix"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - signature from base class
+            LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send_json(HTTPStatus.OK, server.status())
+            elif url.path == "/metrics":
+                fmt = parse_qs(url.query).get("format", ["openmetrics"])[-1]
+                content_type = (
+                    "application/json" if fmt == "json" else "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                )
+                self._send_body(HTTPStatus.OK, server.export_metrics(fmt=fmt).encode("utf-8"), content_type)
+            else:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            url = urlparse(self.path)
+            if url.path != "/convert":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"})
+                return
+            if length > server.max_upload_bytes:
+                # The body is never read, so the connection cannot be reused.
+                self.close_connection = True
+                self._send_json(
+                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    {"error": f"Request body of {length} bytes exceeds the limit of {server.max_upload_bytes} bytes"},
+                )
+                return
+            body = self.rfile.read(length) if length > 0 else b""
+            params: Dict[str, Any] = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            upload: Optional[bytes] = None
+            content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+            try:
+                if content_type == "application/pdf":
+                    upload = body
+                elif body:
+                    payload = json.loads(body)
+                    if not isinstance(payload, dict):
+                        raise ValueError("Expected a JSON object")
+                    params.update(payload)
+                job = server._job_from_request(params, upload)
+            except (ValueError, TypeError) as exc:
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+                return
+
+            try:
+                future = server.submit(job)
+            except ServerBusyError as exc:
+                self._send_json(
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    {"error": str(exc)},
+                    headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+                )
+                return
+            except OutputBusyError as exc:
+                self._send_json(HTTPStatus.CONFLICT, {"error": str(exc)})
+                return
+
+            try:
+                result = future.result(timeout=server.job_timeout)
+            except FutureTimeoutError:
+                server.cancel(job)
+                self._send_json(
+                    HTTPStatus.GATEWAY_TIMEOUT,
+                    {"error": f"Conversion did not finish within {server.job_timeout} seconds and was cancelled"},
+                )
+                return
+            except Exception as exc:  # noqa: BLE001 - reported back to the client
+                self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(exc) or type(exc).__name__})
+                return
+            self._send_json(HTTPStatus.OK, result)
+
+        def _send_json(
+            self, status: HTTPStatus, payload: Dict[str, Any], *, headers: Optional[Dict[str, str]] = None
+        ) -> None:
+            self._send_body(status, json.dumps(payload).encode("utf-8"), "application/json", headers=headers)
+
+        def _send_body(
+            self, status: HTTPStatus, data: bytes, content_type: str, *, headers: Optional[Dict[str, str]] = None
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return _Handler
@@ -0,0 +1,155 @@
+"""Combine the outputs of sharded conversions into a single template."""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .font_metrics import estimate_text_scale
+from .manifest import load_manifest
+from .pdf_to_html import LAYOUTS_SUBDIR, PageLayout, PDFToHTMLConverter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def parse_page_ranges(spec: str) -> List[int]:
+    """Parse a page selection such as ``"1-10,15,20-22"`` into sorted 1-based page numbers."""
+
+    pages: set[int] = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_text, sep, end_text = part.partition("-")
+        try:
+            start = int(start_text)
+            end = int(end_text) if sep else start
+        except ValueError:
+            raise ValueError(f"Invalid page range {part!r}") from None
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range {part!r}")
+        pages.update(range(start, end + 1))
+    if not pages:
+        raise ValueError("Empty page selection")
+    return sorted(pages)
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse ``"i/n"`` (1-based shard index and shard count)."""
+
+    index_text, sep, count_text = spec.partition("/")
+    try:
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}; expected I/N") from None
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {spec!r}; expected I/N with 1 <= I <= N")
+    return index, count
+
+
+def merge_shards(
+    shard_dirs: Sequence[Path],
+    output_dir: Path,
+    *,
+    pages_per_file: Optional[int] = None,
+    text_scale: Optional[float] = None,
+) -> Path:
+    """Merge the output directories of partial conversions into ``output_dir``.
+
+    Every shard must have been converted with a page range or ``shard`` so it
+    wrote per-page layout files. Assets and layouts are copied into
+    ``output_dir`` (shards may also share it) and ``index.html`` plus the
+    manifest (in the format of the first shard) are rebuilt for all pages.
+
+    Args:
+        shard_dirs: Output directories of the shards.
+        output_dir: Destination of the merged template.
+        pages_per_file: Split setting of the merged output; defaults to the
+            setting of the first shard.
+        text_scale: Text scale of the merged output. By default shards that
+            were converted with a font-metric estimate are estimated again
+            from all merged pages, as a whole-document conversion would be;
+            otherwise the scale of the first shard is used.
+
+    Returns:
+        Path to the merged ``index.html``.
+    """
+
+    output_dir = Path(output_dir)
+    layouts: Dict[int, PageLayout] = {}
+    renders: Dict[int, Optional[str]] = {}
+    manifests: List[Dict[str, Any]] = []
+
+    for shard_dir in map(Path, shard_dirs):
+        manifest = load_manifest(shard_dir)
+        if manifest is None:
+            raise ValueError(f"{shard_dir} does not contain a manifest.json or manifest.jsonl")
+        manifests.append(manifest)
+
+        layout_files = sorted((shard_dir / LAYOUTS_SUBDIR).glob("page_*.json"))
+        if not layout_files:
+            raise ValueError(f"{shard_dir} has no {LAYOUTS_SUBDIR}/ files; convert it with --pages or --shard")
+        for layout_file in layout_files:
+            data = json.loads(layout_file.read_text(encoding="utf-8"))
+            layout = PageLayout.from_dict(data)
+            if layout.page_number in layouts:
+                raise ValueError(f"Page {layout.page_number} appears in more than one shard ({shard_dir})")
+            layouts[layout.page_number] = layout
+            renders[layout.page_number] = data.get("reference")
+
+        _copy_tree(shard_dir, output_dir, manifests[-1].get("assets_subdir", "assets"))
+        _copy_tree(shard_dir, output_dir, LAYOUTS_SUBDIR)
+
+    first = manifests[0]
+    sources = {manifest.get("pdf") for manifest in manifests}
+    if len(sources) > 1:
+        LOGGER.warning("Merging shards of different sources: %s", ", ".join(sorted(map(str, sources))))
+    ordered = [layouts[number] for number in sorted(layouts)]
+    # Each shard only estimated its own pages; redo it for the whole document.
+    estimate = estimate_text_scale(ordered) if all(_used_estimate(manifest) for manifest in manifests) else None
+    if text_scale is None and estimate is not None:
+        text_scale = estimate.scale
+    elif text_scale is None:
+        text_scale = float(first.get("text_scale", 1.0))
+        scales = {manifest.get("text_scale") for manifest in manifests}
+        if len(scales) > 1:
+            LOGGER.warning("Shards were converted with different text scales; using %.3f", text_scale)
+
+    page_count = first.get("page_count")
+    if page_count:
+        missing = sorted(set(range(1, page_count + 1)) - set(layouts))
+        if missing:
+            LOGGER.warning("Merged output is missing %s of %s pages (first: %s)", len(missing), page_count, missing[0])
+
+    converter = PDFToHTMLConverter(
+        Path(str(first.get("pdf", "document.pdf"))),
+        output_dir,
+        assets_subdir=first.get("assets_subdir", "assets"),
+        pages_per_file=first.get("pages_per_file", 0) if pages_per_file is None else pages_per_file,
+        node_budget=first.get("node_budget"),
+        manifest_format=first.get("manifest_format", "json"),
+        precompress=first.get("precompress", ()),
+        page_count=page_count,
+    )
+    converter.scale_estimate = estimate
+    html_path = converter.write_outputs(ordered, [renders[layout.page_number] for layout in ordered], text_scale=text_scale)
+    LOGGER.info("Merged %s pages from %s shards -> %s", len(ordered), len(manifests), html_path)
+    return html_path
+
+
+def _used_estimate(manifest: Dict[str, Any]) -> bool:
+    """Whether a shard's text scale is its font-metric estimate rather than a refined or given one."""
+
+    estimate = manifest.get("scale_estimate")
+    return bool(estimate) and manifest.get("text_scale") == estimate.get("scale")
+
+
+def _copy_tree(shard_dir: Path, output_dir: Path, subdir: str) -> None:
+    source = shard_dir / subdir
+    destination = output_dir / subdir
+    if not source.is_dir() or source.resolve() == destination.resolve():
+        return
+    shutil.copytree(source, destination, dirs_exist_ok=True)
@@ -1,7 +1,11 @@
-"""Shared helpers for optional dependency management."""
+"""Shared helpers for optional dependency management and error types."""
 
 from __future__ import annotations
 
+import functools
+import importlib
+from typing import Any
+
 
 class MissingDependencyError(RuntimeError):
     """Raised when a required runtime dependency is unavailable."""
@@ -12,3 +16,22 @@ class MissingDependencyError(RuntimeError):
 
     def __str__(self) -> str:  # pragma: no cover - trivial delegation
         return self.message
+
+
+class ConversionCancelled(RuntimeError):
+    """Raised inside a worker when an asynchronous conversion was cancelled."""
+
+
+@functools.lru_cache(maxsize=None)
+def optional_import(name: str) -> Any:
+    """Import the optional module ``name`` on first use; return ``None`` when it is missing.
+
+    Heavy backends (PyMuPDF, pdf2image, Pillow, Playwright) are only loaded
+    through this helper so ``agentkit --help`` and conversions that never
+    touch them do not pay for their import.
+    """
+
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
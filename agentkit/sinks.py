@@ -0,0 +1,135 @@
+"""Output sinks that receive the HTML, manifest and assets of a conversion."""
+
+from __future__ import annotations
+
+import abc
+import contextlib
+import io
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Dict, Iterator, TextIO
+
+
+class OutputSink(abc.ABC):
+    """Destination for conversion outputs addressed by relative POSIX names.
+
+    Names always use forward slashes and are relative to the root of the
+    output (for example ``"index.html"`` or ``"assets/page_1.png"``), which is
+    also how generated HTML refers to them. Subclasses implement the four
+    abstract methods; streaming and text helpers build on them.
+    """
+
+    @abc.abstractmethod
+    def write_bytes(self, name: str, data: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    def read_bytes(self, name: str) -> bytes:
+        ...
+
+    @abc.abstractmethod
+    def exists(self, name: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def clear(self, prefix: str) -> None:
+        """Remove every stored output whose name starts with ``prefix``."""
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[TextIO]:
+        """Open ``name`` for streaming UTF-8 text output."""
+
+        buffer = io.StringIO()
+        yield buffer
+        self.write_bytes(name, buffer.getvalue().encode("utf-8"))
+
+    @contextlib.contextmanager
+    def open_binary(self, name: str) -> Iterator[BinaryIO]:
+        """Open ``name`` for streaming binary output."""
+
+        buffer = io.BytesIO()
+        yield buffer
+        self.write_bytes(name, buffer.getvalue())
+
+    def write_text(self, name: str, text: str) -> None:
+        self.write_bytes(name, text.encode("utf-8"))
+
+    def read_text(self, name: str) -> str:
+        return self.read_bytes(name).decode("utf-8")
+
+    def path_for(self, name: str) -> Path | None:
+        """Return the filesystem path of ``name`` or ``None`` for non-file sinks."""
+
+        return None
+
+
+class DirectorySink(OutputSink):
+    """Writes outputs below a directory on the local filesystem."""
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self._created: set[Path] = set()
+
+    def _path(self, name: str) -> Path:
+        return self.root.joinpath(*PurePosixPath(name).parts)
+
+    def _prepare(self, name: str) -> Path:
+        path = self._path(name)
+        if path.parent not in self._created:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._created.add(path.parent)
+        return path
+
+    def write_bytes(self, name: str, data: bytes) -> None:
+        with open(self._prepare(name), "wb") as fh:
+            fh.write(data)
+
+    def read_bytes(self, name: str) -> bytes:
+        return self._path(name).read_bytes()
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).exists()
+
+    def clear(self, prefix: str) -> None:
+        prefix_path = PurePosixPath(prefix)
+        directory = self._path(str(prefix_path.parent)) if prefix_path.parent != PurePosixPath(".") else self.root
+        if not directory.is_dir():
+            return
+        for entry in directory.glob(f"{prefix_path.name}*"):
+            if entry.is_file():
+                entry.unlink(missing_ok=True)
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[TextIO]:
+        with open(self._prepare(name), "w", encoding="utf-8") as fh:
+            yield fh
+
+    @contextlib.contextmanager
+    def open_binary(self, name: str) -> Iterator[BinaryIO]:
+        with open(self._prepare(name), "wb") as fh:
+            yield fh
+
+    def path_for(self, name: str) -> Path | None:
+        return self._path(name)
+
+
+class MemorySink(OutputSink):
+    """Keeps outputs in memory, e.g. for uploading them to object storage."""
+
+    def __init__(self) -> None:
+        self.files: Dict[str, bytes] = {}
+
+    def write_bytes(self, name: str, data: bytes) -> None:
+        self.files[name] = bytes(data)
+
+    def read_bytes(self, name: str) -> bytes:
+        try:
+            return self.files[name]
+        except KeyError:
+            raise FileNotFoundError(name) from None
+
+    def exists(self, name: str) -> bool:
+        return name in self.files
+
+    def clear(self, prefix: str) -> None:
+        for name in [name for name in self.files if name.startswith(prefix)]:
+            del self.files[name]
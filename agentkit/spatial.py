@@ -0,0 +1,244 @@
+"""Uniform-grid spatial index over positioned page elements.
+
+Page elements are axis-aligned boxes given by ``left``/``top``/``width``/
+``height`` in CSS pixels. :class:`SpatialIndex` buckets them into square grid
+cells so region, overlap and nearest-element queries only look at the
+elements around the queried area instead of every element of the page.
+
+Elements are kept under integer keys that default to their insertion order,
+and queries return them in key order, which for page layouts is paint order.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Box = Tuple[float, float, float, float]
+
+# Edge length of a grid cell in CSS pixels; about three lines of body text.
+DEFAULT_CELL_SIZE = 48.0
+# Elements spanning more cells than this (page backgrounds, frames) are kept
+# in a separate list that every query checks instead of filling the grid.
+MAX_ELEMENT_CELLS = 256
+
+
+def element_box(element: object) -> Box:
+    """Return ``(left, top, right, bottom)`` of an element with ``left``/``top``/``width``/``height``."""
+
+    left = float(element.left)  # type: ignore[attr-defined]
+    top = float(element.top)  # type: ignore[attr-defined]
+    return left, top, left + float(element.width), top + float(element.height)  # type: ignore[attr-defined]
+
+
+def _intersects(first: Box, second: Box) -> bool:
+    """Closed intersection: boxes that only touch along an edge intersect."""
+
+    return first[0] <= second[2] and second[0] <= first[2] and first[1] <= second[3] and second[1] <= first[3]
+
+
+def _distance(box: Box, x: float, y: float) -> float:
+    dx = max(box[0] - x, 0.0, x - box[2])
+    dy = max(box[1] - y, 0.0, y - box[3])
+    return math.hypot(dx, dy)
+
+
+class SpatialIndex(Generic[T]):
+    """Grid of element boxes supporting region, overlap and nearest queries.
+
+    Args:
+        elements: Elements to insert, keyed by their position in the iterable.
+        cell_size: Edge length of a grid cell.
+    """
+
+    def __init__(self, elements: Iterable[T] = (), *, cell_size: float = DEFAULT_CELL_SIZE) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self._entries: Dict[int, Tuple[T, Box]] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._large: List[int] = []
+        self._next_key = 0
+        for element in elements:
+            self.insert(element)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[T]:
+        for key in sorted(self._entries):
+            yield self._entries[key][0]
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def insert(self, element: T, *, key: Optional[int] = None) -> int:
+        """Add ``element`` under ``key`` (by default the next insertion number) and return the key."""
+
+        if key is None:
+            key = self._next_key
+        elif key in self._entries:
+            raise KeyError(f"Key {key} is already indexed")
+        self._next_key = max(self._next_key, key + 1)
+        box = element_box(element)
+        self._entries[key] = (element, box)
+        cells = self._cell_range(box)
+        if (cells[2] - cells[0] + 1) * (cells[3] - cells[1] + 1) > MAX_ELEMENT_CELLS:
+            self._large.append(key)
+        else:
+            for cell in self._cells_of(cells):
+                self._cells.setdefault(cell, []).append(key)
+        return key
+
+    def remove(self, key: int) -> T:
+        """Remove and return the element stored under ``key``."""
+
+        element, box = self._entries.pop(key)
+        if key in self._large:
+            self._large.remove(key)
+        else:
+            for cell in self._cells_of(self._cell_range(box)):
+                bucket = self._cells[cell]
+                bucket.remove(key)
+                if not bucket:
+                    del self._cells[cell]
+        return element
+
+    def replace(self, key: int, element: T) -> None:
+        """Store ``element`` under the existing ``key``, e.g. after growing it."""
+
+        self.remove(key)
+        self.insert(element, key=key)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def get(self, key: int) -> T:
+        return self._entries[key][0]
+
+    def query_keys(self, left: float, top: float, right: float, bottom: float) -> List[int]:
+        """Return the keys of elements intersecting the region, in key order."""
+
+        region = (left, top, right, bottom)
+        found = {key for key in self._large if _intersects(self._entries[key][1], region)}
+        for cell in self._cells_of(self._cell_range(region)):
+            for key in self._cells.get(cell, ()):
+                if key not in found and _intersects(self._entries[key][1], region):
+                    found.add(key)
+        return sorted(found)
+
+    def query(self, left: float, top: float, right: float, bottom: float) -> List[T]:
+        """Return the elements intersecting the region, in key order."""
+
+        return [self._entries[key][0] for key in self.query_keys(left, top, right, bottom)]
+
+    def overlaps(self, element: object, *, tolerance: float = 0.0) -> List[T]:
+        """Return the indexed elements sharing more than ``tolerance`` of overlap with ``element``.
+
+        ``element`` itself is never part of the result, so an indexed element
+        can be passed directly.
+        """
+
+        box = element_box(element)
+        shrunk = (box[0] + tolerance, box[1] + tolerance, box[2] - tolerance, box[3] - tolerance)
+        overlapping = []
+        for key in self.query_keys(*box):
+            other, other_box = self._entries[key]
+            if other is element:
+                continue
+            if (
+                shrunk[0] < other_box[2]
+                and other_box[0] < shrunk[2]
+                and shrunk[1] < other_box[3]
+                and other_box[1] < shrunk[3]
+            ):
+                overlapping.append(other)
+        return overlapping
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        *,
+        max_distance: float = math.inf,
+        predicate: Optional[Callable[[T], bool]] = None,
+    ) -> Optional[T]:
+        """Return the element closest to the point ``(x, y)``, or ``None``.
+
+        The distance to an element is zero inside its box. Ties go to the
+        element with the lower key. ``predicate`` restricts the candidates.
+        """
+
+        best: Optional[Tuple[float, int]] = None
+
+        def _consider(key: int) -> None:
+            nonlocal best
+            element, box = self._entries[key]
+            distance = _distance(box, x, y)
+            if distance > max_distance or (predicate is not None and not predicate(element)):
+                return
+            if best is None or (distance, key) < best:
+                best = (distance, key)
+
+        for key in self._large:
+            _consider(key)
+        if self._cells:
+            cx, cy = int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+            min_x = min(cell[0] for cell in self._cells)
+            max_x = max(cell[0] for cell in self._cells)
+            min_y = min(cell[1] for cell in self._cells)
+            max_y = max(cell[1] for cell in self._cells)
+            # Rings closer than the occupied extent are empty, rings beyond it add nothing.
+            first = max(min_x - cx, cx - max_x, min_y - cy, cy - max_y, 0)
+            reach = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy)
+            seen: set[int] = set()
+            for radius in range(first, reach + 1):
+                # Everything outside ring ``radius`` is at least this far away.
+                if radius and min(best[0] if best else math.inf, max_distance) <= (radius - 1) * self.cell_size:
+                    break
+                for cell in self._ring(cx, cy, radius, (min_x, min_y, max_x, max_y)):
+                    for key in self._cells.get(cell, ()):
+                        if key not in seen:
+                            seen.add(key)
+                            _consider(key)
+        return None if best is None else self._entries[best[1]][0]
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _cell_range(self, box: Box) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            int(math.floor(box[0] / size)),
+            int(math.floor(box[1] / size)),
+            int(math.floor(box[2] / size)),
+            int(math.floor(box[3] / size)),
+        )
+
+    @staticmethod
+    def _cells_of(cells: Tuple[int, int, int, int]) -> Iterator[Tuple[int, int]]:
+        x0, y0, x1, y1 = cells
+        for cell_x in range(x0, x1 + 1):
+            for cell_y in range(y0, y1 + 1):
+                yield cell_x, cell_y
+
+    @staticmethod
+    def _ring(cx: int, cy: int, radius: int, extent: Tuple[int, int, int, int]) -> Iterator[Tuple[int, int]]:
+        """Yield the cells of the square ring ``radius`` around ``(cx, cy)`` that lie within ``extent``."""
+
+        min_x, min_y, max_x, max_y = extent
+        if radius == 0:
+            yield cx, cy
+            return
+        x0, x1 = max(cx - radius, min_x), min(cx + radius, max_x)
+        for cell_y in (cy - radius, cy + radius):
+            if min_y <= cell_y <= max_y:
+                for cell_x in range(x0, x1 + 1):
+                    yield cell_x, cell_y
+        y0, y1 = max(cy - radius + 1, min_y), min(cy + radius - 1, max_y)
+        for cell_x in (cx - radius, cx + radius):
+            if min_x <= cell_x <= max_x:
+                for cell_y in range(y0, y1 + 1):
+                    yield cell_x, cell_y
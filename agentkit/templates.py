@@ -0,0 +1,243 @@
+"""Fingerprints and a store of layout templates for recurring document families."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .pdf_to_html import PageLayout
+
+LOGGER = logging.getLogger(__name__)
+
+# Geometry is quantized to this many PDF points so rounding noise does not split families.
+FINGERPRINT_GRID = 1.0
+# Bumped whenever the fingerprinted structure changes, so stale families stop matching.
+FINGERPRINT_VERSION = 2
+# Processed assets kept in a store before the least recently used ones are evicted.
+DEFAULT_MAX_ASSET_BYTES = 64 * 1024 * 1024
+# Eviction frees space down to this fraction of the limit so it does not rescan on every store.
+ASSET_EVICTION_TARGET = 0.9
+
+
+def fingerprint_layouts(layouts: Sequence["PageLayout"], image_digests: Mapping[str, str]) -> str:
+    """Return a digest of the static structure shared by documents of one family.
+
+    The fingerprint covers the distinct page sizes, the column structure of
+    the first page's filled shapes, the content hashes of the embedded images
+    and the set of fonts. Text content and the number of pages are
+    deliberately left out, so monthly statements or payslips built from the
+    same template match.
+
+    Shapes only contribute their horizontal extent and colour, as a set. A
+    statement with more table rows adds more striped rows (or taller merged
+    column fills) with the same extent and colour, so it keeps the
+    fingerprint of its family.
+
+    Args:
+        layouts: Extracted page layouts, including shapes and images.
+        image_digests: Content digest of the source image behind each image ``src``.
+    """
+
+    def _q(value: float) -> float:
+        return round(value / FINGERPRINT_GRID) * FINGERPRINT_GRID
+
+    structure: Dict[str, Any] = {
+        "version": FINGERPRINT_VERSION,
+        "sizes": sorted({(_q(layout.width), _q(layout.height)) for layout in layouts}),
+        "shapes": [],
+        "images": sorted(
+            {image_digests.get(image.src, image.src) for layout in layouts for image in layout.images}
+        ),
+        "fonts": sorted(
+            {
+                (text.font_family or "", text.font_weight or "", text.font_style or "")
+                for layout in layouts
+                for text in layout.texts
+            }
+        ),
+    }
+    if layouts:
+        structure["shapes"] = sorted(
+            {(_q(shape.left), _q(shape.width), shape.background) for shape in layouts[0].shapes}
+        )
+    payload = json.dumps(structure, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclasses.dataclass
+class FamilyTemplate:
+    """Tuned settings remembered for one document family."""
+
+    fingerprint: str
+    text_scale: float
+    diff_score: Optional[float] = None
+    source: str = ""
+    pages: int = 0
+    hits: int = 0
+    updated: float = 0.0
+
+
+class TemplateStore:
+    """Directory of family templates plus a content-addressed cache of processed assets.
+
+    Each family lives in ``<root>/<fingerprint>.json``; processed images are
+    kept under ``<root>/assets`` so a logo that appears in every document of
+    a family is normalized and transcoded only once. The store doubles as the
+    :class:`~agentkit.assets.AssetCache` of the converter's asset pipeline.
+
+    Args:
+        root: Directory holding the store.
+        max_asset_bytes: Size bound of the asset cache. Once exceeded, the
+            least recently used assets are evicted, so images that recur
+            within a family stay while one-off images age out. ``None``
+            keeps every asset.
+    """
+
+    def __init__(self, root: Path | str, *, max_asset_bytes: Optional[int] = DEFAULT_MAX_ASSET_BYTES) -> None:
+        if max_asset_bytes is not None and max_asset_bytes < 0:
+            raise ValueError("max_asset_bytes must not be negative")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_asset_bytes = max_asset_bytes
+        self._assets = self.root / "assets"
+        # Running size of the asset cache, measured on the first store.
+        self._asset_bytes: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Family templates
+    # ------------------------------------------------------------------
+    def lookup(self, fingerprint: str) -> Optional[FamilyTemplate]:
+        path = self._template_path(fingerprint)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable template %s: %s", path, exc)
+            return None
+        return FamilyTemplate(**data)
+
+    def record(
+        self,
+        fingerprint: str,
+        *,
+        text_scale: float,
+        diff_score: Optional[float] = None,
+        source: str = "",
+        pages: int = 0,
+    ) -> FamilyTemplate:
+        """Create or update the template of ``fingerprint`` with freshly tuned settings."""
+
+        template = self.lookup(fingerprint) or FamilyTemplate(fingerprint=fingerprint, text_scale=text_scale)
+        template.text_scale = text_scale
+        template.diff_score = diff_score
+        template.source = source or template.source
+        template.pages = pages or template.pages
+        self._save(template)
+        return template
+
+    def record_hit(self, template: FamilyTemplate) -> None:
+        template.hits += 1
+        self._save(template)
+
+    # ------------------------------------------------------------------
+    # Asset cache
+    # ------------------------------------------------------------------
+    def load_asset(self, key: str) -> Optional[Tuple[bytes, str]]:
+        for path in self._assets.glob(f"{key}.*"):
+            try:
+                data = path.read_bytes()
+                # The modification time doubles as the last use for eviction.
+                os.utime(path)
+            except OSError:
+                return None
+            return data, path.suffix.lstrip(".")
+        return None
+
+    def store_asset(self, key: str, data: bytes, extension: str) -> None:
+        if self.max_asset_bytes is not None and len(data) > self.max_asset_bytes:
+            return
+        try:
+            self._write_atomic(self._assets / f"{key}.{extension}", data)
+        except OSError as exc:  # pragma: no cover - the cache is best effort
+            LOGGER.debug("Could not cache asset %s: %s", key, exc)
+            return
+        if self.max_asset_bytes is None:
+            return
+        if self._asset_bytes is None:
+            self._asset_bytes = sum(size for _, _, size in self._asset_entries())
+        else:
+            self._asset_bytes += len(data)
+        if self._asset_bytes > self.max_asset_bytes:
+            self.evict_assets(int(self.max_asset_bytes * ASSET_EVICTION_TARGET))
+
+    def evict_assets(self, max_bytes: int = 0) -> int:
+        """Remove the least recently used assets until at most ``max_bytes`` remain; return the count removed."""
+
+        # Rescan rather than trust the running total: other converters may share the store.
+        entries = sorted(self._asset_entries())
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, path, size in entries:
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as exc:  # pragma: no cover - the cache is best effort
+                LOGGER.debug("Could not evict asset %s: %s", path, exc)
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            LOGGER.debug("Evicted %d cached assets from %s", removed, self._assets)
+        self._asset_bytes = total
+        return removed
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _asset_entries(self) -> List[Tuple[float, Path, int]]:
+        entries = []
+        try:
+            paths = list(self._assets.iterdir())
+        except FileNotFoundError:
+            return []
+        for path in paths:
+            if path.name.startswith("."):
+                continue  # in-flight atomic writes
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _template_path(self, fingerprint: str) -> Path:
+        return self.root / f"{fingerprint}.json"
+
+    def _save(self, template: FamilyTemplate) -> None:
+        template.updated = time.time()
+        data = json.dumps(dataclasses.asdict(template), indent=2).encode("utf-8")
+        self._write_atomic(self._template_path(template.fingerprint), data)
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        # Several converters may share a store, so never expose half-written files.
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
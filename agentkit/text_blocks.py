@@ -0,0 +1,137 @@
+"""Coalesce stacked text lines into multi-line blocks to keep the DOM small."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .pdf_to_html import PageLayout, TextElement
+
+LOGGER = logging.getLogger(__name__)
+
+# Lines whose left edges differ by at most this many points form one column.
+LEFT_TOLERANCE = 1.0
+# Consecutive gaps of one block may differ by this many points.
+PITCH_TOLERANCE = 0.5
+# Lines further apart than this many font sizes are separate paragraphs.
+MAX_PITCH_RATIO = 2.0
+
+
+def _style_key(text: "TextElement") -> Tuple[object, ...]:
+    return (text.font_name, text.font_family, text.font_weight, text.font_style, round(text.font_size, 1))
+
+
+def find_blocks(texts: Sequence["TextElement"]) -> List[List[int]]:
+    """Return index runs of lines that can be drawn as one block.
+
+    A run consists of at least two single lines with the same font, the same
+    left edge and a constant line pitch, ordered from top to bottom.
+    """
+
+    by_style: Dict[Tuple[object, ...], List[int]] = {}
+    for index, text in enumerate(texts):
+        if text.line_height is None and "\n" not in text.text:
+            by_style.setdefault(_style_key(text), []).append(index)
+
+    blocks: List[List[int]] = []
+    for indices in by_style.values():
+        if len(indices) < 2:
+            continue
+        indices.sort(key=lambda index: texts[index].left)
+        column: List[int] = []
+        for index in indices:
+            if column and texts[index].left - texts[column[0]].left > LEFT_TOLERANCE:
+                blocks.extend(_runs(texts, column))
+                column = []
+            column.append(index)
+        blocks.extend(_runs(texts, column))
+    return blocks
+
+
+def _runs(texts: Sequence["TextElement"], column: List[int]) -> List[List[int]]:
+    column = sorted(column, key=lambda index: texts[index].top)
+    runs: List[List[int]] = []
+    run: List[int] = []
+    pitch: float | None = None
+    for index in column:
+        if run:
+            gap = texts[index].top - texts[run[-1]].top
+            limit = MAX_PITCH_RATIO * texts[index].font_size
+            if 0 < gap <= limit and (pitch is None or abs(gap - pitch) <= PITCH_TOLERANCE):
+                run.append(index)
+                pitch = pitch if pitch is not None else gap
+                continue
+            if len(run) > 1:
+                runs.append(run)
+        run, pitch = [index], None
+    if len(run) > 1:
+        runs.append(run)
+    return runs
+
+
+def merge_lines(lines: Sequence["TextElement"]) -> "TextElement":
+    """Combine stacked ``lines`` (top to bottom) into one element with a ``line_height``."""
+
+    first, last = lines[0], lines[-1]
+    left = min(line.left for line in lines)
+    right = max(line.left + line.width for line in lines)
+    return dataclasses.replace(
+        first,
+        text="\n".join(line.text for line in lines),
+        left=left,
+        width=right - left,
+        height=last.top + last.height - first.top,
+        font_size=sum(line.font_size for line in lines) / len(lines),
+        line_height=(last.top - first.top) / (len(lines) - 1),
+    )
+
+
+def coalesce_texts(texts: Sequence["TextElement"], *, budget: int, other_nodes: int = 0) -> List["TextElement"]:
+    """Merge the longest line runs until the page has at most ``budget`` nodes.
+
+    Args:
+        texts: Text lines of one page.
+        budget: Maximum number of positioned elements on the page; ``0``
+            merges every eligible run.
+        other_nodes: Shapes and images of the page, which count towards the budget.
+    """
+
+    nodes = len(texts) + other_nodes
+    if nodes <= budget:
+        return list(texts)
+
+    heads: Dict[int, List[int]] = {}
+    merged: set[int] = set()
+    for run in sorted(find_blocks(texts), key=len, reverse=True):
+        if nodes <= budget:
+            break
+        heads[run[0]] = run
+        merged.update(run)
+        nodes -= len(run) - 1
+
+    result: List["TextElement"] = []
+    for index, text in enumerate(texts):
+        if index in heads:
+            result.append(merge_lines([texts[member] for member in heads[index]]))
+        elif index not in merged:
+            result.append(text)
+    return result
+
+
+def coalesce_layout(layout: "PageLayout", budget: int) -> "PageLayout":
+    """Return a copy of ``layout`` whose texts respect the node ``budget``."""
+
+    other_nodes = len(layout.shapes) + len(layout.images)
+    texts = coalesce_texts(layout.texts, budget=budget, other_nodes=other_nodes)
+    if other_nodes + len(texts) > budget > 0:
+        LOGGER.debug(
+            "Page %s still has %s nodes after coalescing (budget %s)",
+            layout.page_number,
+            other_nodes + len(texts),
+            budget,
+        )
+    if len(texts) == len(layout.texts):
+        return layout
+    return dataclasses.replace(layout, texts=texts)
@@ -3,27 +3,78 @@
 from __future__ import annotations
 
 import dataclasses
+import heapq
+import io
+import json
 import logging
+import mimetypes
+import time
 from pathlib import Path
-from typing import List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import unquote, urlsplit
 
-try:
-    from PIL import Image, ImageChops, ImageStat
-except ImportError as exc:  # pragma: no cover - optional dependency
-    Image = ImageChops = ImageStat = None  # type: ignore
-    PIL_IMPORT_ERROR = exc
-else:
-    PIL_IMPORT_ERROR = None
+from .metrics import SCORE_BUCKETS
+from .pdf_to_html import PDFToHTMLConverter, PageLayout
+from .shared import MissingDependencyError, optional_import
+from .sinks import OutputSink
 
-try:
-    from playwright.sync_api import sync_playwright  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    sync_playwright = None  # type: ignore
+LOGGER = logging.getLogger(__name__)
 
-from .pdf_to_html import PDFToHTMLConverter
-from .shared import MissingDependencyError
 
-LOGGER = logging.getLogger(__name__)
+def _pillow() -> Tuple[Any, Any, Any]:
+    """Return ``(Image, ImageChops, ImageStat)``, imported on first use, or ``None`` for each when missing."""
+
+    modules = [optional_import(f"PIL.{name}") for name in ("Image", "ImageChops", "ImageStat")]
+    if any(module is None for module in modules):
+        return None, None, None
+    return modules[0], modules[1], modules[2]
+
+
+def _sync_playwright() -> Any:
+    module = optional_import("playwright.sync_api")
+    return None if module is None else module.sync_playwright
+
+
+def _async_playwright() -> Any:
+    module = optional_import("playwright.async_api")
+    return None if module is None else module.async_playwright
+
+# Called with the iteration, the 1-based page number and the page's diff score.
+RefinementProgressCallback = Callable[[int, int, float], Any]
+
+# An image on disk, encoded image bytes or an already decoded PIL image.
+ImageSource = Union[Path, str, bytes, Any]
+
+ARTIFACT_POLICIES = ("always", "best", "worst:N", "none")
+
+# Reference pages the in-process rasterizer ranks scales on, sampled evenly.
+PRESCREEN_MAX_PAGES = 10
+
+# Diff hotspots reported per kept comparison: grid cells of about HOTSPOT_CELL
+# pixels whose mean difference is at least HOTSPOT_MIN_SCORE.
+HOTSPOT_CELL = 64
+HOTSPOT_LIMIT = 5
+HOTSPOT_MIN_SCORE = 0.02
+
+# Origin under which sink contents are served through request interception.
+VIRTUAL_ORIGIN = "http://agentkit.local/"
+
+# Upper bound for reaching the ``load`` event; large documents take a while.
+NAVIGATION_TIMEOUT = 120.0
+
+# Resolves to true once web fonts and every <img> are decoded, or to false after ``timeout`` ms.
+READINESS_SCRIPT = """
+async (timeout) => {
+  const ready = (async () => {
+    if (document.fonts && document.fonts.ready) {
+      await document.fonts.ready;
+    }
+    await Promise.all(Array.from(document.images, (img) => img.decode().catch(() => undefined)));
+    return true;
+  })();
+  return await Promise.race([ready, new Promise((resolve) => setTimeout(() => resolve(false), timeout))]);
+}
+"""
 
 
 @dataclasses.dataclass
@@ -34,62 +85,410 @@ class RegressionResult:
     diff_score: float
     screenshot_path: Optional[Path] = None
     diff_image_path: Optional[Path] = None
+    page_number: int = 0
+    # Worst diff regions and the layout elements under them, written next to the heatmap.
+    hotspots_path: Optional[Path] = None
+    # Encoded screenshot kept in memory until the artifact policy decides its fate.
+    screenshot: Optional[bytes] = dataclasses.field(default=None, repr=False, compare=False)
+
+
+@dataclasses.dataclass(frozen=True)
+class ArtifactPolicy:
+    """Decides which screenshots and heatmaps are written to disk.
+
+    ``always`` writes every comparison, ``best`` only the pages of the best
+    scoring iteration, ``worst:N`` the N worst page comparisons of the run and
+    ``none`` nothing at all.
+    """
+
+    mode: str = "best"
+    count: int = 0
+
+    @classmethod
+    def parse(cls, value: Union[str, "ArtifactPolicy"]) -> "ArtifactPolicy":
+        if isinstance(value, ArtifactPolicy):
+            return value
+        text = value.strip().lower()
+        if text in {"always", "best", "none"}:
+            return cls(text)
+        for prefix in ("worst:", "worst-"):
+            if text.startswith(prefix):
+                try:
+                    count = int(text[len(prefix) :])
+                except ValueError:
+                    break
+                if count > 0:
+                    return cls("worst", count)
+        raise ValueError(f"Unknown artifact policy {value!r}; expected one of {', '.join(ARTIFACT_POLICIES)}")
+
+
+@dataclasses.dataclass
+class _ScaleSearch:
+    """State of the step-halving search over text scales."""
+
+    best_score: float = float("inf")
+    best_scale: float = 1.0
+    current_scale: float = 1.0
+    step: float = 0.08
+    direction: int = 1
+
+    # The step-halving search never runs out of scales to try.
+    done = False
+
+    def update(self, mean_score: float) -> None:
+        if mean_score < self.best_score:
+            self.best_score = mean_score
+            self.best_scale = self.current_scale
+        else:
+            self.direction *= -1
+            self.step *= 0.5
+        self.current_scale = max(0.5, min(1.5, self.current_scale + self.direction * self.step))
+
+
+@dataclasses.dataclass
+class _CandidateSearch:
+    """Confirms pre-screened scales in rank order and keeps the best confirmed one."""
+
+    candidates: List[float]
+    best_score: float = float("inf")
+    best_scale: float = 1.0
+    index: int = 0
+
+    def __post_init__(self) -> None:
+        self.best_scale = self.candidates[0]
+
+    @property
+    def current_scale(self) -> float:
+        return self.candidates[min(self.index, len(self.candidates) - 1)]
+
+    @property
+    def done(self) -> bool:
+        return self.index >= len(self.candidates)
+
+    def update(self, mean_score: float) -> None:
+        if mean_score < self.best_score:
+            self.best_score = mean_score
+            self.best_scale = self.current_scale
+        self.index += 1
 
 
 class VisualRegressionTester:
     """Renders HTML to images and measures the difference from references."""
 
-    def __init__(self, *, viewport_width: int = 1280, viewport_height: int = 720, wait_for: float = 0.2) -> None:
+    def __init__(
+        self,
+        *,
+        viewport_width: int = 1280,
+        viewport_height: int = 720,
+        wait_for: float = 0.0,
+        ready_timeout: float = 5.0,
+        navigation_timeout: float = NAVIGATION_TIMEOUT,
+    ) -> None:
+        """Create a tester.
+
+        Captures wait for the ``load`` event (failing after
+        ``navigation_timeout`` seconds), then for ``document.fonts.ready`` and
+        the decoding of every image, but no longer than ``ready_timeout``
+        seconds; a page that is not ready by then is captured anyway.
+        ``wait_for`` adds a fixed delay on top for pages that need it.
+        """
+
         self.viewport_width = viewport_width
         self.viewport_height = viewport_height
         self.wait_for = wait_for
+        self.ready_timeout = ready_timeout
+        self.navigation_timeout = navigation_timeout
+        self._playwright: Any = None
+        self._browser: Any = None
 
     # ------------------------------------------------------------------
-    # Rendering
+    # Browser lifecycle
     # ------------------------------------------------------------------
-    def render(self, html_path: Path, output_path: Path, *, width: int, height: int) -> Optional[Path]:
-        """Render the HTML to an image using Playwright."""
+    def start(self) -> None:
+        """Launch a Chromium instance that later renders reuse.
+
+        Without calling ``start`` every render launches and closes its own
+        browser. The Playwright sync API is bound to the calling thread, so a
+        started tester must only be used from that thread.
+        """
+
+        sync_playwright = _sync_playwright()
+        if sync_playwright is None or self._browser is not None:
+            return
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch()
+
+    def close(self) -> None:
+        """Shut down the browser launched by :meth:`start`."""
+
+        browser, self._browser = self._browser, None
+        playwright, self._playwright = self._playwright, None
+        try:
+            if browser is not None:
+                browser.close()
+        finally:
+            if playwright is not None:
+                playwright.stop()
 
+    def __enter__(self) -> "VisualRegressionTester":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+    def capture(
+        self,
+        html_path: Union[Path, str],
+        *,
+        width: int,
+        height: int,
+        selector: Optional[str] = None,
+        sink: Optional[OutputSink] = None,
+    ) -> Optional[bytes]:
+        """Render the HTML with Playwright and return the PNG screenshot bytes.
+
+        When ``selector`` is given only the matching element is captured instead
+        of the full page. When ``sink`` is given, ``html_path`` names a document
+        inside it and the document plus its assets are served from the sink via
+        request interception, so no file URL is involved. Returns ``None`` when
+        Playwright is unavailable.
+        """
+
+        sync_playwright = _sync_playwright()
         if sync_playwright is None:
             LOGGER.warning("Playwright is not available; skipping rendering step.")
             return None
 
-        def _render() -> Optional[Path]:
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page(viewport={"width": max(width, 10), "height": max(height, 10)})
-                target_uri = html_path.resolve().as_uri()
-                page.goto(target_uri)
-                page.wait_for_timeout(int(self.wait_for * 1000))
-                page.screenshot(path=str(output_path), full_page=True)
+        def _capture(browser: Any) -> bytes:
+            page = browser.new_page(viewport={"width": max(width, 10), "height": max(height, 10)})
+            try:
+                if sink is not None:
+                    page.route(f"{VIRTUAL_ORIGIN}**", lambda route: route.fulfill(**_sink_response(sink, route.request.url)))
+                url = self._target_url(html_path, sink)
+                page.goto(url, wait_until="load", timeout=self.navigation_timeout * 1000)
+                self._check_ready(page.evaluate(READINESS_SCRIPT, self.ready_timeout * 1000), url)
+                if self.wait_for > 0:
+                    page.wait_for_timeout(int(self.wait_for * 1000))
+                if selector:
+                    return page.locator(selector).first.screenshot()
+                return page.screenshot(full_page=True)
+            finally:
+                page.close()
+
+        if self._browser is not None:
+            return _capture(self._browser)
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            try:
+                return _capture(browser)
+            finally:
                 browser.close()
-            return output_path
 
-        return _render()
+    def render(
+        self,
+        html_path: Union[Path, str],
+        output_path: Path,
+        *,
+        width: int,
+        height: int,
+        selector: Optional[str] = None,
+        sink: Optional[OutputSink] = None,
+    ) -> Optional[Path]:
+        """Render the HTML to an image file using Playwright."""
+
+        data = self.capture(html_path, width=width, height=height, selector=selector, sink=sink)
+        if data is None:
+            return None
+        output_path.write_bytes(data)
+        return output_path
+
+    async def capture_async(
+        self,
+        html_path: Union[Path, str],
+        *,
+        width: int,
+        height: int,
+        selector: Optional[str] = None,
+        sink: Optional[OutputSink] = None,
+        browser: Any = None,
+    ) -> Optional[bytes]:
+        """Render the HTML with ``playwright.async_api`` and return PNG bytes.
+
+        Pass an already launched async ``browser`` to reuse it across renders;
+        otherwise a browser is launched for this call only. See :meth:`capture`
+        for ``selector`` and ``sink``.
+        """
+
+        async_playwright = _async_playwright()
+        if async_playwright is None:
+            LOGGER.warning("Playwright is not available; skipping rendering step.")
+            return None
+
+        if browser is None:
+            async with async_playwright() as p:
+                own_browser = await p.chromium.launch()
+                try:
+                    return await self.capture_async(
+                        html_path, width=width, height=height, selector=selector, sink=sink, browser=own_browser
+                    )
+                finally:
+                    await own_browser.close()
+
+        page = await browser.new_page(viewport={"width": max(width, 10), "height": max(height, 10)})
+        try:
+            if sink is not None:
+
+                async def _fulfill(route: Any) -> None:
+                    await route.fulfill(**_sink_response(sink, route.request.url))
+
+                await page.route(f"{VIRTUAL_ORIGIN}**", _fulfill)
+            url = self._target_url(html_path, sink)
+            await page.goto(url, wait_until="load", timeout=self.navigation_timeout * 1000)
+            self._check_ready(await page.evaluate(READINESS_SCRIPT, self.ready_timeout * 1000), url)
+            if self.wait_for > 0:
+                await page.wait_for_timeout(int(self.wait_for * 1000))
+            if selector:
+                return await page.locator(selector).first.screenshot()
+            return await page.screenshot(full_page=True)
+        finally:
+            await page.close()
+
+    async def render_async(
+        self,
+        html_path: Union[Path, str],
+        output_path: Path,
+        *,
+        width: int,
+        height: int,
+        selector: Optional[str] = None,
+        sink: Optional[OutputSink] = None,
+        browser: Any = None,
+    ) -> Optional[Path]:
+        """Render the HTML to an image file with ``playwright.async_api``."""
+
+        data = await self.capture_async(
+            html_path, width=width, height=height, selector=selector, sink=sink, browser=browser
+        )
+        if data is None:
+            return None
+        output_path.write_bytes(data)
+        return output_path
+
+    def _check_ready(self, ready: Any, url: str) -> None:
+        if ready is False:
+            LOGGER.info(
+                "Fonts or images of %s were not ready after %.1fs; capturing anyway", url, self.ready_timeout
+            )
+
+    def _target_url(self, html_path: Union[Path, str], sink: Optional[OutputSink]) -> str:
+        if sink is not None:
+            return VIRTUAL_ORIGIN + str(html_path).lstrip("/")
+        return Path(html_path).resolve().as_uri()
 
     # ------------------------------------------------------------------
     # Comparison
     # ------------------------------------------------------------------
-    def compare(self, reference: Path, candidate: Path, diff_output: Path) -> float:
-        """Return a normalized difference score between two images."""
+    def compare(self, reference: ImageSource, candidate: ImageSource, diff_output: Optional[Path] = None) -> float:
+        """Return a normalized difference score between two images.
 
-        if Image is None or ImageChops is None or ImageStat is None:
+        Both images may be paths, encoded bytes or decoded PIL images. A heatmap
+        of the differences is written to ``diff_output`` when it is given.
+        """
+
+        _, diff = self._difference(reference, candidate)
+        diff_stat = _pillow()[2].Stat(diff)
+        diff_score = sum(diff_stat.mean) / (255 * len(diff_stat.mean))
+        if diff_output is not None:
+            self._heatmap(diff).save(diff_output)
+        return diff_score
+
+    def diff_heatmap(self, reference: ImageSource, candidate: ImageSource) -> Any:
+        """Return an RGB image highlighting the differences between two images."""
+
+        _, diff = self._difference(reference, candidate)
+        return self._heatmap(diff)
+
+    def hotspots(
+        self,
+        reference: ImageSource,
+        candidate: ImageSource,
+        *,
+        cell: int = HOTSPOT_CELL,
+        limit: int = HOTSPOT_LIMIT,
+    ) -> List[Tuple[float, Tuple[int, int, int, int]]]:
+        """Return the grid cells that differ most as ``(score, (left, top, right, bottom))``.
+
+        Cells are about ``cell`` reference pixels wide; scores are normalized
+        like :meth:`compare`. Cells below ``HOTSPOT_MIN_SCORE`` are omitted.
+        """
+
+        ref_img, diff = self._difference(reference, candidate)
+        width, height = ref_img.size
+        columns, rows = max(1, -(-width // cell)), max(1, -(-height // cell))
+        # Box downsampling averages each cell in one pass.
+        means = diff.convert("L").resize((columns, rows), resample=_pillow()[0].Resampling.BOX).tobytes()
+        ranked = sorted(
+            ((value / 255, position) for position, value in enumerate(means) if value / 255 >= HOTSPOT_MIN_SCORE),
+            key=lambda item: (-item[0], item[1]),
+        )
+        spots = []
+        for score, position in ranked[:limit]:
+            column, row = position % columns, position // columns
+            box = (
+                column * width // columns,
+                row * height // rows,
+                (column + 1) * width // columns,
+                (row + 1) * height // rows,
+            )
+            spots.append((score, box))
+        return spots
+
+    def load_image(self, source: ImageSource) -> Any:
+        """Decode ``source`` into an RGB PIL image."""
+
+        Image = _pillow()[0]
+        if Image is None:
             raise MissingDependencyError(
                 "Pillow is required for image comparison. Install it with 'pip install pillow'."
             )
-
-        ref_img = Image.open(reference).convert("RGB")
-        cand_img = Image.open(candidate).convert("RGB")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            with Image.open(io.BytesIO(source)) as img:
+                return img.convert("RGB")
+        if isinstance(source, (str, Path)):
+            with Image.open(source) as img:
+                return img.convert("RGB")
+        return source if source.mode == "RGB" else source.convert("RGB")
+
+    def _difference(self, reference: ImageSource, candidate: ImageSource) -> Tuple[Any, Any]:
+        ref_img = self.load_image(reference)
+        cand_img = self.load_image(candidate)
         if ref_img.size != cand_img.size:
             cand_img = cand_img.resize(ref_img.size)
-        diff = ImageChops.difference(ref_img, cand_img)
-        diff_stat = ImageStat.Stat(diff)
-        diff_score = sum(diff_stat.mean) / (255 * len(diff_stat.mean))
+        return ref_img, _pillow()[1].difference(ref_img, cand_img)
+
+    def _heatmap(self, diff: Any) -> Any:
         # Highlight differences for debugging
         heat_map = diff.convert("L").point(lambda p: min(255, p * 8))
-        heat_map_rgb = Image.merge("RGB", (heat_map, heat_map, heat_map))
-        heat_map_rgb.save(diff_output)
-        return diff_score
+        return _pillow()[0].merge("RGB", (heat_map, heat_map, heat_map))
+
+
+def _sink_response(sink: OutputSink, url: str) -> dict:
+    """Build ``route.fulfill`` arguments serving ``url`` from ``sink``."""
+
+    name = unquote(urlsplit(url).path).lstrip("/")
+    try:
+        body = sink.read_bytes(name)
+    except (FileNotFoundError, IsADirectoryError):
+        return {"status": 404, "body": b""}
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    return {"status": 200, "body": body, "headers": {"Content-Type": content_type}}
 
 
 class TemplateRefiner:
@@ -99,12 +498,30 @@ class TemplateRefiner:
         self,
         converter: PDFToHTMLConverter,
         tester: VisualRegressionTester,
-        reference_images: Sequence[Path],
+        reference_images: Sequence[Union[Path, bytes]],
         *,
         max_iterations: int = 5,
         output_dir: Optional[Path] = None,
+        keep_artifacts: Union[str, ArtifactPolicy] = "best",
+        initial_scale: Optional[float] = None,
+        target_score: Optional[float] = None,
+        prescreen: int = 0,
     ) -> None:
-        if Image is None:
+        """Create a refiner.
+
+        The search over text scales starts at ``initial_scale``, by default the
+        scale the converter chose for its last conversion (a family template
+        or font-metric estimate) or 1.0. When
+        ``target_score`` is given the loop stops as soon as an iteration's mean
+        difference is at or below it, e.g. to only verify a known-good scale.
+
+        With ``prescreen`` set to N, N candidate scales around the initial
+        scale are ranked with the in-process rasterizer (see
+        :mod:`agentkit.raster`) and Chromium only confirms the best
+        ``max_iterations`` of them instead of running the step-halving search.
+        """
+
+        if _pillow()[0] is None:
             raise MissingDependencyError(
                 "Pillow is required for regression refinement. Install it with 'pip install pillow'."
             )
@@ -114,74 +531,405 @@ class TemplateRefiner:
         self.reference_images = list(reference_images)
         self.max_iterations = max_iterations
         self.output_dir = Path(output_dir) if output_dir else converter.output_dir
+        self.artifact_policy = ArtifactPolicy.parse(keep_artifacts)
+        if self.output_dir is None and self.artifact_policy.mode != "none":
+            raise ValueError("output_dir is required to keep artifacts when the converter does not write to a directory")
+        if initial_scale is None:
+            initial_scale = float((converter.manifest or {}).get("text_scale", 1.0))
+        self.initial_scale = initial_scale
+        self.target_score = target_score
+        self.prescreen = max(0, int(prescreen))
         self.history: List[RegressionResult] = []
-        self._reference_metadata: List[Tuple[Path, int, int]] = []
-
-        for reference in self.reference_images:
-            with Image.open(reference) as img:
-                self._reference_metadata.append((reference, img.width, img.height))
+        # Best text scale and mean difference found by the last run.
+        self.best_scale = initial_scale
+        self.best_score = float("inf")
+        # References are decoded once and kept in memory for every comparison.
+        self._references: List[Any] = [tester.load_image(reference) for reference in self.reference_images]
+        self._reference_metadata: List[Tuple[Any, int, int]] = [
+            (image, image.width, image.height) for image in self._references
+        ]
+        self._best_iteration_results: List[RegressionResult] = []
+        self._best_iteration_score = float("inf")
+        self._worst_results: List[Tuple[float, int, RegressionResult]] = []
+        self._reference_index: Dict[int, int] = {}
 
     def run(self) -> List[RegressionResult]:
         """Execute the refinement loop."""
 
-        best_score = float("inf")
-        best_scale = 1.0
-        current_scale = 1.0
-        step = 0.08
-        direction = 1
+        search = self._new_search()
+        current_scale = self.initial_scale
+        start, finished = self._resume(search)
 
-        for iteration in range(1, self.max_iterations + 1):
+        for iteration in range(start, self.max_iterations + 1):
+            if search.done:
+                break
+            current_scale = search.current_scale
             LOGGER.info("Refinement iteration %s (scale=%.3f)", iteration, current_scale)
-            # Ensure the generated HTML is referenced via an absolute path so Playwright can
-            # reliably open it even when the converter/output directory was provided as a
-            # relative location.
-            html_path = self.converter.convert(text_scale=current_scale).resolve()
-
-            iteration_dir = self.output_dir / f"iteration_{iteration}"
-            iteration_dir.mkdir(exist_ok=True)
-
-            aggregate_score = 0.0
-            comparisons = 0
-            for page_number, (reference, width, height) in enumerate(self._reference_metadata, start=1):
-                screenshot = iteration_dir / f"page_{page_number}.png"
-                diff_output = iteration_dir / f"page_{page_number}_diff.png"
-                rendered = self.tester.render(html_path, screenshot, width=width, height=height)
+            # Pages are served from the converter's sink, so the returned path is not needed.
+            with self.converter.recording_phase("refine"):
+                self.converter.convert(text_scale=current_scale)
+
+            iteration_results: List[RegressionResult] = []
+            for page_number, (reference, width, height) in zip(self._page_numbers(), self._reference_metadata):
+                if iteration == start and page_number in finished:
+                    iteration_results.append(self._restore(iteration, page_number, finished[page_number]))
+                    continue
+                target, selector = self._page_target(page_number)
+                started = time.perf_counter()
+                screenshot = self.tester.capture(
+                    target, width=width, height=height, selector=selector, sink=self.converter.sink
+                )
+                render_seconds = time.perf_counter() - started
 
                 # If Playwright isn't available, skip comparisons but keep record
-                if rendered is None:
+                if screenshot is None:
                     LOGGER.warning("Skipping regression comparison (rendering unavailable).")
                     result = RegressionResult(iteration=iteration, diff_score=float("nan"), screenshot_path=None, diff_image_path=None)
                     self.history.append(result)
                     continue
 
-                diff_score = self.tester.compare(reference, screenshot, diff_output)
-                aggregate_score += diff_score
-                comparisons += 1
-                self.history.append(
-                    RegressionResult(
-                        iteration=iteration,
-                        diff_score=diff_score,
-                        screenshot_path=screenshot,
-                        diff_image_path=diff_output,
-                    )
-                )
-
-            if comparisons:
-                mean_score = aggregate_score / comparisons
-                LOGGER.info("Iteration %s mean diff: %.4f", iteration, mean_score)
-                if mean_score < best_score:
-                    best_score = mean_score
-                    best_scale = current_scale
-                else:
-                    direction *= -1
-                    step *= 0.5
-                current_scale = max(0.5, min(1.5, current_scale + direction * step))
+                diff_score = self.tester.compare(reference, screenshot)
+                result = self._record(iteration, page_number, diff_score, screenshot)
+                if self.artifact_policy.mode == "always":
+                    self._write_artifacts(result)
+                iteration_results.append(result)
+                self._observe_render(iteration, page_number, diff_score, render_seconds)
+                self._journal_comparison(iteration, page_number, current_scale, diff_score)
+
+            if iteration_results:
+                mean_score = self._finish_iteration(iteration, iteration_results, current_scale)
+                search.update(mean_score)
+                if self._reached_target(mean_score):
+                    break
             else:
                 LOGGER.info("No comparisons performed; terminating refinement loop early.")
                 break
 
-        if best_scale != current_scale:
-            LOGGER.info("Rendering final output with best scale %.3f", best_scale)
-            self.converter.convert(text_scale=best_scale)
+        self._write_retained_artifacts()
+        self.best_scale, self.best_score = search.best_scale, search.best_score
+
+        if search.best_scale != current_scale:
+            LOGGER.info("Rendering final output with best scale %.3f", search.best_scale)
+            with self.converter.recording_phase("refine"):
+                self.converter.convert(text_scale=search.best_scale)
 
         return self.history
+
+    async def refine_async(self, *, progress: Optional[RefinementProgressCallback] = None) -> List[RegressionResult]:
+        """Asynchronous variant of :meth:`run`.
+
+        Conversion and image comparison run in the loop's default executor and
+        rendering uses a single async Chromium instance for the whole run.
+        ``progress`` is called after each page comparison.
+        """
+
+        async_playwright = _async_playwright()
+        if async_playwright is None:
+            LOGGER.warning("Playwright is not available; skipping refinement.")
+            return self.history
+
+        import asyncio  # only async callers pay for the event loop machinery
+
+        loop = asyncio.get_running_loop()
+        search = await loop.run_in_executor(None, self._new_search)
+        current_scale = self.initial_scale
+        start, finished = self._resume(search)
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch()
+            try:
+                for iteration in range(start, self.max_iterations + 1):
+                    if search.done:
+                        break
+                    current_scale = search.current_scale
+                    LOGGER.info("Refinement iteration %s (scale=%.3f)", iteration, current_scale)
+                    with self.converter.recording_phase("refine"):
+                        await self.converter.convert_async(text_scale=current_scale)
+
+                    iteration_results: List[RegressionResult] = []
+                    for page_number, (reference, width, height) in zip(
+                        self._page_numbers(), self._reference_metadata
+                    ):
+                        if iteration == start and page_number in finished:
+                            iteration_results.append(self._restore(iteration, page_number, finished[page_number]))
+                            continue
+                        target, selector = self._page_target(page_number)
+                        started = time.perf_counter()
+                        screenshot = await self.tester.capture_async(
+                            target,
+                            width=width,
+                            height=height,
+                            selector=selector,
+                            sink=self.converter.sink,
+                            browser=browser,
+                        )
+                        if screenshot is None:
+                            continue
+                        render_seconds = time.perf_counter() - started
+                        diff_score = await loop.run_in_executor(None, self.tester.compare, reference, screenshot)
+                        result = self._record(iteration, page_number, diff_score, screenshot)
+                        if self.artifact_policy.mode == "always":
+                            # Encoding the PNGs and the heat map would block the event loop.
+                            await loop.run_in_executor(None, self._write_artifacts, result)
+                        iteration_results.append(result)
+                        self._observe_render(iteration, page_number, diff_score, render_seconds)
+                        self._journal_comparison(iteration, page_number, current_scale, diff_score)
+                        if progress is not None:
+                            progress(iteration, page_number, diff_score)
+
+                    if not iteration_results:
+                        LOGGER.info("No comparisons performed; terminating refinement loop early.")
+                        break
+                    mean_score = self._finish_iteration(iteration, iteration_results, current_scale)
+                    search.update(mean_score)
+                    if self._reached_target(mean_score):
+                        break
+            finally:
+                await browser.close()
+
+        await loop.run_in_executor(None, self._write_retained_artifacts)
+        self.best_scale, self.best_score = search.best_scale, search.best_score
+
+        if search.best_scale != current_scale:
+            LOGGER.info("Rendering final output with best scale %.3f", search.best_scale)
+            with self.converter.recording_phase("refine"):
+                await self.converter.convert_async(text_scale=search.best_scale)
+
+        return self.history
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _new_search(self) -> Union[_ScaleSearch, _CandidateSearch]:
+        default = _ScaleSearch(best_scale=self.initial_scale, current_scale=self.initial_scale)
+        if self.prescreen <= 0:
+            return default
+        from .raster import PageRasterizer, candidate_scales, rank_scales
+
+        layouts = {layout.page_number: layout for layout in self.converter.documents}
+        pages = [
+            (layouts[page_number], reference)
+            for page_number, reference in zip(self._page_numbers(), self._references)
+            if page_number in layouts
+        ]
+        if not pages:
+            LOGGER.info("No converted pages to pre-screen; using the step-halving search.")
+            return default
+        if len(pages) > PRESCREEN_MAX_PAGES:
+            stride = len(pages) / PRESCREEN_MAX_PAGES
+            pages = [pages[int(index * stride)] for index in range(PRESCREEN_MAX_PAGES)]
+
+        started = time.perf_counter()
+        ranked = rank_scales(
+            PageRasterizer(self.converter.sink), pages, candidate_scales(self.initial_scale, self.prescreen)
+        )
+        seconds = time.perf_counter() - started
+        metrics = self.converter.metrics
+        metrics.counter("agentkit_prescreen_renders", "Pages drawn by the in-process rasterizer.").inc(
+            len(ranked) * len(pages)
+        )
+        metrics.histogram("agentkit_prescreen_seconds", "Duration of in-process scale pre-screening.").observe(seconds)
+        candidates = [scale for _, scale in ranked[: self.max_iterations]]
+        LOGGER.info(
+            "Pre-screened %s scales on %s pages in %.2fs; confirming %s",
+            len(ranked),
+            len(pages),
+            seconds,
+            ", ".join(f"{scale:.3f}" for scale in candidates),
+        )
+        return _CandidateSearch(candidates=candidates)
+
+    def _resume(self, search: Union[_ScaleSearch, _CandidateSearch]) -> Tuple[int, Dict[int, float]]:
+        """Replay iterations journaled by an interrupted run of the same document.
+
+        Returns the first iteration to run and the page scores it already has.
+        Journaled iterations are only reused while their text scale is the one
+        the search would try next.
+        """
+
+        journal = self.converter.checkpoint
+        if journal is None:
+            return 1, {}
+        comparisons, iterations = journal.take_refinement()
+        iteration = 1
+        while iteration <= self.max_iterations and iteration in iterations and not search.done:
+            scale, mean_score = iterations[iteration]
+            if scale != search.current_scale:
+                break
+            for page_number, score in sorted(comparisons.get(iteration, (scale, {}))[1].items()):
+                self._restore(iteration, page_number, score)
+            # Artifacts of restored iterations are gone; only later, better iterations replace them.
+            self._best_iteration_score = min(self._best_iteration_score, mean_score)
+            LOGGER.info("Restored iteration %s from the checkpoint (scale=%.3f, mean diff %.4f)", iteration, scale, mean_score)
+            search.update(mean_score)
+            iteration += 1
+            if self._reached_target(mean_score):
+                return self.max_iterations + 1, {}
+        scale, scores = comparisons.get(iteration, (search.current_scale, {}))
+        return iteration, scores if scale == search.current_scale else {}
+
+    def _restore(self, iteration: int, page_number: int, diff_score: float) -> RegressionResult:
+        result = RegressionResult(iteration=iteration, diff_score=diff_score, page_number=page_number)
+        self.history.append(result)
+        return result
+
+    def _journal_comparison(self, iteration: int, page_number: int, scale: float, diff_score: float) -> None:
+        if self.converter.checkpoint is not None:
+            self.converter.checkpoint.record_comparison(iteration, page_number, scale, diff_score)
+
+    def _reached_target(self, mean_score: float) -> bool:
+        if self.target_score is None or mean_score > self.target_score:
+            return False
+        LOGGER.info("Mean diff %.4f is within the target %.4f; stopping refinement.", mean_score, self.target_score)
+        return True
+
+    def _page_numbers(self) -> List[int]:
+        # References of a page-range or shard conversion start at its first page, not page 1.
+        pages = self.converter.reference_pages()
+        if len(pages) != len(self._references):
+            pages = list(range(1, len(self._references) + 1))
+        self._reference_index = {page_number: index for index, page_number in enumerate(pages)}
+        return pages
+
+    def _page_target(self, page_number: int) -> Tuple[str, Optional[str]]:
+        # Split output lets us load only the document that holds this page.
+        page_document = self.converter.page_document_name(page_number)
+        if page_document is None:
+            return "index.html", None
+        return page_document, f'[data-page="{page_number}"]'
+
+    def _record(self, iteration: int, page_number: int, diff_score: float, screenshot: bytes) -> RegressionResult:
+        """Add a comparison to the history and apply the retention policy.
+
+        Under the ``"always"`` policy the caller writes the artifacts, so the
+        async loop can do it off the event loop.
+        """
+
+        result = RegressionResult(
+            iteration=iteration,
+            diff_score=diff_score,
+            page_number=page_number,
+            screenshot=screenshot,
+        )
+        self.history.append(result)
+
+        policy = self.artifact_policy
+        if policy.mode == "worst":
+            # Min-heap on the score keeps the N worst comparisons seen so far.
+            entry = (diff_score, len(self.history), result)
+            if len(self._worst_results) < policy.count:
+                heapq.heappush(self._worst_results, entry)
+            else:
+                dropped = heapq.heappushpop(self._worst_results, entry)[2]
+                dropped.screenshot = None
+        elif policy.mode == "none":
+            result.screenshot = None
+        return result
+
+    def _observe_render(self, iteration: int, page_number: int, diff_score: float, seconds: float) -> None:
+        metrics = self.converter.metrics
+        metrics.counter("agentkit_browser_renders", "Pages captured in Chromium.").inc()
+        metrics.histogram("agentkit_browser_render_seconds", "Duration of Chromium page captures.").observe(seconds)
+        metrics.histogram("agentkit_diff_score", "Per-page diff scores.", buckets=SCORE_BUCKETS).observe(diff_score)
+        if self.converter.hooks is not None:
+            self.converter.hooks.emit(
+                "page_rendered",
+                document=self.converter.source_name,
+                page=page_number,
+                kind="browser",
+                iteration=iteration,
+                diff_score=diff_score,
+                seconds=seconds,
+            )
+
+    def _finish_iteration(self, iteration: int, results: Sequence[RegressionResult], scale: float) -> float:
+        mean_score = sum(result.diff_score for result in results) / len(results)
+        LOGGER.info("Iteration %s mean diff: %.4f", iteration, mean_score)
+        if self.converter.checkpoint is not None:
+            self.converter.checkpoint.record_iteration(iteration, scale, mean_score)
+        self.converter.metrics.counter("agentkit_refinement_iterations", "Completed refinement iterations.").inc()
+        if self.converter.hooks is not None:
+            self.converter.hooks.emit(
+                "iteration_finished",
+                document=self.converter.source_name,
+                iteration=iteration,
+                text_scale=scale,
+                mean_score=mean_score,
+                pages=len(results),
+            )
+        if self.artifact_policy.mode == "best":
+            if mean_score < self._best_iteration_score:
+                for previous in self._best_iteration_results:
+                    previous.screenshot = None
+                self._best_iteration_score = mean_score
+                self._best_iteration_results = list(results)
+            else:
+                for result in results:
+                    result.screenshot = None
+        return mean_score
+
+    def _write_retained_artifacts(self) -> None:
+        mode = self.artifact_policy.mode
+        if mode == "best":
+            retained = self._best_iteration_results
+        elif mode == "worst":
+            retained = [entry[2] for entry in sorted(self._worst_results, reverse=True)]
+        else:
+            return
+        for result in retained:
+            self._write_artifacts(result)
+
+    def _write_artifacts(self, result: RegressionResult) -> None:
+        if result.screenshot is None:
+            return
+        iteration_dir = self.output_dir / f"iteration_{result.iteration}"
+        iteration_dir.mkdir(parents=True, exist_ok=True)
+        screenshot_path = iteration_dir / f"page_{result.page_number}.png"
+        diff_path = iteration_dir / f"page_{result.page_number}_diff.png"
+        screenshot_path.write_bytes(result.screenshot)
+        reference = self._references[self._reference_index.get(result.page_number, result.page_number - 1)]
+        screenshot = self.tester.load_image(result.screenshot)
+        self.tester.diff_heatmap(reference, screenshot).save(diff_path)
+        result.screenshot_path = screenshot_path
+        result.diff_image_path = diff_path
+        layout = self._layouts().get(result.page_number)
+        if layout is not None:
+            hotspots_path = iteration_dir / f"page_{result.page_number}_hotspots.json"
+            hotspots = self._hotspot_report(layout, reference, screenshot)
+            hotspots_path.write_text(json.dumps(hotspots, indent=2), encoding="utf-8")
+            result.hotspots_path = hotspots_path
+        result.screenshot = None
+
+    def _layouts(self) -> Dict[int, PageLayout]:
+        return {layout.page_number: layout for layout in self.converter.documents}
+
+    def _hotspot_report(self, layout: PageLayout, reference: Any, screenshot: Any) -> List[Dict[str, Any]]:
+        """Describe the worst diff regions and the elements drawn there, in CSS pixels."""
+
+        zoom_x = layout.width / reference.width if reference.width else 1.0
+        zoom_y = layout.height / reference.height if reference.height else 1.0
+        report = []
+        for score, (left, top, right, bottom) in self.tester.hotspots(reference, screenshot):
+            region = (left * zoom_x, top * zoom_y, right * zoom_x, bottom * zoom_y)
+            report.append(
+                {
+                    "score": round(score, 4),
+                    "region": [round(value, 2) for value in region],
+                    "elements": [_describe_element(element) for element in layout.elements_in(*region)],
+                }
+            )
+        return report
+
+
+def _describe_element(element: Any) -> Dict[str, Any]:
+    kind = type(element).__name__.replace("Element", "").lower()
+    described: Dict[str, Any] = {
+        "kind": kind,
+        "box": [round(value, 2) for value in (element.left, element.top, element.width, element.height)],
+    }
+    for attribute in ("text", "src", "background", "name"):
+        value = getattr(element, attribute, None)
+        if value:
+            # Inline images are identified by their media type only.
+            described[attribute] = value.split(",", 1)[0] if value.startswith("data:") else value
+    return described
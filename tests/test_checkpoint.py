@@ -0,0 +1,98 @@
+import json
+
+from agentkit.checkpoint import CHECKPOINT_NAME, Checkpoint, source_digest
+
+SETTINGS = {"dpi": 144, "pages": None, "shard": None}
+
+
+def _journal(tmp_path, *, resume=False, source="abc", settings=SETTINGS):
+    return Checkpoint(tmp_path / CHECKPOINT_NAME, source, settings, resume=resume)
+
+
+def test_resume_restores_recorded_work(tmp_path):
+    journal = _journal(tmp_path)
+    journal.record_page(1, {"width": 595.0, "texts": []})
+    journal.record_page(2, {"width": 595.0, "texts": []})
+    journal.record_images({"1": []}, {"assets/a.png": "d1"})
+    journal.record_render(1, "assets/page_1.png")
+    journal.record_comparison(1, 1, 1.0, 0.05)
+    journal.record_iteration(1, 1.0, 0.05)
+
+    resumed = _journal(tmp_path, resume=True)
+
+    assert resumed.resumed
+    assert sorted(resumed.layouts) == [1, 2]
+    assert resumed.images == {"pages": {"1": []}, "digests": {"assets/a.png": "d1"}}
+    assert resumed.renders == {1: "assets/page_1.png"}
+    comparisons, iterations = resumed.take_refinement()
+    assert comparisons == {1: (1.0, {1: 0.05})}
+    assert iterations == {1: (1.0, 0.05)}
+    assert resumed.take_refinement() == ({}, {})
+
+
+def test_torn_last_record_is_dropped_and_truncated(tmp_path):
+    journal = _journal(tmp_path)
+    journal.record_page(1, {"width": 595.0})
+    path = tmp_path / CHECKPOINT_NAME
+    intact = path.read_bytes()
+    path.write_bytes(intact + b'{"kind":"page","page":2,"lay')
+
+    resumed = _journal(tmp_path, resume=True)
+
+    assert resumed.resumed
+    assert sorted(resumed.layouts) == [1]
+    assert path.read_bytes() == intact
+    # New records continue after the last intact line.
+    resumed.record_page(2, {"width": 595.0})
+    assert sorted(_journal(tmp_path, resume=True).layouts) == [1, 2]
+
+
+def test_corrupt_middle_record_stops_loading_there(tmp_path):
+    journal = _journal(tmp_path)
+    journal.record_page(1, {})
+    path = tmp_path / CHECKPOINT_NAME
+    path.write_bytes(path.read_bytes() + b"not json\n" + json.dumps({"kind": "page", "page": 2, "layout": {}}).encode() + b"\n")
+
+    resumed = _journal(tmp_path, resume=True)
+
+    assert sorted(resumed.layouts) == [1]
+
+
+def test_mismatching_source_or_settings_start_over(tmp_path):
+    _journal(tmp_path).record_page(1, {})
+
+    other_pdf = _journal(tmp_path, resume=True, source="other")
+    assert not other_pdf.resumed and other_pdf.layouts == {}
+
+    _journal(tmp_path).record_page(1, {})
+    other_dpi = _journal(tmp_path, resume=True, settings={**SETTINGS, "dpi": 72})
+    assert not other_dpi.resumed
+    lines = (tmp_path / CHECKPOINT_NAME).read_bytes().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])["kind"] == "start"
+
+
+def test_without_resume_the_journal_is_replaced(tmp_path):
+    _journal(tmp_path).record_page(1, {})
+
+    fresh = _journal(tmp_path)
+
+    assert not fresh.resumed
+    assert _journal(tmp_path, resume=True).layouts == {}
+
+
+def test_comparisons_of_a_different_scale_are_ignored(tmp_path):
+    journal = _journal(tmp_path)
+    journal.record_comparison(1, 1, 1.0, 0.05)
+    journal.record_comparison(1, 2, 0.9, 0.07)
+
+    comparisons, _ = _journal(tmp_path, resume=True).take_refinement()
+
+    assert comparisons == {1: (1.0, {1: 0.05})}
+
+
+def test_source_digest_of_path_and_bytes_agree(tmp_path):
+    data = b"%PDF-1.7\n" * 1000
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(data)
+
+    assert source_digest(path, None) == source_digest(None, memoryview(data))
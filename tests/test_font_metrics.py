@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from agentkit.font_metrics import MAX_SCALE, estimate_text_scale, text_width
+from agentkit.manifest import load_manifest
+from agentkit.pdf_to_html import PageLayout, PDFToHTMLConverter, TextElement
+from agentkit.shards import merge_shards
+
+
+def _line(text, *, scale, size=10.0, family="Helvetica", weight=None):
+    # A line whose PDF width is ``scale`` times its width in the fallback font.
+    width = text_width(text, size, bold=weight == "700") * scale
+    return TextElement(
+        text=text, left=10, top=10, width=width, height=size, font_size=size, font_family=family, font_weight=weight
+    )
+
+
+def _layout(texts, page_number=1):
+    return PageLayout(width=595, height=842, texts=texts, images=[], shapes=[], page_number=page_number)
+
+
+def test_text_width_scales_with_font_size():
+    assert text_width("Statement", 20.0) == pytest.approx(2 * text_width("Statement", 10.0))
+    assert text_width("Statement", 10.0, bold=True) > text_width("Statement", 10.0)
+
+
+def test_estimate_recovers_a_uniform_scale():
+    texts = [_line("Opening balance", scale=0.9), _line("Closing balance", scale=0.9, weight="700")]
+
+    estimate = estimate_text_scale([_layout(texts)])
+
+    assert estimate.scale == pytest.approx(0.9, abs=1e-3)
+    assert estimate.lines == 2
+    assert estimate.spread == pytest.approx(0.0, abs=1e-3)
+
+
+def test_estimate_weights_long_lines_and_reports_fonts():
+    texts = [
+        _line("A long transaction description line", scale=0.8, family="Arial"),
+        _line("Short", scale=1.2, family="Times"),
+    ]
+
+    estimate = estimate_text_scale([_layout(texts)])
+
+    assert estimate.scale == pytest.approx(0.8, abs=1e-3)
+    assert estimate.per_font == {"Arial": pytest.approx(0.8, abs=1e-3), "Times": pytest.approx(1.2, abs=1e-3)}
+
+
+def test_estimate_is_clamped_and_needs_usable_lines():
+    assert estimate_text_scale([_layout([_line("Oversized heading", scale=3.0)])]).scale == MAX_SCALE
+    assert estimate_text_scale([_layout([_line("ab", scale=1.0)])]) is None
+    assert estimate_text_scale([]) is None
+
+
+def test_merged_shards_are_estimated_as_one_document(tmp_path):
+    pages = [_layout([_line(f"Row {index} payment", scale=0.8 + index / 50)], page_number=index) for index in range(1, 8)]
+    shard_dirs = []
+    for shard, selection in enumerate((pages[:2], pages[2:])):
+        numbers = [page.page_number for page in selection]
+        converter = PDFToHTMLConverter(Path("statement.pdf"), tmp_path / f"shard{shard}", pages=numbers, estimate_scale=True)
+        converter.scale_estimate = estimate_text_scale(selection)
+        converter.write_outputs(selection, [None] * len(selection), text_scale=converter.scale_estimate.scale)
+        shard_dirs.append(tmp_path / f"shard{shard}")
+
+    merge_shards(shard_dirs, tmp_path / "merged")
+
+    manifest = load_manifest(tmp_path / "merged")
+    # Each shard only saw its own pages, so the first shard's scale would be wrong.
+    assert load_manifest(shard_dirs[0])["text_scale"] != estimate_text_scale(pages).scale
+    assert manifest["text_scale"] == estimate_text_scale(pages).scale
+    assert manifest["scale_estimate"]["lines"] == 7
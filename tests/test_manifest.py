@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from agentkit.manifest import INDEX_NAME, ManifestReader, ManifestWriter, load_manifest
+from agentkit.sinks import DirectorySink, MemorySink
+
+
+def _page(number):
+    return {"page": number, "width": 595.0, "height": 842.0, "text": f"page {number} – café"}
+
+
+def _write(sink, pages=(1, 2, 3)):
+    with ManifestWriter(sink) as writer:
+        for number in pages:
+            writer.add_page(_page(number))
+        writer.finish({"pdf": "statement.pdf", "text_scale": 0.95, "pages": ["ignored"]})
+
+
+@pytest.fixture(params=["directory", "memory"])
+def sink(request, tmp_path):
+    return DirectorySink(tmp_path) if request.param == "directory" else MemorySink()
+
+
+def test_reader_seeks_to_single_pages(sink):
+    _write(sink)
+
+    reader = ManifestReader(sink)
+
+    assert reader.page_numbers() == [1, 2, 3]
+    assert reader.page(2) == _page(2)
+    assert reader.document() == {"pdf": "statement.pdf", "text_scale": 0.95}
+    with pytest.raises(KeyError):
+        reader.page(4)
+
+
+def test_index_spans_match_the_records(sink):
+    _write(sink)
+
+    index = json.loads(sink.read_text(INDEX_NAME))
+    data = sink.read_bytes("manifest.jsonl")
+
+    for number, (offset, length) in index["pages"].items():
+        record = json.loads(data[offset : offset + length])
+        assert record["record"] == "page" and str(record["page"]) == number
+    offset, length = index["document"]
+    assert offset + length == len(data)
+
+
+def test_page_seek_does_not_parse_other_records(tmp_path):
+    sink = DirectorySink(tmp_path)
+    _write(sink)
+    reader = ManifestReader(sink)
+    # Corrupting another record must not affect a seek to page 3.
+    path = tmp_path / "manifest.jsonl"
+    data = bytearray(path.read_bytes())
+    data[5] = ord("#")
+    path.write_bytes(bytes(data))
+
+    assert reader.page(3) == _page(3)
+
+
+def test_reader_scans_an_unfinished_manifest_and_skips_a_torn_line(sink):
+    _write(sink)
+    data = sink.read_bytes("manifest.jsonl")
+    first_two = data.split(b"\n")[:2]
+    sink.write_bytes("manifest.jsonl", b"\n".join(first_two) + b"\n" + b'{"record": "page", "pa')
+    sink.clear(INDEX_NAME)
+
+    reader = ManifestReader(sink)
+
+    assert reader.page_numbers() == [1, 2]
+    assert reader.page(2) == _page(2)
+    assert reader.document() == {}
+
+
+def test_load_manifest_assembles_the_json_structure(sink):
+    _write(sink)
+
+    assert load_manifest(sink) == {"pdf": "statement.pdf", "text_scale": 0.95, "pages": [_page(1), _page(2), _page(3)]}
+
+
+def test_load_manifest_prefers_json_and_handles_missing(sink):
+    assert load_manifest(sink) is None
+    sink.write_text("manifest.json", json.dumps({"pdf": "a.pdf", "pages": []}))
+
+    assert load_manifest(sink) == {"pdf": "a.pdf", "pages": []}
+
+
+def test_writer_requires_context_manager():
+    writer = ManifestWriter(MemorySink())
+
+    with pytest.raises(RuntimeError):
+        writer.add_page(_page(1))
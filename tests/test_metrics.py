@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from agentkit.metrics import EventHooks, MetricsRegistry
+
+
+def test_counter_openmetrics_output():
+    registry = MetricsRegistry()
+    pages = registry.counter("agentkit_pages", "Converted pages.")
+    pages.inc(3, phase="convert")
+    pages.inc(phase="refine")
+    pages.inc(2, phase="convert")
+
+    assert registry.to_openmetrics() == (
+        "# TYPE agentkit_pages counter\n"
+        "# HELP agentkit_pages Converted pages.\n"
+        'agentkit_pages_total{phase="convert"} 5\n'
+        'agentkit_pages_total{phase="refine"} 1\n'
+        "# EOF\n"
+    )
+    assert pages.value(phase="convert") == 5
+
+
+def test_counter_rejects_decrements():
+    with pytest.raises(ValueError):
+        MetricsRegistry().counter("agentkit_jobs").inc(-1)
+
+
+def test_gauge_has_no_total_suffix():
+    registry = MetricsRegistry()
+    registry.gauge("agentkit_queue_depth").set(4)
+
+    assert "agentkit_queue_depth 4\n" in registry.to_openmetrics()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    seconds = registry.histogram("agentkit_stage_seconds", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0, float("nan")):
+        seconds.observe(value, stage="extract")
+
+    lines = registry.to_openmetrics().splitlines()
+
+    assert 'agentkit_stage_seconds_bucket{stage="extract",le="0.1"} 1' in lines
+    assert 'agentkit_stage_seconds_bucket{stage="extract",le="1"} 3' in lines
+    assert 'agentkit_stage_seconds_bucket{stage="extract",le="+Inf"} 4' in lines
+    assert 'agentkit_stage_seconds_count{stage="extract"} 4' in lines
+    assert 'agentkit_stage_seconds_sum{stage="extract"} 4.25' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("agentkit_jobs").inc(error='bad "quote"\nline\\')
+
+    assert 'agentkit_jobs_total{error="bad \\"quote\\"\\nline\\\\"} 1' in registry.to_openmetrics()
+
+
+def test_snapshot_is_json_serializable():
+    registry = MetricsRegistry()
+    registry.counter("agentkit_conversions", "Completed conversions.").inc()
+    registry.histogram("agentkit_conversion_seconds", buckets=(1.0,)).observe(0.5)
+
+    snapshot = json.loads(json.dumps(registry.snapshot()))
+
+    assert snapshot["agentkit_conversions"]["series"] == [{"labels": {}, "value": 1.0}]
+    histogram = snapshot["agentkit_conversion_seconds"]["series"][0]
+    assert histogram["count"] == 1 and histogram["buckets"] == {"1": 1, "+Inf": 1}
+
+
+def test_metric_kind_conflicts_raise():
+    registry = MetricsRegistry()
+    registry.counter("agentkit_workers")
+
+    with pytest.raises(ValueError):
+        registry.gauge("agentkit_workers")
+
+
+def test_event_hooks_dispatch_and_isolate_failures():
+    hooks = EventHooks()
+    seen = []
+
+    @hooks.on("*")
+    def _record(event, payload):
+        seen.append((event, payload))
+
+    hooks.on("page_extracted", lambda event, payload: 1 / 0)
+    hooks.emit("page_extracted", page=1)
+    hooks.off("*", _record)
+    hooks.emit("page_rendered", page=1)
+
+    assert seen == [("page_extracted", {"page": 1})]
+    with pytest.raises(ValueError):
+        hooks.on("unknown_event", _record)
@@ -0,0 +1,77 @@
+import gzip
+
+import pytest
+
+from agentkit.serialize import BufferedTextWriter, open_precompressed, open_serialized, validate_encodings
+from agentkit.shared import optional_import
+from agentkit.sinks import MemorySink
+
+
+class _Recorder:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+
+def test_buffered_writer_encodes_in_chunks():
+    stream = _Recorder()
+    writer = BufferedTextWriter(stream, buffer_size=10)
+
+    writer.write("abc")
+    assert stream.chunks == []
+    writer.writelines(["défgh", "ijk"])
+    writer.write("z")
+    writer.flush()
+
+    assert stream.chunks == ["abcdéfghijk".encode("utf-8"), b"z"]
+
+
+def test_open_serialized_writes_gzip_copy():
+    sink = MemorySink()
+    text = "<p>row</p>\n" * 5000
+
+    with open_serialized(sink, "index.html", ("gzip",)) as fh:
+        fh.write(text)
+
+    assert sink.read_text("index.html") == text
+    assert gzip.decompress(sink.read_bytes("index.html.gz")).decode("utf-8") == text
+
+
+def test_gzip_copies_are_reproducible():
+    first, second = MemorySink(), MemorySink()
+    for sink in (first, second):
+        with open_precompressed(sink, "manifest.jsonl", ("gzip",)) as fh:
+            fh.write(b'{"page": 1}\n')
+
+    assert first.read_bytes("manifest.jsonl.gz") == second.read_bytes("manifest.jsonl.gz")
+
+
+def test_stale_copies_are_removed():
+    sink = MemorySink()
+    with open_serialized(sink, "index.html", ("gzip",)) as fh:
+        fh.write("old")
+
+    with open_serialized(sink, "index.html") as fh:
+        fh.write("new")
+
+    assert sink.read_text("index.html") == "new"
+    assert not sink.exists("index.html.gz")
+
+
+def test_validate_encodings():
+    assert validate_encodings(["gzip", "gzip"]) == ("gzip",)
+    with pytest.raises(ValueError):
+        validate_encodings(["zstd"])
+
+
+@pytest.mark.skipif(optional_import("brotli") is None and optional_import("brotlicffi") is None, reason="Brotli not installed")
+def test_brotli_copy_round_trips():
+    brotli = optional_import("brotli") or optional_import("brotlicffi")
+    sink = MemorySink()
+
+    with open_serialized(sink, "index.html", ("gzip", "br")) as fh:
+        fh.write("<p>hello</p>")
+
+    assert brotli.decompress(sink.read_bytes("index.html.br")) == b"<p>hello</p>"
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from agentkit.metrics import MetricsRegistry
+from agentkit.server import ConversionJob, ConversionServer, OutputBusyError, ServerBusyError
+
+
+def _server(tmp_path, **kwargs):
+    # Workers are never started, so submitted jobs simply stay queued.
+    return ConversionServer(work_dir=tmp_path, metrics=MetricsRegistry(), **kwargs)
+
+
+def _job(output_dir):
+    return ConversionJob(pdf=b"%PDF-", output_dir=output_dir, iterations=0, regression=False, dpi=72)
+
+
+@pytest.mark.parametrize("output", ["..", "../elsewhere", "/tmp/elsewhere", "a/../..", "."])
+def test_outputs_are_confined_to_the_work_directory(tmp_path, output):
+    server = _server(tmp_path / "work")
+
+    with pytest.raises(ValueError, match="subdirectory"):
+        server._job_from_request({"output": output}, b"%PDF-")
+
+
+def test_named_and_default_outputs(tmp_path):
+    server = _server(tmp_path)
+
+    assert server._job_from_request({"output": "a/b"}, b"%PDF-").output_dir == tmp_path.resolve() / "a" / "b"
+    assert server._job_from_request({}, b"%PDF-").output_dir.parent == tmp_path.resolve()
+
+
+def test_second_job_for_the_same_output_conflicts(tmp_path):
+    server = _server(tmp_path)
+    first = _job(tmp_path / "out")
+    server.submit(first)
+
+    with pytest.raises(OutputBusyError):
+        server.submit(_job(tmp_path / "out"))
+
+    first.future.set_result({})
+    server.submit(_job(tmp_path / "out"))
+
+
+def test_full_queue_rejects_and_releases_the_output(tmp_path):
+    server = _server(tmp_path, queue_size=1)
+    server.submit(_job(tmp_path / "a"))
+
+    with pytest.raises(ServerBusyError):
+        server.submit(_job(tmp_path / "b"))
+    assert server._active_outputs == {tmp_path / "a"}
+
+
+def test_prune_outputs_keeps_fresh_and_active_directories(tmp_path):
+    server = _server(tmp_path, output_ttl=60)
+    server.submit(_job(tmp_path / "active"))
+    for name in ("expired", "fresh", "active"):
+        (tmp_path / name).mkdir()
+    os.utime(tmp_path / "expired", (1000, 1000))
+    os.utime(tmp_path / "active", (1000, 1000))
+
+    assert server.prune_outputs() == 1
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == ["active", "fresh"]
+
+
+def test_prune_outputs_disabled_without_ttl(tmp_path):
+    server = _server(tmp_path, output_ttl=None)
+    (tmp_path / "old").mkdir()
+    os.utime(tmp_path / "old", (1000, 1000))
+
+    assert server.prune_outputs() == 0
+    assert (tmp_path / "old").is_dir()
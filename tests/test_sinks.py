@@ -0,0 +1,56 @@
+import pytest
+
+from agentkit.sinks import DirectorySink, MemorySink, OutputSink
+
+
+@pytest.fixture(params=["directory", "memory"])
+def sink(request, tmp_path):
+    return DirectorySink(tmp_path) if request.param == "directory" else MemorySink()
+
+
+def test_output_sink_is_abstract():
+    with pytest.raises(TypeError):
+        OutputSink()
+
+
+def test_round_trip_bytes_and_text(sink):
+    sink.write_bytes("assets/page_1.png", b"\x89PNG")
+    sink.write_text("index.html", "<p>café</p>")
+
+    assert sink.read_bytes("assets/page_1.png") == b"\x89PNG"
+    assert sink.read_text("index.html") == "<p>café</p>"
+    assert sink.exists("index.html")
+    assert not sink.exists("missing.html")
+
+
+def test_streaming_writers(sink):
+    with sink.open_text("pages/page_0001.html") as fh:
+        fh.write("<html>")
+        fh.write("</html>")
+    with sink.open_binary("manifest.jsonl") as fh:
+        fh.write(b"{}\n")
+
+    assert sink.read_text("pages/page_0001.html") == "<html></html>"
+    assert sink.read_bytes("manifest.jsonl") == b"{}\n"
+
+
+def test_clear_removes_only_matching_names(sink):
+    for name in ("assets/page_1_image_1.png", "assets/page_1_image_2.png", "assets/page_10.png", "index.html"):
+        sink.write_bytes(name, b"x")
+
+    sink.clear("assets/page_1_image_")
+
+    assert not sink.exists("assets/page_1_image_1.png")
+    assert not sink.exists("assets/page_1_image_2.png")
+    assert sink.exists("assets/page_10.png")
+    assert sink.exists("index.html")
+
+
+def test_missing_name_raises_file_not_found(sink):
+    with pytest.raises(FileNotFoundError):
+        sink.read_bytes("nothing.bin")
+
+
+def test_path_for(tmp_path):
+    assert DirectorySink(tmp_path).path_for("assets/a.png") == tmp_path / "assets" / "a.png"
+    assert MemorySink().path_for("assets/a.png") is None
@@ -0,0 +1,135 @@
+import dataclasses
+import math
+import random
+
+import pytest
+
+from agentkit.spatial import MAX_ELEMENT_CELLS, SpatialIndex
+
+
+@dataclasses.dataclass
+class Box:
+    left: float
+    top: float
+    width: float
+    height: float
+
+
+def _bounds(box):
+    return box.left, box.top, box.left + box.width, box.top + box.height
+
+
+def _touches(first, second):
+    return first[0] <= second[2] and second[0] <= first[2] and first[1] <= second[3] and second[1] <= first[3]
+
+
+def _distance(box, x, y):
+    left, top, right, bottom = _bounds(box)
+    return math.hypot(max(left - x, 0.0, x - right), max(top - y, 0.0, y - bottom))
+
+
+def _random_boxes(rng, count):
+    boxes = [
+        Box(rng.uniform(-200, 900), rng.uniform(-200, 1200), rng.uniform(0, 150), rng.uniform(0, 60)) for _ in range(count)
+    ]
+    # A few page-sized backgrounds exercise the list of large elements.
+    boxes += [Box(0, 0, 600, 800), Box(-50, -50, 5000, 20)]
+    return boxes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_query_matches_brute_force(seed):
+    rng = random.Random(seed)
+    boxes = _random_boxes(rng, 150)
+    index = SpatialIndex(boxes, cell_size=rng.choice([16.0, 48.0, 200.0]))
+
+    for _ in range(50):
+        left, top = rng.uniform(-300, 1000), rng.uniform(-300, 1300)
+        region = (left, top, left + rng.uniform(0, 400), top + rng.uniform(0, 400))
+        expected = [box for box in boxes if _touches(_bounds(box), region)]
+        assert index.query(*region) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_overlaps_matches_brute_force(seed):
+    rng = random.Random(seed)
+    boxes = _random_boxes(rng, 150)
+    index = SpatialIndex(boxes)
+
+    for element in boxes[:40]:
+        a = _bounds(element)
+        expected = [
+            other
+            for other in boxes
+            if other is not element
+            and a[0] < _bounds(other)[2]
+            and _bounds(other)[0] < a[2]
+            and a[1] < _bounds(other)[3]
+            and _bounds(other)[1] < a[3]
+        ]
+        assert index.overlaps(element) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nearest_matches_brute_force(seed):
+    rng = random.Random(seed)
+    boxes = _random_boxes(rng, 80)[:-2]
+    index = SpatialIndex(boxes, cell_size=rng.choice([10.0, 48.0, 100.0]))
+
+    for _ in range(100):
+        # Include points far outside the populated grid.
+        x, y = rng.uniform(-20000, 20000), rng.uniform(-20000, 20000)
+        max_distance = rng.choice([math.inf, 50.0, 5000.0])
+        wide = rng.random() < 0.5
+        predicate = (lambda box: box.width > 75) if wide else None
+        candidates = [
+            (_distance(box, x, y), position)
+            for position, box in enumerate(boxes)
+            if _distance(box, x, y) <= max_distance and (predicate is None or predicate(box))
+        ]
+        expected = boxes[min(candidates)[1]] if candidates else None
+        assert index.nearest(x, y, max_distance=max_distance, predicate=predicate) is expected
+
+
+def test_nearest_far_outside_the_grid_only_visits_occupied_rings(monkeypatch):
+    index = SpatialIndex([Box(0, 0, 10, 10), Box(100, 100, 10, 10)], cell_size=10.0)
+    visited = []
+    original = SpatialIndex._ring
+
+    def _ring(cx, cy, radius, extent):
+        visited.append(radius)
+        return original(cx, cy, radius, extent)
+
+    monkeypatch.setattr(SpatialIndex, "_ring", staticmethod(_ring))
+
+    assert index.nearest(1e7, 1e7) is index.get(1)
+    assert len(visited) <= 12, visited
+
+
+def test_insert_remove_and_replace_keep_key_order():
+    boxes = [Box(0, 0, 10, 10), Box(5, 5, 10, 10), Box(50, 50, 10, 10)]
+    index = SpatialIndex(boxes)
+
+    assert index.remove(1) is boxes[1]
+    assert index.query(0, 0, 100, 100) == [boxes[0], boxes[2]]
+    grown = Box(0, 0, 80, 80)
+    index.replace(0, grown)
+    assert index.query_keys(65, 65, 70, 70) == [0]
+    assert index.insert(Box(1, 1, 1, 1)) == 3
+    with pytest.raises(KeyError):
+        index.insert(Box(0, 0, 1, 1), key=2)
+    assert list(index) == [grown, boxes[2], index.get(3)]
+
+
+def test_large_elements_bypass_the_grid():
+    huge = Box(0, 0, 48.0 * (MAX_ELEMENT_CELLS + 1), 48.0)
+    index = SpatialIndex([huge])
+
+    assert index._cells == {}
+    assert index.query(10000, 0, 10001, 1) == [huge]
+    assert index.remove(0) is huge and len(index) == 0
+
+
+def test_cell_size_must_be_positive():
+    with pytest.raises(ValueError):
+        SpatialIndex(cell_size=0)
@@ -0,0 +1,83 @@
+import os
+
+from agentkit.pdf_to_html import ImageElement, PageLayout, ShapeElement, TextElement
+from agentkit.templates import TemplateStore, fingerprint_layouts
+
+
+def _statement(rows, *, text="Opening balance", logo="logo.png"):
+    texts = [TextElement(text=text, left=40, top=80, width=90, height=10, font_size=10, font_family="Arial")]
+    # Striped table rows: one full-width fill per row, alternating colours.
+    shapes = [
+        ShapeElement(40, 120 + 14 * row, 515, 14, "rgb(240, 240, 240)" if row % 2 else "rgb(255, 255, 255)")
+        for row in range(rows)
+    ]
+    images = [ImageElement(src=logo, left=40, top=20, width=80, height=30)]
+    return PageLayout(width=595, height=842, texts=texts, images=images, shapes=shapes, page_number=1)
+
+
+def test_fingerprint_ignores_text_and_row_count():
+    digests = {"logo.png": "d1"}
+    base = fingerprint_layouts([_statement(6)], digests)
+
+    assert fingerprint_layouts([_statement(11, text="Closing balance")], digests) == base
+    assert fingerprint_layouts([_statement(6), _statement(3)], digests) == base
+
+
+def test_fingerprint_tracks_static_structure():
+    base = fingerprint_layouts([_statement(6)], {"logo.png": "d1"})
+
+    assert fingerprint_layouts([_statement(6)], {"logo.png": "d2"}) != base
+    wide = _statement(6)
+    wide.width = 842
+    assert fingerprint_layouts([wide], {"logo.png": "d1"}) != base
+
+
+def test_record_and_lookup_round_trip(tmp_path):
+    store = TemplateStore(tmp_path)
+    assert store.lookup("f" * 64) is None
+
+    store.record("f" * 64, text_scale=0.97, diff_score=0.02, source="a.pdf", pages=3)
+    template = store.record("f" * 64, text_scale=0.95)
+    store.record_hit(template)
+
+    reloaded = TemplateStore(tmp_path).lookup("f" * 64)
+    assert reloaded.text_scale == 0.95
+    assert reloaded.diff_score is None
+    assert (reloaded.source, reloaded.pages, reloaded.hits) == ("a.pdf", 3, 1)
+
+
+def test_unreadable_template_is_ignored(tmp_path):
+    (tmp_path / ("f" * 64 + ".json")).write_text("{not json", encoding="utf-8")
+
+    assert TemplateStore(tmp_path).lookup("f" * 64) is None
+
+
+def test_asset_cache_evicts_least_recently_used(tmp_path):
+    store = TemplateStore(tmp_path, max_asset_bytes=350)
+    for age, key in enumerate(["old", "stale", "new"]):
+        store.store_asset(key, b"x" * 100, "png")
+        os.utime(tmp_path / "assets" / f"{key}.png", (1000 + age, 1000 + age))
+    # Reading an asset makes it the most recently used one.
+    assert store.load_asset("old") == (b"x" * 100, "png")
+
+    store.store_asset("last", b"y" * 100, "png")
+
+    assert store.load_asset("stale") is None
+    assert store.load_asset("old") is not None
+    assert store.load_asset("last") == (b"y" * 100, "png")
+
+
+def test_oversized_assets_are_not_cached(tmp_path):
+    store = TemplateStore(tmp_path, max_asset_bytes=50)
+    store.store_asset("big", b"x" * 100, "png")
+
+    assert store.load_asset("big") is None
+
+
+def test_unbounded_asset_cache_is_only_trimmed_on_request(tmp_path):
+    store = TemplateStore(tmp_path, max_asset_bytes=None)
+    for key in "abc":
+        store.store_asset(key, b"x" * 1000, "webp")
+
+    assert store.evict_assets(1500) == 2
+    assert len(list((tmp_path / "assets").iterdir())) == 1
@@ -0,0 +1,72 @@
+from agentkit.pdf_to_html import PageLayout, ShapeElement, TextElement
+from agentkit.text_blocks import coalesce_layout, coalesce_texts, find_blocks, merge_lines
+
+
+def _line(text, left, top, *, size=10.0, font="Helvetica"):
+    return TextElement(text=text, left=left, top=top, width=6.0 * len(text), height=size, font_size=size, font_name=font)
+
+
+def _column(left, top, count, *, pitch=12.0, prefix="row", **kwargs):
+    return [_line(f"{prefix} {index}", left, top + index * pitch, **kwargs) for index in range(count)]
+
+
+def test_find_blocks_groups_lines_by_font_left_edge_and_pitch():
+    texts = _column(10, 100, 4) + _column(300, 100, 3, prefix="amount") + [_line("title", 10, 20, size=18)]
+
+    blocks = find_blocks(texts)
+
+    assert sorted(blocks) == [[0, 1, 2, 3], [4, 5, 6]]
+
+
+def test_find_blocks_splits_runs_at_a_pitch_change_or_paragraph_gap():
+    texts = [_line("a", 10, 100), _line("b", 10, 112), _line("c", 10, 124), _line("d", 10, 140), _line("e", 10, 400)]
+
+    assert find_blocks(texts) == [[0, 1, 2]]
+
+
+def test_merge_lines_keeps_text_and_geometry():
+    lines = _column(10, 100, 3)
+
+    block = merge_lines(lines)
+
+    assert block.text == "row 0\nrow 1\nrow 2"
+    assert block.top == 100
+    assert block.line_height == 12.0
+    assert block.height == lines[-1].top + lines[-1].height - 100
+    assert block.width == max(line.width for line in lines)
+
+
+def test_coalesce_texts_keeps_every_line_in_order():
+    texts = _column(10, 100, 5) + [_line("footer", 200, 700)] + _column(300, 100, 3, prefix="amount")
+
+    result = coalesce_texts(texts, budget=0)
+
+    assert len(result) == 3
+    assert "\n".join(text.text for text in result).split("\n") == [text.text for text in texts]
+
+
+def test_coalesce_texts_stops_at_the_budget_and_merges_longest_runs_first():
+    texts = _column(10, 100, 5) + _column(300, 100, 3, prefix="amount")
+
+    result = coalesce_texts(texts, budget=5)
+
+    # Merging the five-line run alone reaches the budget; the shorter run stays as single lines.
+    assert [text.text for text in result] == ["row 0\nrow 1\nrow 2\nrow 3\nrow 4", "amount 0", "amount 1", "amount 2"]
+
+
+def test_coalesce_texts_under_budget_is_unchanged():
+    texts = _column(10, 100, 3)
+
+    assert coalesce_texts(texts, budget=10) == texts
+
+
+def test_coalesce_layout_counts_shapes_and_images():
+    texts = _column(10, 100, 4)
+    shapes = [ShapeElement(0, 0, 10, 10, "rgb(0, 0, 0)")] * 3
+    layout = PageLayout(width=600, height=800, texts=texts, images=[], shapes=shapes, page_number=2)
+
+    assert coalesce_layout(layout, 10) is layout
+    merged = coalesce_layout(layout, 5)
+    assert len(merged.texts) == 1
+    assert merged.shapes == shapes and merged.page_number == 2
+    assert layout.texts == texts